@@ -3,15 +3,19 @@ from starlette.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from typing import Dict, Any, Optional
+from starlette.concurrency import run_in_threadpool
 import shutil
 from pathlib import Path
 import uuid
-import re
+import threading
+from collections import OrderedDict
 from datetime import datetime
 import logging
 
 from src.config import Config
-from main import CityBudgetRAG, clean_city_name
+from src.metadata import extract_metadata_with_ai, extract_metadata_from_content  # noqa: F401 (kept importable from api)
+from src.jobs import create_job_manager, JobQueueFull
+from main import CityBudgetRAG
 
 # Set up logger
 logger = logging.getLogger(__name__)
@@ -21,56 +25,11 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 
 config = Config()
 rag_system = CityBudgetRAG(config)
+job_manager = create_job_manager(config, rag_system)
 current_document = None
-
-async def extract_metadata_with_ai(text_content: str, openai_api_key: str, model: str = "gpt-4o-mini") -> tuple[str, str]:
-    from openai import OpenAI
-    client = OpenAI(api_key=openai_api_key)
-    sample_text = text_content[:3000]
-    prompt = f"""Analyze this government budget document and extract:
-1. The city name (just the city name, not \"City of X\")
-2. The fiscal year (in format YYYY-YY or YYYY-YYYY)
-If you can't find this information, respond with \"Unknown\" for that field.
-Document text:
-{sample_text}
-Respond in this exact format:
-City: [city name]
-Fiscal Year: [fiscal year]"""
-    try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "You are an expert at extracting information from government documents."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.1,
-            max_tokens=50
-        )
-        result = response.choices[0].message.content
-        city_match = re.search(r'City:\s*(.+)', result)
-        fy_match = re.search(r'Fiscal Year:\s*(.+)', result)
-        city_name = city_match.group(1).strip() if city_match else "Unknown"
-        fiscal_year = fy_match.group(1).strip() if fy_match else "Unknown"
-        return city_name, fiscal_year
-    except Exception as e:
-        logger.error(f"Error extracting metadata with AI: {e}")
-        return "Unknown", "Unknown"
-
-def extract_metadata_from_content(text_content: str) -> tuple[str, str]:
-    city_patterns = [r'City of ([A-Za-z\s]+?)(?:\n|Budget|Fiscal)', r'([A-Za-z\s]+?) City', r'Municipality of ([A-Za-z\s]+)']
-    fiscal_year_patterns = [r'FY\s*(\d{4}[-/]\d{2,4})', r'Fiscal Year\s*(\d{4}[-/]\d{2,4})', r'Budget\s*(\d{4}[-/]\d{2,4})', r'(\d{4}[-/]\d{2,4})\s*Budget']
-    city_name, fiscal_year = "Unknown", "Unknown"
-    for pattern in city_patterns:
-        match = re.search(pattern, text_content[:5000], re.IGNORECASE)
-        if match:
-            city_name = match.group(1).strip()
-            break
-    for pattern in fiscal_year_patterns:
-        match = re.search(pattern, text_content[:5000], re.IGNORECASE)
-        if match:
-            fiscal_year = match.group(1).strip()
-            break
-    return city_name, fiscal_year
+# Jobs whose document was already made current, newest last; bounded like the finished jobs themselves
+_activated_jobs: "OrderedDict[str, None]" = OrderedDict()
+_activation_lock = threading.Lock()
 
 class Query(BaseModel):
     question: str
@@ -86,6 +45,29 @@ class IngestResponse(BaseModel):
     city_name: str
     fiscal_year: str
     document_id: str
+    pages_skipped: int = 0
+    chunks_skipped: int = 0
+    chunks_unchanged: int = 0
+    chunks_relocated: int = 0
+    chunks_deleted: int = 0
+    table_pages_skipped: int = 0
+    chunks_deduplicated: int = 0
+    dedup_ratio: float = 0.0
+    embedding_batches: Optional[dict] = None
+
+class IngestJobResponse(BaseModel):
+    job_id: str
+    status: str
+    file_id: str
+    file_name: str
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str
+    stage: str
+    progress: float
+    result: Optional[IngestResponse] = None
+    error: Optional[str] = None
 
 class QueryResponse(BaseModel):
     answer: str
@@ -99,84 +81,72 @@ async def read_root():
 
 @app.get("/api/documents")
 async def list_documents():
-    if current_document:
-        return [current_document]
-    return []
-
-@app.post("/ingest", response_model=IngestResponse)
+    documents = [current_document] if current_document else []
+    # Documents a persistent vector store kept from earlier runs
+    for document_id, entry in rag_system.indexed_documents().items():
+        if current_document and current_document["documentId"] == document_id:
+            continue
+        documents.append({
+            "city": entry.get("city_name"),
+            "fiscalYear": entry.get("fiscal_year"),
+            "originalFileName": entry.get("file_name"),
+            "uploadTime": entry.get("updated_at"),
+            "documentId": document_id
+        })
+    return documents
+
+@app.post("/ingest", response_model=IngestJobResponse, status_code=202)
 async def ingest_document(file: UploadFile = File(...)):
-    global current_document
-    city_name, fiscal_year = "Unknown", "Unknown"
     file_id = str(uuid.uuid4())[:8]
     if not file.filename.endswith('.pdf'):
         raise HTTPException(400, "Only PDF files are allowed")
     upload_dir = Path("data/pdfs")
     upload_dir.mkdir(parents=True, exist_ok=True)
     file_path = upload_dir / f"{file_id}_{file.filename}"
+    await run_in_threadpool(_save_upload, file, file_path)
+
+    # Extraction, embedding and upserts run in the background; poll /jobs/{job_id}
+    try:
+        job_id = job_manager.submit_upload(str(file_path), file.filename, file_id, on_success=_activate_document)
+    except JobQueueFull as e:
+        raise HTTPException(503, f"Too many documents are being processed, try again later ({e})")
+
+    return IngestJobResponse(job_id=job_id, status="queued", file_id=file_id, file_name=file.filename)
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(404, f"Unknown job: {job_id}")
+    result = job.get("result")
+    if job["status"] == "succeeded" and result:
+        _activate_document(job_id, result)
+        job["result"] = IngestResponse(**{key: result[key] for key in IngestResponse.model_fields if key in result})
+    return JobStatusResponse(**{key: job.get(key) for key in JobStatusResponse.model_fields})
+
+def _save_upload(file: UploadFile, file_path: Path) -> None:
     with file_path.open("wb") as buffer:
         shutil.copyfileobj(file.file, buffer)
 
-    from src.pdf_processor import PDFProcessor
-    processor = PDFProcessor()
-    content = processor.extract_text_from_pdf(str(file_path))
-    combined_text = "".join(content[i]['text'] + "\n" for i in range(min(5, len(content))) if content[i].get('text'))
-
-    if hasattr(config, 'OPENAI_API_KEY') and config.OPENAI_API_KEY:
-        city_name, fiscal_year = await extract_metadata_with_ai(combined_text, config.OPENAI_API_KEY, config.METADATA_EXTRACTION_MODEL)
-    if city_name == "Unknown" or fiscal_year == "Unknown":
-        regex_city, regex_fy = extract_metadata_from_content(combined_text)
-        if city_name == "Unknown" and regex_city != "Unknown":
-            city_name = regex_city
-        if fiscal_year == "Unknown" and regex_fy != "Unknown":
-            fiscal_year = regex_fy
-    if city_name == "Unknown" or fiscal_year == "Unknown":
-        filename_clean = file.filename.replace('_', ' ').replace('-', ' ')
-        if city_name == "Unknown":
-            for city in ["pittsburgh", "cleveland", "tulsa", "anaheim", "chicago", "boston", "seattle", "phoenix", "dallas", "houston", "atlanta"]:
-                if city in filename_clean.lower():
-                    city_name = city.title()
-                    break
-        if fiscal_year == "Unknown":
-            year_match = re.search(r'(\d{4})', filename_clean)
-            if year_match:
-                fiscal_year = year_match.group(1)
-
-    # Create a safe document ID
-    doc_id = f"{clean_city_name(city_name)}_{fiscal_year}".lower()
-    logger.info(f"Created document ID: {doc_id} for city: {city_name}, fiscal_year: {fiscal_year}")
-
-    metadata = {
-        "file_name": file.filename,
-        "city_name": city_name,  # Original city name for display
-        "fiscal_year": fiscal_year,
-        "file_id": file_id,
-        "document_id": doc_id  # Add document_id to metadata
-    }
-    
-    result = rag_system.ingest_document(str(file_path), metadata)
-
-    current_document = {
-        "city": city_name,
-        "fiscalYear": fiscal_year,
-        "fileName": f"{city_name}_Budget_FY{fiscal_year}.pdf",
-        "originalFileName": file.filename,
-        "fileId": file_id,
-        "uploadTime": datetime.utcnow().isoformat(),
-        "documentId": doc_id  # Store document_id in current_document
-    }
-    
-    logger.info(f"Document ingested successfully. ID: {doc_id}, City: {city_name}, FY: {fiscal_year}")
-
-    return IngestResponse(
-        status=result.get("status", "success"),
-        file_id=file_id,
-        file_name=file.filename,
-        chunks_processed=result.get("chunks_processed", 0),
-        pages_processed=result.get("pages_processed", 0),
-        city_name=city_name,
-        fiscal_year=fiscal_year,
-        document_id=doc_id
-    )
+def _activate_document(job_id: str, result: Dict[str, Any]) -> None:
+    """Make a finished upload the current document, once per job"""
+    global current_document
+    with _activation_lock:
+        if job_id in _activated_jobs:
+            return
+        _activated_jobs[job_id] = None
+        while len(_activated_jobs) > config.INGEST_MAX_FINISHED:
+            _activated_jobs.popitem(last=False)
+        current_document = {
+            "city": result["city_name"],
+            "fiscalYear": result["fiscal_year"],
+            "fileName": f"{result['city_name']}_Budget_FY{result['fiscal_year']}.pdf",
+            "originalFileName": result["file_name"],
+            "fileId": result["file_id"],
+            "uploadTime": datetime.utcnow().isoformat(),
+            "documentId": result["document_id"]  # Store document_id in current_document
+        }
+    logger.info(f"Document ingested successfully. ID: {result['document_id']}, City: {result['city_name']}, FY: {result['fiscal_year']}")
 
 @app.post("/query", response_model=QueryResponse)
 async def query_documents(query: Query):
@@ -189,8 +159,10 @@ async def query_documents(query: Query):
             
         logger.info(f"Query request received. Document ID: {doc_id}, Query: '{query.question}'")
         
-        # Use document_id parameter
-        result = rag_system.query(query.question, document_id=doc_id, use_cache=query.use_cache)
+        # Retrieval and the LLM call block, so they run on a worker thread and
+        # leave the event loop free for other requests
+        result = await run_in_threadpool(rag_system.query, query.question, document_id=doc_id,
+                                         use_cache=query.use_cache)
         return QueryResponse(**result)
     except Exception as e:
         logger.error(f"Query error: {str(e)}")
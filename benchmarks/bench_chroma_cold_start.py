@@ -0,0 +1,66 @@
+"""Cold-start time of the persistent ChromaDB store against collection size.
+
+For each size, fills a persistent collection with random vectors, then
+times in a fresh process what an API restart pays: opening the collection
+(including the document catalog) and answering the first query.
+
+    python -m benchmarks.bench_chroma_cold_start --sizes 1000 10000 50000 --dimensions 1536
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+
+import numpy as np
+
+from src.chunk import Chunk
+from src.vector_store import ChromaVectorStore
+
+COLD_START = textwrap.dedent("""
+    import json, sys, time
+    start = time.perf_counter()
+    from src.vector_store import ChromaVectorStore
+    imported = time.perf_counter()
+    store = ChromaVectorStore("bench", persist_directory=sys.argv[1])
+    opened = time.perf_counter()
+    store.query([1.0] * int(sys.argv[2]), top_k=5, document_id=sorted(store.catalog.documents())[0])
+    queried = time.perf_counter()
+    print(json.dumps({"import": imported - start, "open": opened - imported, "first_query": queried - opened}))
+""")
+
+
+def fill(directory: str, vectors: int, dimensions: int, per_document: int = 3000) -> float:
+    store = ChromaVectorStore("bench", persist_directory=directory)
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    for offset in range(0, vectors, 1000):
+        count = min(1000, vectors - offset)
+        document_id = f"city_{offset // per_document}_2024"
+        chunks = [Chunk(f"chunk_{offset + i}", f"chunk {offset + i}", {"page_number": i}, vector)
+                  for i, vector in enumerate(rng.normal(size=(count, dimensions)).astype(np.float32))]
+        store.store_embeddings(chunks, document_id=document_id)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--dimensions", type=int, default=1536)
+    args = parser.parse_args()
+
+    print(f"{'vectors':>8} {'fill s':>7} {'import s':>9} {'open s':>7} {'1st query s':>12}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            filled = fill(directory, size, args.dimensions)
+            output = subprocess.run([sys.executable, "-c", COLD_START, directory, str(args.dimensions)],
+                                    capture_output=True, text=True, check=True)
+            timing = json.loads(output.stdout.strip().splitlines()[-1])
+            print(f"{size:>8} {filled:>7.1f} {timing['import']:>9.2f} {timing['open']:>7.2f} "
+                  f"{timing['first_query']:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
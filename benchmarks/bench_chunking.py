@@ -0,0 +1,68 @@
+"""Chunks/sec of the token-native chunker vs. the LangChain recursive splitter.
+
+Runs TextProcessor.process_document_content over a synthetic budget text
+with both chunkers, so the numbers include metadata creation (and the
+extra encode for token_count that the recursive splitter needs). Then
+compares chunk counts of per-page and document-level chunking, where
+short page tails no longer become chunks of their own.
+
+    python -m benchmarks.bench_chunking --pages 200
+"""
+import argparse
+import random
+import time
+
+from benchmarks.synthetic import narrative_text, table_rows
+from src.text_processor import TextProcessor
+
+
+def budget_pages(pages: int, seed: int = 7):
+    rng = random.Random(seed)
+    content = []
+    for page_num in range(1, pages + 1):
+        text = "\n\n".join(narrative_text(rng, sentences=12) for _ in range(3))
+        table = "\n".join("   ".join(row) for row in table_rows(rng, rows=25))
+        content.append({'page_num': page_num, 'text': text, 'tables': [table]})
+    return content
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    args = parser.parse_args()
+
+    content = budget_pages(args.pages)
+    metadata = {"file_name": "synthetic_budget.pdf", "city_name": "Example", "fiscal_year": "2025"}
+    characters = sum(len(page['text']) + sum(len(t) for t in page['tables']) for page in content)
+    print(f"{args.pages} pages, {characters:,} characters, chunk_size={args.chunk_size}, overlap={args.chunk_overlap}")
+    print(f"{'chunker':<10} {'chunks':>8} {'seconds':>9} {'chunks/s':>10}")
+
+    results = {}
+    for chunker in ("recursive", "token"):
+        processor = TextProcessor(args.chunk_size, args.chunk_overlap, chunker=chunker)
+        start = time.perf_counter()
+        chunks = processor.process_document_content(content, metadata)
+        seconds = time.perf_counter() - start
+        results[chunker] = len(chunks) / seconds
+        print(f"{chunker:<10} {len(chunks):>8} {seconds:>9.2f} {results[chunker]:>10.1f}")
+
+    print(f"speedup: {results['token'] / results['recursive']:.1f}x")
+
+    print(f"\n{'scope':<10} {'chunks':>8} {'mean tokens':>12} {'< 1/4 size':>11} {'multi-page':>11}")
+    counts = {}
+    for scope in ("page", "document"):
+        processor = TextProcessor(args.chunk_size, args.chunk_overlap, chunking_scope=scope)
+        chunks = processor.process_document_content(content, metadata)
+        tokens = [chunk["metadata"]["token_count"] for chunk in chunks]
+        small = sum(1 for count in tokens if count < args.chunk_size / 4)
+        spanning = sum(1 for chunk in chunks if chunk["metadata"]["page_end"] != chunk["metadata"]["page_start"])
+        counts[scope] = len(chunks)
+        print(f"{scope:<10} {len(chunks):>8} {sum(tokens) / len(tokens):>12.0f} {small:>11} {spanning:>11}")
+
+    print(f"document scope: {1 - counts['document'] / counts['page']:.0%} fewer chunks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Wall time to embed a large document: sequential vs. concurrent dispatch.
+
+Uses an in-process stand-in for the embeddings endpoint with a fixed
+round-trip latency and a share of requests answered with 429, so the
+numbers show whether ingest is bound by latency or by the rate limit.
+The "floor" column is the least time the rate limit allows.
+
+    python -m benchmarks.bench_embedding_dispatch --chunks 5000 --latency 0.5 --rpm 600
+"""
+import argparse
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+from src.embeddings import EmbeddingGenerator
+from src.rate_limiter import RateLimiter
+
+
+class RateLimited(Exception):
+    status_code = 429
+    response = SimpleNamespace(headers={})
+
+
+class StandInEmbeddings:
+    def __init__(self, latency: float, error_rate: float, seed: int = 3):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def create(self, model, input, **kwargs):
+        with self.lock:
+            self.requests += 1
+            fail = self.rng.random() < self.error_rate
+            self.errors += fail
+        time.sleep(self.latency)
+        if fail:
+            raise RateLimited("429 Too Many Requests")
+        return SimpleNamespace(data=[SimpleNamespace(embedding=[0.0] * 8) for _ in input])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--tokens-per-chunk", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per request")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Share of requests answered with 429")
+    parser.add_argument("--rpm", type=int, default=600)
+    parser.add_argument("--tpm", type=int, default=5_000_000)
+    parser.add_argument("--burst-seconds", type=float, default=1.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    requests = -(-args.chunks // args.batch_size)
+    tokens = args.chunks * args.tokens_per_chunk
+    floor = max((requests - args.rpm * args.burst_seconds / 60) / (args.rpm / 60),
+                (tokens - args.tpm * args.burst_seconds / 60) / (args.tpm / 60), 0)
+    print(f"{args.chunks} chunks in {requests} requests, {tokens:,} tokens, "
+          f"latency {args.latency}s, rpm {args.rpm}, tpm {args.tpm:,}; rate limit floor {floor:.1f}s")
+    print(f"{'concurrency':>11} {'seconds':>8} {'requests':>9} {'429s':>5}")
+
+    for concurrency in args.concurrency:
+        generator = EmbeddingGenerator(
+            api_key="bench", concurrency=concurrency, max_retries=10,
+            rate_limiter=RateLimiter(args.rpm, args.tpm, burst_seconds=args.burst_seconds))
+        endpoint = StandInEmbeddings(args.latency, args.error_rate)
+        generator.client = SimpleNamespace(embeddings=endpoint)
+        chunks = [{"text": f"chunk {i}", "metadata": {"token_count": args.tokens_per_chunk}}
+                  for i in range(args.chunks)]
+        start = time.perf_counter()
+        generator.generate_embeddings(chunks, batch_size=args.batch_size)
+        seconds = time.perf_counter() - start
+        generator.close()
+        print(f"{concurrency:>11} {seconds:>8.1f} {endpoint.requests:>9} {endpoint.errors:>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Memory held by embedded chunks: dicts of float lists vs. Chunk records on float32 rows.
+
+Embeds a 10k chunk document through EmbeddingGenerator with a stand-in
+endpoint that answers like the API (base64 float32), and compares the
+memory held by the result, measured with tracemalloc, against the old
+representation: one dict per chunk with a list of Python floats.
+
+    python -m benchmarks.bench_embedding_memory --chunks 10000 --dimensions 1536
+"""
+import argparse
+import base64
+import gc
+import tracemalloc
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.chunk import Chunk
+from src.embeddings import EmbeddingGenerator
+
+
+class StandInEmbeddings:
+    def __init__(self, dimensions: int):
+        self.vector = base64.b64encode(np.random.default_rng(0).random(dimensions, dtype=np.float32).tobytes()).decode()
+
+    def create(self, model, input, encoding_format=None, **kwargs):
+        return SimpleNamespace(data=[SimpleNamespace(embedding=self.vector) for _ in input])
+
+
+def metadata(i: int):
+    return {"city_name": "example", "fiscal_year": "2025", "page_number": i // 3 + 1,
+            "chunk_number": i % 3, "file_name": "budget.pdf", "token_count": 400}
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    held = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return held, current, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=10000)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    args = parser.parse_args()
+    text = "Department spending summary. " * 60
+    rng = np.random.default_rng(1)
+
+    def lists_in_dicts():
+        # What generate_embeddings used to hand to store_embeddings
+        return [{"chunk_id": f"{i:012x}", "text": text, "metadata": metadata(i),
+                 "embedding": [float(x) for x in rng.random(args.dimensions, dtype=np.float32)]}
+                for i in range(args.chunks)]
+
+    def float32_rows():
+        generator = EmbeddingGenerator(api_key="bench", concurrency=1)
+        generator.client = SimpleNamespace(embeddings=StandInEmbeddings(args.dimensions))
+        chunks = [Chunk(f"{i:012x}", text, metadata(i)) for i in range(args.chunks)]
+        generator.generate_embeddings(chunks)
+        generator.close()
+        return chunks
+
+    vector_bytes = args.chunks * args.dimensions * 4
+    print(f"{args.chunks} chunks x {args.dimensions} dims, raw float32 vectors: {vector_bytes / 2**20:.1f} MiB")
+    print(f"{'representation':<22} {'held MiB':>9} {'peak MiB':>9} {'bytes/dim':>10}")
+    for name, build in (("dict + list[float]", lists_in_dicts), ("Chunk + float32 rows", float32_rows)):
+        held, current, peak = measure(build)
+        print(f"{name:<22} {current / 2**20:>9.1f} {peak / 2**20:>9.1f} "
+              f"{current / (args.chunks * args.dimensions):>10.1f}")
+        del held
+
+
+if __name__ == "__main__":
+    main()
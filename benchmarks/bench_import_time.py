@@ -0,0 +1,71 @@
+"""Import-time and cold-start report for each entry point.
+
+Runs every entry point in a fresh interpreter with ``python -X importtime``
+and reports the wall time of the import, the slowest imports by cumulative
+time, and which heavy optional subsystems got loaded along the way.
+
+    python -m benchmarks.bench_import_time
+    python -m benchmarks.bench_import_time --top 15 cli src.async_processor
+"""
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ENTRY_POINTS = ["cli", "main", "api", "src.async_processor"]
+HEAVY_MODULES = ["cv2", "camelot", "pytesseract", "pdf2image", "langchain", "pandas", "chromadb"]
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+try:
+    import {module}
+    error = ""
+except BaseException as e:
+    error = f"{{type(e).__name__}}: {{e}}"
+elapsed = time.perf_counter() - start
+print("HEAVY=" + ",".join(m for m in {heavy!r} if m in sys.modules))
+print(f"ELAPSED={{elapsed}}")
+print("ERROR=" + error.splitlines()[0] if error else "ERROR=")
+"""
+
+
+def profile(module: str, top: int):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+
+    imports = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace("import time:", "|", 1).split("|")]
+        imports.append((int(cumulative_us), int(self_us), name))
+
+    report = dict(line.split("=", 1) for line in proc.stdout.splitlines() if "=" in line)
+    print(f"\n== {module}")
+    print(f"process wall time: {wall:.2f}s, import: {float(report.get('ELAPSED', 'nan')):.2f}s")
+    if report.get("ERROR"):
+        print(f"import failed: {report['ERROR']} (timings cover what loaded before the failure)")
+    print(f"heavy modules loaded: {report.get('HEAVY') or 'none'}")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative_us, self_us, name in sorted(imports, reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=ENTRY_POINTS)
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list per entry point")
+    args = parser.parse_args()
+    for module in args.modules:
+        profile(module, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Client-side latency against the local OpenAI stand-in.
+
+The stand-in answers after a known delay, so whatever the client measures
+above it is our own overhead (request building, HTTP, decoding, retries).
+Reports p50/p95/p99 of embedding calls next to the server's configured
+latency; with jitter and an error rate it shows the tail the retries add.
+
+    python -m benchmarks.bench_openai_overhead --calls 200 --latency 0.05 --jitter 0.02 --error-rate 0.02
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.embeddings import EmbeddingGenerator
+from src.openai_standin import StandInServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--texts-per-call", type=int, default=64)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--latency", type=float, default=0.05, help="Server seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Mean of the server's exponential extra delay")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with StandInServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate) as server:
+        generator = EmbeddingGenerator(api_key="bench", dimensions=args.dimensions, base_url=server.base_url,
+                                       concurrency=1)
+        generator.generate_embeddings([{"text": "warm up"}])
+        seconds = []
+        for call in range(args.calls):
+            chunks = [{"text": f"call {call} text {i} police overtime budget"} for i in range(args.texts_per_call)]
+            start = time.perf_counter()
+            generator.generate_embeddings(chunks)
+            seconds.append(time.perf_counter() - start)
+        generator.close()
+        counters = dict(server.counters)
+
+    p50, p95, p99 = np.percentile(np.array(seconds) * 1000, [50, 95, 99])
+    print(f"{args.calls} calls of {args.texts_per_call} texts x {args.dimensions} dims, "
+          f"server latency {args.latency * 1000:.0f} ms + jitter {args.jitter * 1000:.0f} ms, "
+          f"{counters['errors']} errors")
+    print(f"{'':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    print(f"{'client':>8} {p50:>7.1f}ms {p95:>7.1f}ms {p99:>7.1f}ms")
+    print(f"{'overhead':>8} {p50 - args.latency * 1000:>7.1f}ms (p50 minus server latency)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Wall time of PDFProcessor.extract_text_from_pdf for different worker counts.
+
+    python -m benchmarks.bench_parallel_extraction --pages 60 --workers 1 2 4 8
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import make_budget_pdf
+from src.pdf_processor import PDFProcessor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pdf", help="Existing PDF to benchmark (default: synthetic)")
+    parser.add_argument("--pages", type=int, default=60, help="Pages of the synthetic document")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = args.pdf or make_budget_pdf(str(Path(tmp) / "synthetic_budget.pdf"), pages=args.pages)
+        timings = {}
+        for workers in sorted(set(args.workers)):
+            start = time.perf_counter()
+            pages = PDFProcessor(workers=workers).extract_text_from_pdf(pdf_path)
+            timings[workers] = time.perf_counter() - start
+
+    print(f"Document: {pdf_path} ({len(pages)} pages), {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'total s':>10} {'pages/s':>10} {'speedup':>8}")
+    baseline = timings[min(timings)]
+    for workers, seconds in timings.items():
+        print(f"{workers:>8} {seconds:>10.2f} {len(pages) / seconds:>10.1f} {baseline / seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
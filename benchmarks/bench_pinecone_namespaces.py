@@ -0,0 +1,71 @@
+"""Pinecone layouts compared on a local stand-in index.
+
+Times upserting one document serially vs. with parallel batches, and
+query latency with the shared metadata-filter layout vs. a namespace per
+document. The stand-in (src.pinecone_standin) adds a fixed round trip to
+every call and really scans what a query covers, so the gap comes from
+the filter having to look at every document's vectors.
+
+    python -m benchmarks.bench_pinecone_namespaces --documents 20 --vectors 3000 --latency 0.02
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.chunk import Chunk
+from src.pinecone_standin import StandInIndex
+from src.vector_store import PineconeVectorStore
+
+
+def document_chunks(document_id: str, count: int, dimensions: int, seed: int):
+    vectors = np.random.default_rng(seed).normal(size=(count, dimensions)).astype(np.float32)
+    return [Chunk(f"{document_id}_{i}", f"chunk {i}", {"page_number": i}, vector) for i, vector in enumerate(vectors)]
+
+
+def query_latency(store, document_ids, queries, top_k):
+    seconds = []
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        store.query(query, top_k=top_k, document_id=document_ids[i % len(document_ids)])
+        seconds.append(time.perf_counter() - start)
+    return np.percentile(np.array(seconds) * 1000, [50, 95, 99])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--vectors", type=int, default=3000, help="Vectors per document")
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds per stand-in call")
+    parser.add_argument("--upsert-workers", type=int, default=8)
+    args = parser.parse_args()
+
+    document_ids = [f"city_{d}_2024" for d in range(args.documents)]
+    print(f"{args.documents} documents x {args.vectors} vectors x {args.dimensions} dims, "
+          f"{args.latency * 1000:.0f} ms per call")
+
+    print(f"{'upsert of one document':<24} {'seconds':>8}")
+    for workers in (1, args.upsert_workers):
+        store = PineconeVectorStore(index=StandInIndex(args.dimensions, args.latency), upsert_workers=workers)
+        chunks = document_chunks(document_ids[0], args.vectors, args.dimensions, 0)
+        start = time.perf_counter()
+        store.store_embeddings(chunks, document_id=document_ids[0])
+        print(f"{f'{workers} worker(s)':<24} {time.perf_counter() - start:>8.2f}")
+
+    queries = np.random.default_rng(99).normal(size=(args.queries, args.dimensions)).astype(np.float32)
+    print(f"{'query layout':<24} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, namespaces in (("metadata filter", False), ("namespace per document", True)):
+        store = PineconeVectorStore(index=StandInIndex(args.dimensions, args.latency), namespaces=namespaces,
+                                    upsert_workers=args.upsert_workers)
+        for d, document_id in enumerate(document_ids):
+            store.store_embeddings(document_chunks(document_id, args.vectors, args.dimensions, d),
+                                   document_id=document_id)
+        p50, p95, p99 = query_latency(store, document_ids, queries, args.top_k)
+        print(f"{name:<24} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
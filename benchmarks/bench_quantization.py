@@ -0,0 +1,80 @@
+"""Recall and memory of int8 and product-quantized search in the NumPy store.
+
+Builds synthetic budget-scale corpora (clustered unit vectors, like
+embeddings of a budget's many similar line items), then for each
+quantization compares top-5 results with exact search. "recall@5" is with
+re-scoring of the top 5 x rescore-factor candidates in full precision,
+"no rescore" ranks by the codes alone. "resident" is what stays in memory
+for the query path: the full matrix, or the codes plus codebooks.
+
+    python -m benchmarks.bench_quantization --sizes 3000 20000 --dimensions 1536 --queries 200
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from src.chunk import Chunk
+from src.vector_store import NumpyVectorStore
+
+
+def budget_corpus(size: int, dimensions: int, seed: int = 0):
+    """Vectors around a few hundred topics, and queries near random members"""
+    rng = np.random.default_rng(seed)
+    topics = rng.normal(size=(max(10, size // 50), dimensions)).astype(np.float32)
+    vectors = topics[rng.integers(0, len(topics), size)] + 0.7 * rng.normal(size=(size, dimensions)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def top5(store, queries):
+    return [[r["content"] for r in store.query(query, top_k=5, document_id="corpus")] for query in queries]
+
+
+def recall(found, expected) -> float:
+    return float(np.mean([len(set(a) & set(b)) / len(b) for a, b in zip(found, expected)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3000, 20000])
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--rescore-factor", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{'vectors':>8} {'mode':>5} {'resident MB':>12} {'saved':>6} {'build s':>8} "
+          f"{'p50 ms':>7} {'recall@5':>9} {'no rescore':>11}")
+    for size in args.sizes:
+        vectors = budget_corpus(size, args.dimensions)
+        rng = np.random.default_rng(1)
+        queries = vectors[rng.integers(0, size, args.queries)] + 0.08 * rng.normal(
+            size=(args.queries, args.dimensions)).astype(np.float32)
+        chunks = [Chunk(f"c{i}", f"chunk {i}", {"page_number": i}, vector) for i, vector in enumerate(vectors)]
+        with tempfile.TemporaryDirectory() as directory:
+            expected = None
+            for mode in ("none", "int8", "pq"):
+                store = NumpyVectorStore(directory, mode, quantization=mode, rescore_factor=args.rescore_factor)
+                store.store_embeddings(chunks, document_id="corpus")
+                start = time.perf_counter()
+                store.finish_ingest("corpus")  # Builds the codes
+                build = time.perf_counter() - start
+                memory = store.memory_bytes("corpus")
+                seconds = []
+                found = []
+                for query in queries:
+                    start = time.perf_counter()
+                    found.append([r["content"] for r in store.query(query, top_k=5, document_id="corpus")])
+                    seconds.append(time.perf_counter() - start)
+                if expected is None:
+                    expected = found
+                store.rescore_factor = 1
+                approximate = recall(top5(store, queries), expected) if mode != "none" else 1.0
+                print(f"{size:>8} {mode:>5} {memory['resident'] / 2 ** 20:>12.2f} "
+                      f"{1 - memory['resident'] / memory['full']:>6.0%} {build:>8.2f} "
+                      f"{np.percentile(seconds, 50) * 1000:>7.2f} {recall(found, expected):>9.3f} {approximate:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Per-page cost of table extraction: camelot per page vs. one document pass.
+
+    python -m benchmarks.bench_table_extraction --pages 40
+    python -m benchmarks.bench_table_extraction --pdf data/pdfs/budget.pdf --pages 60
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from benchmarks.synthetic import make_budget_pdf
+from src.pdf_processor import PDFProcessor
+
+
+def bench_page_mode(processor: PDFProcessor, pdf_path: str, pages: int) -> float:
+    start = time.perf_counter()
+    for page_num in range(1, pages + 1):
+        processor._extract_tables(pdf_path, page_num)
+    return time.perf_counter() - start
+
+
+def bench_document_mode(processor: PDFProcessor, pdf_path: str, pages: int) -> float:
+    start = time.perf_counter()
+    with fitz.open(pdf_path) as doc:
+        processor._extract_tables_bulk(doc, range(1, pages + 1))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pdf", help="Existing PDF to benchmark (default: synthetic)")
+    parser.add_argument("--pages", type=int, default=40, help="Number of pages to extract")
+    parser.add_argument("--doc-pages", type=int, default=200,
+                        help="Total pages of the synthetic document (the per-page mode reparses all of them)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = args.pdf
+        if not pdf_path:
+            pdf_path = make_budget_pdf(str(Path(tmp) / "synthetic_budget.pdf"),
+                                       pages=max(args.doc_pages, args.pages))
+        with fitz.open(pdf_path) as doc:
+            total_pages = len(doc)
+        pages = min(args.pages, total_pages)
+        processor = PDFProcessor()
+
+        page_seconds = bench_page_mode(processor, pdf_path, pages)
+        document_seconds = bench_document_mode(processor, pdf_path, pages)
+
+    print(f"Document: {pdf_path} ({total_pages} pages), extracting tables from {pages} pages")
+    print(f"{'mode':<10} {'total s':>10} {'ms/page':>10}")
+    print(f"{'page':<10} {page_seconds:>10.2f} {page_seconds / pages * 1000:>10.1f}")
+    print(f"{'document':<10} {document_seconds:>10.2f} {document_seconds / pages * 1000:>10.1f}")
+    print(f"speedup: {page_seconds / document_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Recall and speed of the table prefilter against running camelot on every page.
+
+Pages where camelot finds a table of two or more columns with "always" are
+the ground truth (its stream parser also turns plain paragraphs into
+one-column "tables"); the report shows how many of them the heuristic kept
+and how many pages it let camelot skip.
+
+    python -m benchmarks.bench_table_prefilter --pages 60
+    python -m benchmarks.bench_table_prefilter --pdf data/pdfs/budget.pdf
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import make_budget_pdf
+from src.pdf_processor import PDFProcessor
+
+
+def column_count(table_text: str) -> int:
+    # Tables are DataFrame.to_string() output, the first line is the column index
+    lines = table_text.splitlines()
+    return len(lines[0].split()) if lines else 0
+
+
+def timed_extract(pdf_path: str, table_detection: str):
+    start = time.perf_counter()
+    pages = PDFProcessor(table_detection=table_detection).extract_text_from_pdf(pdf_path)
+    return pages, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pdf", help="Existing PDF to benchmark (default: synthetic)")
+    parser.add_argument("--pages", type=int, default=60, help="Pages of the synthetic document")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = args.pdf or make_budget_pdf(str(Path(tmp) / "synthetic_budget.pdf"), pages=args.pages)
+        always, always_seconds = timed_extract(pdf_path, "always")
+        heuristic, heuristic_seconds = timed_extract(pdf_path, "heuristic")
+
+    table_pages = {page['page_num'] for page in always
+                   if any(column_count(table) >= 2 for table in page['tables'])}
+    candidates = {page['page_num'] for page in heuristic if page['table_scan'] == "extracted"}
+    found = table_pages & candidates
+    missed = sorted(table_pages - candidates)
+
+    print(f"Document: {pdf_path} ({len(always)} pages, {len(table_pages)} with tables)")
+    print(f"{'mode':<10} {'total s':>10} {'camelot pages':>14}")
+    print(f"{'always':<10} {always_seconds:>10.2f} {len(always):>14}")
+    print(f"{'heuristic':<10} {heuristic_seconds:>10.2f} {len(candidates):>14}")
+    print(f"pages skipped: {len(always) - len(candidates)}")
+    print(f"recall: {len(found) / len(table_pages):.1%}" if table_pages else "recall: n/a (no tables found)")
+    if missed:
+        print(f"missed table pages: {missed}")
+
+
+if __name__ == "__main__":
+    main()
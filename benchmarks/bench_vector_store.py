@@ -0,0 +1,62 @@
+"""Query latency of the NumPy vector store against Chroma.
+
+Fills both stores with the same random unit vectors, split across several
+documents of budget size, and times top-k queries filtered to one document.
+
+    python -m benchmarks.bench_vector_store --documents 10 --vectors 3000 --dimensions 1536 --queries 200
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from src.chunk import Chunk
+from src.vector_store import ChromaVectorStore, NumpyVectorStore
+
+
+def timed_queries(store, queries, document_ids, top_k):
+    seconds = []
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        store.query(query, top_k=top_k, document_id=document_ids[i % len(document_ids)])
+        seconds.append(time.perf_counter() - start)
+    return np.array(seconds) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=10)
+    parser.add_argument("--vectors", type=int, default=3000, help="Vectors per document")
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    document_ids = [f"city_{d}_2024" for d in range(args.documents)]
+    queries = rng.normal(size=(args.queries, args.dimensions)).astype(np.float32)
+    print(f"{args.documents} documents x {args.vectors} vectors x {args.dimensions} dims, "
+          f"{args.queries} queries, top {args.top_k}")
+    print(f"{'store':>7} {'load s':>7} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        stores = {"numpy": NumpyVectorStore(directory), "chroma": ChromaVectorStore("bench")}
+        for name, store in stores.items():
+            start = time.perf_counter()
+            for d, document_id in enumerate(document_ids):
+                vectors = np.random.default_rng(d).normal(size=(args.vectors, args.dimensions)).astype(np.float32)
+                vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+                chunks = [Chunk(f"{document_id}_{i}", f"chunk {i}", {"page_number": i}, vector)
+                          for i, vector in enumerate(vectors)]
+                # Chroma caps the size of a single upsert
+                for batch in range(0, len(chunks), 1000):
+                    store.store_embeddings(chunks[batch:batch + 1000], document_id=document_id)
+            load = time.perf_counter() - start
+            timed_queries(store, queries[:10], document_ids, args.top_k)  # Warm up
+            p50, p95, p99 = np.percentile(timed_queries(store, queries, document_ids, args.top_k), [50, 95, 99])
+            print(f"{name:>7} {load:>7.1f} {p50:>7.2f} {p95:>7.2f} {p99:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
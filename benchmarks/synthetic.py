@@ -0,0 +1,64 @@
+"""Synthetic budget documents for the benchmarks.
+
+Nothing here is meant to look like a real budget book, only to have the same
+shape: narrative pages mixed with pages of aligned department tables.
+"""
+import random
+
+import fitz  # PyMuPDF
+
+DEPARTMENTS = [
+    "Police", "Fire", "Public Works", "Parks and Recreation", "Library",
+    "Transportation", "Health", "Housing", "Finance", "City Clerk",
+    "Planning", "Water Utility", "Sanitation", "Human Resources",
+]
+
+NARRATIVE = (
+    "The proposed budget maintains core city services while addressing "
+    "long-term obligations. Revenue growth is expected to remain moderate, "
+    "driven primarily by property tax and sales tax receipts. "
+)
+
+
+def narrative_text(rng: random.Random, sentences: int = 25) -> str:
+    words = NARRATIVE.split()
+    lines = []
+    for _ in range(sentences):
+        rng.shuffle(words)
+        lines.append(" ".join(words[:14]).capitalize() + ".")
+    return " ".join(lines)
+
+
+def table_rows(rng: random.Random, rows: int = 20):
+    yield ("Fund", "Department", "FY2023 Actual", "FY2024 Adopted", "FY2025 Proposed")
+    for _ in range(rows):
+        base = rng.randint(100_000, 90_000_000)
+        yield (
+            str(rng.randint(1000, 9999)),
+            rng.choice(DEPARTMENTS),
+            f"${base:,}",
+            f"${int(base * rng.uniform(0.95, 1.1)):,}",
+            f"${int(base * rng.uniform(0.95, 1.2)):,}",
+        )
+
+
+def make_budget_pdf(path: str, pages: int = 50, table_every: int = 2, seed: int = 7) -> str:
+    """Write a budget-like PDF where every ``table_every``-th page is a table"""
+    rng = random.Random(seed)
+    doc = fitz.open()
+    columns = [50, 110, 270, 370, 470]
+    for page_num in range(pages):
+        page = doc.new_page(width=612, height=792)
+        page.insert_text((50, 50), f"City of Example - Budget FY2025 - Page {page_num + 1}", fontsize=11)
+        if table_every and page_num % table_every == 0:
+            y = 90
+            for row in table_rows(rng):
+                for x, cell in zip(columns, row):
+                    page.insert_text((x, y), cell, fontsize=9)
+                y += 16
+            page.draw_line((45, 95), (567, 95))
+        else:
+            page.insert_textbox(fitz.Rect(50, 80, 562, 742), narrative_text(rng), fontsize=10)
+    doc.save(path)
+    doc.close()
+    return path
@@ -19,7 +19,6 @@ dependencies = [
     ("pdf2image", "pdf2image"),
     ("pytesseract", "pytesseract"),
     ("camelot", "camelot"),
-    ("spacy", "spacy"),
     ("langchain", "langchain"),
     ("tiktoken", "tiktoken"),
     ("openai", "openai"),
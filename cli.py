@@ -1,7 +1,6 @@
 import click
 import json
 from pathlib import Path
-from main import CityBudgetRAG
 from src.config import Config
 
 @click.group()
@@ -13,8 +12,11 @@ def cli():
 @click.argument('pdf_path', type=click.Path(exists=True))
 @click.option('--city', default='Unknown', help='City name')
 @click.option('--year', default='Unknown', help='Fiscal year')
-def ingest(pdf_path, city, year):
+@click.option('--incremental/--full', default=None,
+              help='Only re-process pages that changed since the last ingest of this document')
+def ingest(pdf_path, city, year, incremental):
     """Ingest a PDF document"""
+    from main import CityBudgetRAG  # Keeps `--help` from loading the whole pipeline
     config = Config()
     rag = CityBudgetRAG(config)
     
@@ -24,21 +26,47 @@ def ingest(pdf_path, city, year):
         "fiscal_year": year
     }
     
-    result = rag.ingest_document(pdf_path, metadata)
+    result = rag.ingest_document(pdf_path, metadata, incremental=incremental)
     click.echo(json.dumps(result, indent=2))
 
 @cli.command()
 @click.argument('question')
-def query(question):
+@click.option('--document-id', required=True, help='Document to query, as returned by ingest')
+def query(question, document_id):
     """Query the system"""
+    from main import CityBudgetRAG
     config = Config()
     rag = CityBudgetRAG(config)
     
-    result = rag.query(question)
+    result = rag.query(question, document_id=document_id)
     click.echo(f"\nAnswer: {result['answer']}\n")
     click.echo("Sources:")
     for source in result['sources']:
         click.echo(f"  - Page {source['page']}: {source['document']}")
 
+@cli.command('migrate-namespaces')
+@click.option('--document-id', 'document_ids', multiple=True,
+              help='Document to move (repeatable); default: every document with an ingest manifest')
+def migrate_namespaces(document_ids):
+    """Move Pinecone vectors from the shared, filtered layout into one namespace per document"""
+    from src.manifest import ManifestStore
+    from src.vector_store import PineconeVectorStore
+    config = Config()
+    store = PineconeVectorStore(
+        api_key=config.PINECONE_API_KEY,
+        environment=config.PINECONE_ENV,
+        index_name=config.VECTOR_DB_INDEX,
+        dimension=config.EMBEDDING_DIMENSIONS or 1536,
+        namespaces=True,
+        upsert_workers=config.PINECONE_UPSERT_WORKERS
+    )
+    manifests = ManifestStore(f"{config.PROCESSED_DIR}/manifests")
+    document_ids = list(document_ids) or manifests.document_ids()
+    moved = store.migrate_to_namespaces(
+        document_ids, chunk_ids={document_id: manifests.chunk_ids(document_id) for document_id in document_ids})
+    click.echo(json.dumps(moved, indent=2))
+    if not config.PINECONE_NAMESPACES:
+        click.echo("Set PINECONE_NAMESPACES=true so queries read the new namespaces.")
+
 if __name__ == '__main__':
     cli()
\ No newline at end of file
@@ -1,16 +1,26 @@
 # main.py
 import logging
+import os
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Optional
 import json
+import threading
 from datetime import datetime
 
 from src.config import Config
 from src.pdf_processor import PDFProcessor
-from src.text_processor import TextProcessor
-from src.embeddings import EmbeddingGenerator
-from src.vector_store import PineconeVectorStore, ChromaVectorStore
+from src.extraction_cache import ExtractionCache
+from src.ocr_engine import OCREngine
+from src.text_processor import TextProcessor, content_chunk_ids
+from src.embeddings import EmbeddingGenerator, BatchStats
+from src.embedding_cache import EmbeddingCache
+from src.rate_limiter import RateLimiter
+from src.vector_store import PineconeVectorStore, ChromaVectorStore, NumpyVectorStore
 from src.query_engine import QueryEngine
+from src.pipeline import threaded_stage, rebatch
+from src.manifest import ManifestStore, page_fingerprint, stale_chunk_ids, chunk_reach, recorded_pages
+from src.dedup import ChunkDeduplicator
+from src.lexical_index import LexicalIndex
 
 # Set up logger
 logging.basicConfig(level=logging.INFO, 
@@ -27,19 +37,55 @@ def safe_document_id(city_name: str, fiscal_year: str) -> str:
 
 class CityBudgetRAG:
     def __init__(self, config: Config):
+        """Build the pipeline. The instance can be shared: queries and ingests of
+        different documents may run from many threads at once."""
         self.config = config
+        self._document_locks: Dict[str, threading.Lock] = {}
+        self._document_locks_guard = threading.Lock()
         
         try:
-            self.pdf_processor = PDFProcessor()
+            extraction_cache = ExtractionCache(
+                os.path.join(config.PROCESSED_DIR, "extraction_cache"),
+                max_bytes=config.EXTRACTION_CACHE_MAX_MB * 1024 * 1024
+            ) if config.EXTRACTION_CACHE else None
+            ocr_engine = OCREngine(
+                dpi=config.OCR_DPI,
+                workers=config.OCR_WORKERS,
+                cache_dir=os.path.join(config.PROCESSED_DIR, "ocr_cache") if config.OCR_CACHE else None
+            )
+            self.pdf_processor = PDFProcessor(
+                table_mode=config.TABLE_EXTRACTION_MODE,
+                workers=config.PDF_WORKERS,
+                table_flavor=config.TABLE_FLAVOR,
+                table_detection=config.TABLE_DETECTION,
+                cache=extraction_cache,
+                ocr_engine=ocr_engine
+            )
             self.text_processor = TextProcessor(
                 chunk_size=config.CHUNK_SIZE,
-                chunk_overlap=config.CHUNK_OVERLAP
+                chunk_overlap=config.CHUNK_OVERLAP,
+                chunker=config.CHUNKER,
+                chunking_scope=config.CHUNKING_SCOPE
             )
             self.embedding_generator = EmbeddingGenerator(
                 api_key=config.OPENAI_API_KEY,
-                model=config.EMBEDDING_MODEL
+                model=config.EMBEDDING_MODEL,
+                dimensions=config.EMBEDDING_DIMENSIONS,
+                cache=EmbeddingCache(
+                    os.path.join(config.PROCESSED_DIR, "embedding_cache.sqlite3")
+                ) if config.EMBEDDING_CACHE else None,
+                concurrency=config.EMBEDDING_CONCURRENCY,
+                rate_limiter=RateLimiter(config.EMBEDDING_RPM, config.EMBEDDING_TPM),
+                max_retries=config.EMBEDDING_MAX_RETRIES,
+                max_batch_tokens=config.EMBEDDING_BATCH_TOKENS,
+                max_batch_items=config.EMBEDDING_BATCH_ITEMS,
+                base_url=config.OPENAI_BASE_URL
             )
             self.vector_store = self._initialize_vector_store(config)
+            self.manifests = ManifestStore(os.path.join(config.PROCESSED_DIR, "manifests"))
+            self.lexical_index = LexicalIndex(
+                os.path.join(config.LEXICAL_DIR, config.VECTOR_DB_INDEX)
+            ) if config.LEXICAL_INDEX else None
             
             redis_config = {
                 "host": config.REDIS_HOST,
@@ -52,7 +98,10 @@ class CityBudgetRAG:
                 vector_store=self.vector_store,
                 embedding_generator=self.embedding_generator,
                 redis_config=redis_config,
-                llm_model=config.LLM_MODEL
+                llm_model=config.LLM_MODEL,
+                base_url=config.OPENAI_BASE_URL,
+                lexical_index=self.lexical_index,
+                retrieval_mode=config.RETRIEVAL_MODE
             )
             
             self.vector_store.reset_active_document_id()
@@ -63,61 +112,371 @@ class CityBudgetRAG:
             raise
     
     def _initialize_vector_store(self, config):
-        if config.PINECONE_API_KEY and config.PINECONE_ENV:
+        backend = getattr(config, "VECTOR_STORE", "auto")
+        if backend == "numpy":
+            logger.info("Using the NumPy vector store")
+            return NumpyVectorStore(directory=config.VECTOR_DIR, collection_name=config.VECTOR_DB_INDEX,
+                                    quantization=getattr(config, "VECTOR_QUANTIZATION", None))
+
+        if backend in ("auto", "pinecone") and config.PINECONE_API_KEY and config.PINECONE_ENV:
             try:
                 logger.info("Attempting to initialize Pinecone...")
                 return PineconeVectorStore(
                     api_key=config.PINECONE_API_KEY,
                     environment=config.PINECONE_ENV,
-                    index_name=config.VECTOR_DB_INDEX
+                    index_name=config.VECTOR_DB_INDEX,
+                    dimension=config.EMBEDDING_DIMENSIONS or 1536,
+                    namespaces=config.PINECONE_NAMESPACES,
+                    upsert_workers=config.PINECONE_UPSERT_WORKERS
                 )
             except Exception as e:
                 logger.warning(f"Failed to initialize Pinecone: {e}")
                 logger.info("Falling back to ChromaDB...")
         
         logger.info("Using ChromaDB as vector store")
-        return ChromaVectorStore(collection_name=config.VECTOR_DB_INDEX)
+        return ChromaVectorStore(
+            collection_name=config.VECTOR_DB_INDEX,
+            persist_directory=config.CHROMA_DIR if getattr(config, "CHROMA_PERSIST", False) else None
+        )
     
-    def ingest_document(self, pdf_path: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    def ingest_document(self, pdf_path: str, metadata: Dict[str, Any],
+                        incremental: Optional[bool] = None,
+                        progress_callback: Optional[Callable[[str, float], None]] = None) -> Dict[str, Any]:
+        """Extract, chunk, embed and store a PDF.
+
+        With ``incremental`` (default: Config.INCREMENTAL_INGEST, and always
+        for documents already in a persistent store's catalog) pages whose
+        extracted content is unchanged since the last ingest of the same
+        document_id are skipped, and so are chunks whose text is already
+        stored (chunk ids hash the text); chunks that only moved to other
+        pages get their page metadata updated. Chunks the previous ingest
+        stored and this one no longer produces are deleted either way.
+        ``progress_callback(stage, fraction)`` is called as pages get stored.
+        """
         logger.info(f"Ingesting document: {pdf_path}")
         try:
             # Use the document_id from metadata if provided, otherwise create one
             doc_id = metadata.get("document_id") or safe_document_id(
                 metadata["city_name"], metadata["fiscal_year"])
-            
             logger.info(f"Using document_id for ingestion: {doc_id}")
-            self.vector_store.set_active_document_id(doc_id)
-
-            pdf_content = self.pdf_processor.extract_text_from_pdf(pdf_path)
-            chunks = self.text_processor.process_document_content(pdf_content, metadata)
-            chunks_with_embeddings = self.embedding_generator.generate_embeddings(chunks)
-
-            # Enforce document_id into all chunks metadata for filtering
-            for chunk in chunks_with_embeddings:
-                chunk["metadata"]["document_id"] = doc_id
-                # For backward compatibility, also set city_name as document_id
-                chunk["metadata"]["city_name"] = doc_id
-                
-            logger.info(f"Generated {len(chunks_with_embeddings)} chunks with embeddings")
-            self.vector_store.store_embeddings(chunks_with_embeddings)
-            logger.info(f"Stored embeddings in vector store with document_id: {doc_id}")
-
-            return {
-                "status": "success",
-                "file": metadata["file_name"],
-                "chunks_processed": len(chunks),
-                "pages_processed": len(pdf_content),
-                "city_name": metadata["city_name"],
-                "fiscal_year": metadata["fiscal_year"],
-                "document_id": doc_id
-            }
-
+            # Two ingests of the same document would race on its manifest and vectors
+            with self._document_lock(doc_id):
+                if incremental is None:
+                    # The catalog vouches that this document's vectors survived the restart
+                    incremental = self.config.INCREMENTAL_INGEST or self.is_indexed(doc_id)
+                return self._ingest(pdf_path, metadata, doc_id, incremental, progress_callback)
         except Exception as e:
             logger.error(f"Error during ingestion: {e}")
             return {
                 "status": "error",
                 "error": str(e)
             }
+
+    def _document_lock(self, doc_id: str) -> threading.Lock:
+        with self._document_locks_guard:
+            return self._document_locks.setdefault(doc_id, threading.Lock())
+
+    def _ingest(self, pdf_path: str, metadata: Dict[str, Any], doc_id: str, incremental: bool,
+                progress_callback: Optional[Callable[[str, float], None]]) -> Dict[str, Any]:
+        # Chunk ids hash the document id with the text, so they stay put across re-ingests
+        metadata = {**metadata, "document_id": doc_id}
+        # Loaded even for a full ingest: whatever it lists and the new ingest doesn't is deleted
+        previous = self.manifests.load(doc_id)
+        previous_chunks = self.manifests.load_chunks(doc_id)
+        skip_chunks = previous_chunks if incremental else {}
+        # Duplicates are only found among the chunks seen, so with dedup every page is chunked
+        # again; chunks already stored are still neither embedded nor written
+        skip_from = previous if incremental and not self.config.DEDUP_CHUNKS else {}
+        stats = {"pages": 0, "chunks": 0, "skipped_pages": set(),
+                 "chunks_unchanged": 0, "relocated": {}, "source_pages": {}, "chunk_spans": {},
+                 "stored_source_pages": {chunk_id: ",".join(map(str, pages))
+                                         for chunk_id, pages in recorded_pages(previous).items()},
+                 "table_pages_skipped": 0, "fingerprints": {}, "page_chunks": {},
+                 "page_count": self.pdf_processor.page_count(pdf_path),
+                 "embedding_batches": BatchStats(self.embedding_generator.max_batch_tokens),
+                 "progress": progress_callback or (lambda stage, fraction: None)}
+        stats["progress"]("extracting", 0.0)
+        dedup = ChunkDeduplicator(threshold=self.config.DEDUP_THRESHOLD) if self.config.DEDUP_CHUNKS else None
+
+        if self.config.STREAMING_INGEST:
+            self._ingest_streaming(pdf_path, metadata, doc_id, skip_from, stats, dedup, skip_chunks)
+        else:
+            pdf_content = self.pdf_processor.extract_text_from_pdf(pdf_path)
+            pages = [page for batch in self._changed_pages([pdf_content], skip_from, skip_chunks, stats)
+                     for page in batch]
+            chunks = self.text_processor.process_document_content(pages, metadata)
+            if dedup:
+                chunks = [chunk for batch in dedup.filter([chunks]) for chunk in batch]
+            chunks = [chunk for batch in self._changed_chunks([chunks], skip_from, skip_chunks, stats, doc_id)
+                      for chunk in batch]
+            if chunks:
+                chunks_with_embeddings = self.embedding_generator.generate_embeddings(
+                    chunks, stats=stats["embedding_batches"])
+                logger.info(f"Generated {len(chunks_with_embeddings)} chunks with embeddings")
+                self._store_chunks(chunks_with_embeddings, doc_id, stats)
+        logger.info(f"Stored embeddings in vector store with document_id: {doc_id}")
+        if dedup:
+            self._record_duplicates(dedup, stats)
+        updates = {**stats["source_pages"], **stats["relocated"]}
+        if updates:
+            # Same text at other pages: fix the metadata instead of re-embedding and re-upserting
+            self.vector_store.update_metadata(updates, document_id=doc_id)
+            if self.lexical_index:
+                self.lexical_index.update_metadata(doc_id, updates)
+
+        # Record what is now stored for this document and drop what no page uses anymore
+        current = {}
+        for page_num, fingerprint in stats["fingerprints"].items():
+            if page_num in stats["skipped_pages"]:
+                current[page_num] = previous[page_num]
+            else:
+                current[page_num] = {"fingerprint": fingerprint,
+                                     "chunk_ids": stats["page_chunks"].get(page_num, [])}
+        stale_ids = stale_chunk_ids(previous, current)
+        logger.info(f"Embedding requests: {stats['embedding_batches'].summary()}")
+        stats["progress"]("finalizing", 1.0)
+        if stale_ids:
+            self.vector_store.delete(stale_ids, document_id=doc_id)
+        if self.lexical_index:
+            if stale_ids:
+                self.lexical_index.delete(doc_id, stale_ids)
+            self.lexical_index.save(doc_id)
+        self.vector_store.finish_ingest(doc_id)
+        live_ids = {chunk_id for record in current.values() for chunk_id in record["chunk_ids"]}
+        self.manifests.save(doc_id, current, {
+            chunk_id: stats["chunk_spans"].get(chunk_id) or previous_chunks.get(chunk_id)
+            for chunk_id in live_ids if chunk_id in stats["chunk_spans"] or chunk_id in previous_chunks})
+        if self.vector_store.catalog is not None:
+            self.vector_store.catalog.record(
+                doc_id, city_name=metadata["city_name"], fiscal_year=metadata["fiscal_year"],
+                file_name=metadata["file_name"],
+                chunks=len(live_ids))
+
+        return {
+            "status": "success",
+            "file": metadata["file_name"],
+            "chunks_processed": stats["chunks"],
+            "pages_processed": stats["pages"],
+            "pages_skipped": len(stats["skipped_pages"]),
+            "chunks_skipped": len({chunk_id for page_num in stats["skipped_pages"]
+                                   for chunk_id in previous[page_num]["chunk_ids"]}),
+            "chunks_unchanged": stats["chunks_unchanged"],
+            "chunks_relocated": len(stats["relocated"]),
+            "pages_removed": len(set(previous) - set(current)),
+            "chunks_deleted": len(stale_ids),
+            "table_pages_skipped": stats["table_pages_skipped"],
+            "chunks_deduplicated": dedup.duplicates if dedup else 0,
+            "dedup_ratio": round(dedup.dedup_ratio, 4) if dedup else 0.0,
+            "embedding_batches": stats["embedding_batches"].summary(),
+            "city_name": metadata["city_name"],
+            "fiscal_year": metadata["fiscal_year"],
+            "document_id": doc_id
+        }
+    
+    def _ingest_streaming(self, pdf_path: str, metadata: Dict[str, Any], doc_id: str,
+                          previous: Dict[int, Dict[str, Any]], stats: Dict[str, Any],
+                          dedup: Optional[ChunkDeduplicator] = None,
+                          previous_chunks: Optional[Dict[str, tuple]] = None) -> None:
+        """Run extraction, chunking, embedding and upserts as overlapping stages.
+
+        Each stage works on bounded batches in its own thread, with at most
+        PIPELINE_QUEUE_DEPTH batches waiting between two stages, so only a few
+        batches of the document are ever held in memory at once.
+        """
+        depth = self.config.PIPELINE_QUEUE_DEPTH
+
+        page_batches = threaded_stage(
+            self._changed_pages(self.pdf_processor.iter_pages(pdf_path, batch_size=self.config.PIPELINE_PAGE_BATCH),
+                                previous, previous_chunks or {}, stats),
+            depth, "extract")
+        chunk_batches = self.text_processor.iter_document_chunks(page_batches, metadata)
+        if dedup:
+            chunk_batches = dedup.filter(chunk_batches)
+        chunk_batches = self._changed_chunks(chunk_batches, previous, previous_chunks or {}, stats, doc_id)
+        chunk_batches = threaded_stage(rebatch(chunk_batches, self.config.PIPELINE_CHUNK_BATCH), depth, "chunk")
+        embedded_batches = threaded_stage(
+            self.embedding_generator.iter_embeddings(chunk_batches, stats=stats["embedding_batches"]), depth, "embed")
+
+        for chunks in embedded_batches:
+            self._store_chunks(chunks, doc_id, stats)
+            logger.info(f"Stored {stats['chunks']} chunks from {stats['pages']} extracted pages so far")
+
+    @staticmethod
+    def _changed_pages(page_batches, previous: Dict[int, Dict[str, Any]],
+                       previous_chunks: Dict[str, tuple], stats: Dict[str, Any]):
+        """Fingerprint every page and pass on only those that need chunking again.
+
+        That is the pages that differ from ``previous`` and, in document
+        scope, the unchanged pages sharing a chunk with one of them: the
+        chunks reaching into a changed page are rebuilt from the first page
+        to the last page they span. An unchanged page is held back until no
+        later page can pull it in, and is skipped after that.
+        """
+        first, last = chunk_reach(previous, previous_chunks)
+        held = []
+        rechunk_until = 0
+        for pages in page_batches:
+            changed = []
+            for page in pages:
+                page_num = page['page_num']
+                fingerprint = page_fingerprint(page)
+                stats["pages"] += 1
+                if page.get('table_scan') == "skipped":
+                    stats["table_pages_skipped"] += 1
+                stats["fingerprints"][page_num] = fingerprint
+                record = previous.get(page_num)
+                if not (record and record["fingerprint"] == fingerprint):
+                    pull_from = first.get(page_num, page_num)
+                    changed.extend(held_page for held_page in held if held_page['page_num'] >= pull_from)
+                    held = [held_page for held_page in held if held_page['page_num'] < pull_from]
+                    changed.append(page)
+                    rechunk_until = max(rechunk_until, last.get(page_num, page_num))
+                elif page_num <= rechunk_until:
+                    changed.append(page)
+                else:
+                    held.append(page)
+                # No later page can pull these in anymore
+                while held and last.get(held[0]['page_num'], held[0]['page_num']) <= page_num:
+                    stats["skipped_pages"].add(held.pop(0)['page_num'])
+            if changed:
+                yield changed
+
+        # Pages removed from the end of the document change the pages their chunks reached back to
+        seen = max(stats["fingerprints"], default=0)
+        removed = [page_num for page_num in previous if page_num > seen]
+        pull_from = min((first.get(page_num, page_num) for page_num in removed), default=seen + 1)
+        stats["skipped_pages"].update(held_page['page_num'] for held_page in held
+                                      if held_page['page_num'] < pull_from)
+        held = [held_page for held_page in held if held_page['page_num'] >= pull_from]
+        if held:
+            yield held
+
+    @staticmethod
+    def _record_chunk(chunk, stats: Dict[str, Any]) -> None:
+        page_start = chunk["metadata"]["page_number"]
+        page_end = chunk["metadata"].get("page_end", page_start)
+        stats["chunk_spans"][chunk["chunk_id"]] = (page_start, page_end)
+        # A chunk spanning pages is recorded on each. A page is only skipped if every page its
+        # chunks span is unchanged, so a skipped page never keeps a chunk reaching into a changed one
+        for page_num in range(page_start, page_end + 1):
+            stats["page_chunks"].setdefault(page_num, []).append(chunk["chunk_id"])
+
+    def _changed_chunks(self, chunk_batches, previous: Dict[int, Dict[str, Any]],
+                        previous_chunks: Dict[str, tuple], stats: Dict[str, Any], doc_id: str):
+        """Pass on only chunks whose id (i.e. text) is not stored yet.
+
+        A stored chunk found at its old pages needs nothing; one found at
+        other pages (pages were inserted or removed before it) only gets
+        its page metadata updated, collected in ``stats["relocated"]``.
+        Unless its old page is skipped and keeps it: the chunk is another
+        copy of repeated text and takes the id of a copy no page uses. Which
+        pages are skipped is only settled once every page was read, so
+        chunks whose old page may still be skipped wait until then.
+        """
+        claimed = set()  # Ids of the chunks passed through, no two may share one
+        waiting = []
+        for chunks in chunk_batches:
+            new, known = [], []
+            for chunk in chunks:
+                claimed.add(chunk["chunk_id"])
+                span = previous_chunks.get(chunk["chunk_id"])
+                if span is None:
+                    new.append(chunk)
+                elif tuple(span) == self._chunk_span(chunk) or self._page_changed(span[0], previous, stats):
+                    known.append(chunk)
+                else:
+                    waiting.append(chunk)
+            self._record_known_chunks(known, previous_chunks, stats, doc_id)
+            if new:
+                yield new
+
+        def kept_by_skipped_page(chunk_id):
+            return chunk_id in previous_chunks and previous_chunks[chunk_id][0] in stats["skipped_pages"]
+
+        new, known = [], []
+        for chunk in waiting:
+            if kept_by_skipped_page(chunk["chunk_id"]):
+                chunk["chunk_id"] = next(chunk_id for chunk_id in content_chunk_ids(doc_id, chunk["text"])
+                                         if chunk_id not in claimed and not kept_by_skipped_page(chunk_id))
+                claimed.add(chunk["chunk_id"])
+                if chunk["chunk_id"] not in previous_chunks:
+                    new.append(chunk)
+                    continue
+            known.append(chunk)
+        self._record_known_chunks(known, previous_chunks, stats, doc_id)
+        if new:
+            yield new
+
+    def _record_known_chunks(self, chunks, previous_chunks: Dict[str, tuple], stats: Dict[str, Any],
+                             doc_id: str) -> None:
+        for chunk in chunks:
+            self._record_chunk(chunk, stats)
+            if tuple(previous_chunks[chunk["chunk_id"]]) == self._chunk_span(chunk):
+                stats["chunks_unchanged"] += 1
+                self._record_source_pages(chunk["chunk_id"], chunk["metadata"], stats)
+            else:
+                stats["relocated"][chunk["chunk_id"]] = {
+                    key: chunk["metadata"][key]
+                    for key in ("page_number", "page_start", "page_end", "chunk_number", "source_pages")
+                    if key in chunk["metadata"]}
+        if chunks and self.lexical_index:
+            # Cheap, and fills in an index missing chunks stored before it existed
+            self._tag_document_id(chunks, doc_id)
+            self.lexical_index.add(doc_id, chunks)
+
+    @staticmethod
+    def _chunk_span(chunk) -> tuple:
+        page_start = chunk["metadata"]["page_number"]
+        return page_start, chunk["metadata"].get("page_end", page_start)
+
+    @staticmethod
+    def _page_changed(page_num: int, previous: Dict[int, Dict[str, Any]], stats: Dict[str, Any]) -> bool:
+        """Whether the page was read already and differs from ``previous``, i.e. can't be skipped"""
+        fingerprint = stats["fingerprints"].get(page_num)
+        return fingerprint is not None and previous.get(page_num, {}).get("fingerprint") != fingerprint
+
+    def _store_chunks(self, chunks, doc_id: str, stats: Dict[str, Any]) -> None:
+        self._tag_document_id(chunks, doc_id)
+        self.vector_store.store_embeddings(chunks, document_id=doc_id)
+        if self.lexical_index:
+            self.lexical_index.add(doc_id, chunks)
+        stats["chunks"] += len(chunks)
+        for chunk in chunks:
+            self._record_chunk(chunk, stats)
+        last_page = max(chunk["metadata"].get("page_end", chunk["metadata"]["page_number"]) for chunk in chunks)
+        stats["progress"]("storing", last_page / max(stats["page_count"], 1))
+
+    @staticmethod
+    def _record_source_pages(chunk_id: str, metadata: Dict[str, Any], stats: Dict[str, Any]) -> None:
+        """Queue an update of a stored chunk's source_pages, unless they are what is stored already"""
+        if "source_pages" not in metadata:
+            return
+        if metadata["source_pages"] == stats["stored_source_pages"].get(chunk_id):
+            stats["source_pages"].pop(chunk_id, None)
+        else:
+            stats["source_pages"][chunk_id] = {"source_pages": metadata["source_pages"]}
+
+    def _record_duplicates(self, dedup: ChunkDeduplicator, stats: Dict[str, Any]) -> None:
+        """Point pages whose chunks were dropped as duplicates at the kept copies"""
+        # These copies were already passed on when a later page repeated them
+        for chunk_id, metadata in dedup.late_updates().items():
+            if chunk_id in stats["relocated"]:
+                stats["relocated"][chunk_id].update(metadata)
+            else:
+                self._record_source_pages(chunk_id, metadata, stats)
+        for page_num, chunk_ids in dedup.page_chunk_ids().items():
+            recorded = stats["page_chunks"].setdefault(page_num, [])
+            recorded.extend(chunk_id for chunk_id in chunk_ids if chunk_id not in recorded)
+        logger.info(f"Dropped {dedup.duplicates} of {dedup.chunks_seen} chunks as duplicates "
+                    f"({dedup.dedup_ratio:.1%})")
+
+    @staticmethod
+    def _tag_document_id(chunks, doc_id: str) -> None:
+        # Enforce document_id into all chunks metadata for filtering
+        for chunk in chunks:
+            chunk["metadata"]["document_id"] = doc_id
+            # For backward compatibility, also set city_name as document_id
+            chunk["metadata"]["city_name"] = doc_id
     
     def query(self, question: str, document_id: str = None, use_cache: bool = True) -> Dict[str, Any]:
         try:
@@ -143,5 +502,15 @@ class CityBudgetRAG:
                 "metadata": {}
             }
 
+    def is_indexed(self, document_id: str) -> bool:
+        """Whether a persistent vector store already holds this document"""
+        catalog = self.vector_store.catalog
+        return catalog is not None and document_id in catalog
+
+    def indexed_documents(self) -> Dict[str, Dict[str, Any]]:
+        """{document_id: catalog entry} of the documents in a persistent vector store"""
+        catalog = self.vector_store.catalog
+        return catalog.documents() if catalog is not None else {}
+
     def get_active_document_id(self):
         return self.vector_store.get_active_document_id()
\ No newline at end of file
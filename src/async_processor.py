@@ -30,4 +30,18 @@ def process_document_async(self, pdf_path: str, metadata: dict):
         return {
             'status': 'FAILURE',
             'error': str(e)
-        }
\ No newline at end of file
+        }
+
+@celery_app.task(bind=True)
+def process_upload_async(self, pdf_path: str, file_name: str, file_id: str):
+    """Async upload processing task: metadata detection plus ingestion"""
+    from src.jobs import process_upload
+
+    config = Config()
+    rag = CityBudgetRAG(config)
+
+    def report(stage: str, progress: float):
+        self.update_state(state='PROGRESS', meta={'stage': stage, 'progress': progress})
+
+    # Failures raise, so the task ends up in Celery's FAILURE state
+    return process_upload(rag, pdf_path, file_name, file_id, progress=report)
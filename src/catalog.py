@@ -0,0 +1,70 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentCatalog:
+    """The documents a persistent vector store holds, kept next to its data.
+
+    One JSON file mapping document_id to what was ingested (city, fiscal
+    year, file, chunk count, time), so a restarted process knows which
+    documents are already indexed without re-reading the vectors.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._documents = self._read()
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        if not self.path.exists():
+            return {}
+        try:
+            with self.path.open() as f:
+                return json.load(f).get("documents", {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable document catalog {self.path}: {e}")
+            return {}
+
+    def _write(self) -> None:
+        tmp_path = self.path.with_suffix(".json.tmp")
+        with tmp_path.open("w") as f:
+            json.dump({"documents": self._documents}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def record(self, document_id: str, **info) -> None:
+        """Add or refresh a document's entry"""
+        with self._lock:
+            entry = {**self._documents.get(document_id, {}), **info,
+                     "updated_at": datetime.utcnow().isoformat()}
+            self._documents[document_id] = entry
+            self._write()
+
+    def remove(self, document_id: str) -> None:
+        with self._lock:
+            if self._documents.pop(document_id, None) is not None:
+                self._write()
+
+    def get(self, document_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._documents.get(document_id)
+            return dict(entry) if entry else None
+
+    def documents(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {document_id: dict(entry) for document_id, entry in self._documents.items()}
+
+    def __contains__(self, document_id: str) -> bool:
+        with self._lock:
+            return document_id in self._documents
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._documents)
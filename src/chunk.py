@@ -0,0 +1,46 @@
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+class Chunk:
+    """One chunk on its way through the pipeline.
+
+    A slotted record instead of a dict per chunk. ``embedding`` is a float32
+    row, normally a view into the matrix of the batch it was embedded in.
+    Item access (``chunk["text"]``) still works, so code written against the
+    old chunk dicts keeps working.
+    """
+
+    __slots__ = ("chunk_id", "text", "metadata", "embedding")
+
+    def __init__(self, chunk_id: str, text: str, metadata: Dict[str, Any],
+                 embedding: Optional[np.ndarray] = None):
+        self.chunk_id = chunk_id
+        self.text = text
+        self.metadata = metadata
+        self.embedding = embedding
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__ or (key == "embedding" and self.embedding is None):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value) -> None:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__ and (key != "embedding" or self.embedding is not None)
+
+    def get(self, key: str, default=None):
+        return self[key] if key in self else default
+
+    def __repr__(self) -> str:
+        return f"Chunk({self.chunk_id!r}, {self.text[:40]!r}...)"
+
+
+def embedding_list(embedding) -> list:
+    """Plain list of floats, for vector store clients that won't take arrays"""
+    return embedding.tolist() if isinstance(embedding, np.ndarray) else list(embedding)
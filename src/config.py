@@ -6,8 +6,13 @@ load_dotenv()
 class Config:
     # API Keys
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    # Point every OpenAI client elsewhere, e.g. the local stand-in (python -m src.openai_standin)
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
     PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
     PINECONE_ENV = os.getenv("PINECONE_ENVIRONMENT")
+    # One namespace per document_id instead of a metadata filter; move existing data with `cli.py migrate-namespaces`
+    PINECONE_NAMESPACES = os.getenv("PINECONE_NAMESPACES", "false").lower() == "true"
+    PINECONE_UPSERT_WORKERS = int(os.getenv("PINECONE_UPSERT_WORKERS", 4))  # Upsert batches in flight
     
     # Redis
     REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
@@ -17,11 +22,67 @@ class Config:
     # Processing Settings
     CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", 1000))
     CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", 200))
+    CHUNKER = os.getenv("CHUNKER", "token")  # "token" (encode once) or "recursive" (LangChain)
+    # "page": chunk every page on its own, "document": chunks flow across pages and record page_start/page_end
+    CHUNKING_SCOPE = os.getenv("CHUNKING_SCOPE", "page")
+    # Drop repeated chunks (exact, or MinHash similarity >= DEDUP_THRESHOLD) before embedding
+    DEDUP_CHUNKS = os.getenv("DEDUP_CHUNKS", "true").lower() == "true"
+    DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.9))
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+    EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", 0)) or None  # None: the model's native size
+    EMBEDDING_CACHE = os.getenv("EMBEDDING_CACHE", "true").lower() == "true"  # SQLite cache under PROCESSED_DIR
+    EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", 4))  # Embedding requests in flight
+    EMBEDDING_RPM = int(os.getenv("EMBEDDING_RPM", 3000))  # Account limits, 0 for none
+    EMBEDDING_TPM = int(os.getenv("EMBEDDING_TPM", 1000000))
+    EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", 6))
+    # Each request is packed up to this many tokens and inputs
+    EMBEDDING_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_TOKENS", 100000))
+    EMBEDDING_BATCH_ITEMS = int(os.getenv("EMBEDDING_BATCH_ITEMS", 256))
     LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")  # Updated to o4-mini as cheaper alternative
     METADATA_EXTRACTION_MODEL = os.getenv("METADATA_EXTRACTION_MODEL", "gpt-4o-mini")  # New config for metadata extraction
     VECTOR_DB_INDEX = os.getenv("VECTOR_DB_INDEX", "city-budgets")
+    # "auto" (Pinecone when configured, else Chroma), "pinecone", "chroma" or "numpy" (exact search, files under VECTOR_DIR)
+    VECTOR_STORE = os.getenv("VECTOR_STORE", "auto")
+    # NumPy store only: "none", "int8" or "pq" codes, re-scored in full precision. Unset keeps the collection's setting
+    VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION") or None
+    # Keep the ChromaDB collection on disk under CHROMA_DIR, so restarts don't lose indexed documents (default: in memory)
+    CHROMA_PERSIST = os.getenv("CHROMA_PERSIST", "false").lower() == "true"
+    CHROMA_DIR = os.getenv("CHROMA_DIR", "data/chroma")
+    # BM25 index of chunk text per document, under LEXICAL_DIR
+    LEXICAL_INDEX = os.getenv("LEXICAL_INDEX", "true").lower() == "true"
+    LEXICAL_DIR = os.getenv("LEXICAL_DIR", "data/lexical")
+    # "auto" (lexical only for code/amount lookups, else lexical + vector fusion), "vector", "lexical" or "hybrid"
+    RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "auto")
+    TABLE_EXTRACTION_MODE = os.getenv("TABLE_EXTRACTION_MODE", "document")  # "document" or "page"
+    PDF_WORKERS = int(os.getenv("PDF_WORKERS", 1))  # >1 extracts pages in a process pool
+    OCR_DPI = int(os.getenv("OCR_DPI", 72))
+    OCR_WORKERS = int(os.getenv("OCR_WORKERS", os.cpu_count() or 1))  # Concurrent tesseract processes
+    OCR_CACHE = os.getenv("OCR_CACHE", "true").lower() == "true"
+    TABLE_FLAVOR = os.getenv("TABLE_FLAVOR", "stream")  # camelot flavor: "stream" or "lattice"
+    TABLE_DETECTION = os.getenv("TABLE_DETECTION", "always")  # "off", "heuristic" or "always"
+    EXTRACTION_CACHE = os.getenv("EXTRACTION_CACHE", "true").lower() == "true"
+    EXTRACTION_CACHE_MAX_MB = int(os.getenv("EXTRACTION_CACHE_MAX_MB", 512))
+    
+    # Streaming ingestion (extract -> chunk -> embed -> store run concurrently)
+    STREAMING_INGEST = os.getenv("STREAMING_INGEST", "true").lower() == "true"
+    PIPELINE_QUEUE_DEPTH = int(os.getenv("PIPELINE_QUEUE_DEPTH", 2))  # Batches buffered between stages
+    PIPELINE_PAGE_BATCH = int(os.getenv("PIPELINE_PAGE_BATCH", 8))
+    PIPELINE_CHUNK_BATCH = int(os.getenv("PIPELINE_CHUNK_BATCH", 256))  # Also caps inputs per embedding request
+    # Skip pages unchanged since the last ingest of the same document_id. Only
+    # safe when the vector store outlives the process (Pinecone, persistent stores);
+    # documents already in a persistent store's catalog are always ingested incrementally.
+    # With DEDUP_CHUNKS every page is chunked again, only chunks already stored are skipped
+    INCREMENTAL_INGEST = os.getenv("INCREMENTAL_INGEST", "false").lower() == "true"
+    
+    # Background ingestion jobs: "local" thread pool, or "celery" when Redis is reachable
+    INGEST_BACKEND = os.getenv("INGEST_BACKEND", "local")
+    INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", 1))  # Documents ingested at once; ingests of one document queue up
+    INGEST_MAX_PENDING = int(os.getenv("INGEST_MAX_PENDING", 8))
+    # Finished jobs stay pollable for this many seconds, and at most this many of them
+    INGEST_JOB_TTL = float(os.getenv("INGEST_JOB_TTL", 3600))
+    INGEST_MAX_FINISHED = int(os.getenv("INGEST_MAX_FINISHED", 1000))
     
     # Paths
     PDF_DIR = "data/pdfs"
-    PROCESSED_DIR = "data/processed"
\ No newline at end of file
+    PROCESSED_DIR = "data/processed"
+    VECTOR_DIR = "data/vectors"
\ No newline at end of file
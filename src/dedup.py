@@ -0,0 +1,145 @@
+import hashlib
+import re
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+WORD = re.compile(r"\w+")
+# Sign, parentheses (negative amounts in budget tables) and separators are part of the number
+NUMBER = re.compile(r"[(\-\u2212]?\d(?:[\d,.]*\d)?\)?")
+
+
+def chunk_pages(chunk: Dict[str, Any]) -> List[int]:
+    """Pages a chunk covers"""
+    page_start = chunk["metadata"]["page_number"]
+    return list(range(page_start, chunk["metadata"].get("page_end", page_start) + 1))
+
+
+class ChunkDeduplicator:
+    """Drop chunks that repeat one already seen in the same document.
+
+    Exact copies are found by a hash of the whitespace/case normalized text,
+    near copies (running headers around different line breaks, a table
+    repeated with a changed footnote) by MinHash over word shingles, with
+    LSH banding to find candidates. Two chunks are only ever merged if they
+    contain the same numbers in the same order, signs, parentheses and
+    separators included, so budget tables that share their layout but not
+    their amounts are always kept apart.
+
+    The first copy is kept and its metadata lists every page the text was
+    found on in ``source_pages`` (comma separated, vector stores don't all
+    take lists). Use one instance per ingest.
+    """
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 64, bands: int = 16,
+                 shingle_size: int = 5, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hashing: (a * x + b) >> 32 over uint64, a odd
+        self._a = rng.integers(1, 2 ** 63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+
+        self._exact = {}  # content hash -> keeper index
+        self._buckets = {}  # (numbers hash, band, band hash) -> keeper indices
+        self._keepers = []  # {"chunk_id", "pages", "signature", "chunk"}
+        self._late = set()  # keepers that gained pages after they were passed on
+        self.chunks_seen = 0
+        self.duplicates = 0
+
+    @property
+    def dedup_ratio(self) -> float:
+        """Share of the chunks seen that were dropped as duplicates"""
+        return self.duplicates / self.chunks_seen if self.chunks_seen else 0.0
+
+    def filter(self, chunk_batches: Iterable[List[Dict[str, Any]]]) -> Iterator[List[Dict[str, Any]]]:
+        """Pass on each batch without the chunks that duplicate an earlier one"""
+        for chunks in chunk_batches:
+            first_new = len(self._keepers)
+            kept = [chunk for chunk in chunks if self.add(chunk) is None]
+            # Later copies can't touch these dicts anymore, see late_updates()
+            for keeper in self._keepers[first_new:]:
+                keeper["chunk"] = None
+            if kept:
+                yield kept
+
+    def add(self, chunk: Dict[str, Any]) -> Optional[str]:
+        """Register a chunk; return the chunk_id it duplicates, or None if it is new"""
+        self.chunks_seen += 1
+        text = " ".join(WORD.findall(chunk["text"].lower()))
+        numbers = " ".join(NUMBER.findall(chunk["text"]))
+        # Words alone would equate "(1,200)", "-1,200", "1.200" and "1,200"
+        content_hash = hashlib.sha256(f"{text}\x00{numbers}".encode()).hexdigest()
+        numbers_hash = zlib.crc32(numbers.encode())
+
+        index = self._exact.get(content_hash)
+        signature = None
+        if index is None:
+            signature = self._signature(text)
+            index = self._near_duplicate(signature, numbers_hash)
+
+        if index is not None:
+            self.duplicates += 1
+            keeper = self._keepers[index]
+            keeper["pages"].update(chunk_pages(chunk))
+            if keeper["chunk"] is not None:
+                keeper["chunk"]["metadata"].update(self._page_metadata(keeper))
+            else:
+                self._late.add(index)
+            return keeper["chunk_id"]
+
+        index = len(self._keepers)
+        keeper = {"chunk_id": chunk["chunk_id"], "pages": set(chunk_pages(chunk)), "chunk": chunk}
+        self._keepers.append(keeper)
+        self._exact[content_hash] = index
+        for band, band_hash in enumerate(self._band_hashes(signature)):
+            self._buckets.setdefault((numbers_hash, band, band_hash), []).append(index)
+        keeper["signature"] = signature
+        chunk["metadata"].update(self._page_metadata(keeper))
+        return None
+
+    def late_updates(self) -> Dict[str, Dict[str, Any]]:
+        """Metadata changes for kept chunks that gained pages after being passed on"""
+        return {self._keepers[index]["chunk_id"]: self._page_metadata(self._keepers[index])
+                for index in sorted(self._late)}
+
+    def page_chunk_ids(self) -> Dict[int, List[str]]:
+        """{page: ids of the kept chunks holding its text}, including pages whose copy was dropped"""
+        pages = {}
+        for keeper in self._keepers:
+            for page_num in keeper["pages"]:
+                pages.setdefault(page_num, []).append(keeper["chunk_id"])
+        return pages
+
+    def _near_duplicate(self, signature: np.ndarray, numbers_hash: int) -> Optional[int]:
+        candidates = set()
+        for band, band_hash in enumerate(self._band_hashes(signature)):
+            candidates.update(self._buckets.get((numbers_hash, band, band_hash), ()))
+        best, best_similarity = None, self.threshold
+        for index in candidates:
+            similarity = float(np.mean(self._keepers[index]["signature"] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = index, similarity
+        return best
+
+    def _signature(self, text: str) -> np.ndarray:
+        words = text.split()
+        if len(words) <= self.shingle_size:
+            shingles = [" ".join(words)]
+        else:
+            shingles = [" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)]
+        hashes = np.fromiter((zlib.crc32(shingle.encode()) for shingle in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        permuted = (hashes[:, None] * self._a[None, :] + self._b[None, :]) >> np.uint64(32)
+        return permuted.min(axis=0)
+
+    def _band_hashes(self, signature: np.ndarray) -> List[int]:
+        return [hash(band.tobytes()) for band in np.split(signature, self.bands)]
+
+    @staticmethod
+    def _page_metadata(keeper: Dict[str, Any]) -> Dict[str, Any]:
+        return {"source_pages": ",".join(str(page_num) for page_num in sorted(keeper["pages"]))}
@@ -0,0 +1,73 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Embeddings on disk, keyed by (model, dimensions, sha256(text)).
+
+    Vectors are stored as float32 blobs in a single SQLite file, so a text
+    embedded once (re-uploads, amended budgets, boilerplate shared between
+    documents) is never sent to the API again. ``dimensions`` is the value
+    requested from the API, 0 for the model's default size.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # The ingest pipeline embeds in its own thread, the API queries in others
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL, dimensions INTEGER NOT NULL, text_hash TEXT NOT NULL,"
+                " vector BLOB NOT NULL, PRIMARY KEY (model, dimensions, text_hash))"
+            )
+
+    def get_many(self, model: str, dimensions: Optional[int], hashes: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Return {text_hash: float32 vector} for the hashes that are cached"""
+        hashes = list(dict.fromkeys(hashes))
+        found = {}
+        with self._lock:
+            # Stay under SQLite's bound parameter limit
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND dimensions = ?"
+                    f" AND text_hash IN ({','.join('?' * len(batch))})",
+                    [model, dimensions or 0, *batch]
+                ).fetchall()
+                for row_hash, blob in rows:
+                    found[row_hash] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, model: str, dimensions: Optional[int], vectors: Dict[str, List[float]]) -> None:
+        rows = [(model, dimensions or 0, row_hash, np.asarray(vector, dtype=np.float32).tobytes())
+                for row_hash, vector in vectors.items()]
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not write embedding cache entries: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {"entries": entries, "bytes": self.path.stat().st_size if self.path.exists() else 0}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
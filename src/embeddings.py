@@ -1,65 +1,273 @@
-from openai import OpenAI
+import base64
 import numpy as np
-from typing import List, Dict, Any
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from tqdm import tqdm
 import logging
 import os
+from src.embedding_cache import EmbeddingCache, text_hash
+from src.rate_limiter import RateLimiter, call_with_retries
 
 logger = logging.getLogger(__name__)
 
 
+def estimate_tokens(chunk: Dict[str, Any]) -> int:
+    """Token count from chunk metadata (TextProcessor already counted it), or a ~4 characters per token guess"""
+    token_count = chunk.get("metadata", {}).get("token_count")
+    return token_count if token_count is not None else len(chunk["text"]) // 4 + 1
+
+
+def pack_batches(items: List[Tuple[str, str, int]], max_tokens: int, max_items: int) -> List[list]:
+    """Split (hash, text, tokens) items into requests of at most ``max_tokens`` tokens and ``max_items`` items.
+
+    Items keep their order; a request is closed as soon as the next item
+    would overflow either cap. An item bigger than ``max_tokens`` on its own
+    is sent alone (the API rejects it only if it exceeds the model's input limit).
+    """
+    batches, batch, batch_tokens = [], [], 0
+    for item in items:
+        if batch and (batch_tokens + item[2] > max_tokens or len(batch) >= max_items):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(item)
+        batch_tokens += item[2]
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class BatchStats:
+    """Sizes of the embedding requests sent, for tuning the batch budget"""
+
+    def __init__(self, max_tokens: Optional[int] = None):
+        self.max_tokens = max_tokens
+        self.requests = 0
+        self.items = 0
+        self.tokens = 0
+        self.largest_items = 0
+        self.largest_tokens = 0
+        self._lock = threading.Lock()
+
+    def record(self, batch: List[Tuple[str, str, int]]) -> None:
+        tokens = sum(item[2] for item in batch)
+        with self._lock:
+            self.requests += 1
+            self.items += len(batch)
+            self.tokens += tokens
+            self.largest_items = max(self.largest_items, len(batch))
+            self.largest_tokens = max(self.largest_tokens, tokens)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = max(self.requests, 1)
+            return {
+                "requests": self.requests,
+                "items": self.items,
+                "tokens": self.tokens,
+                "mean_items": round(self.items / requests, 1),
+                "mean_tokens": round(self.tokens / requests, 1),
+                "max_items": self.largest_items,
+                "max_tokens": self.largest_tokens,
+                # How full requests were against the token budget, on average
+                "token_fill": round(self.tokens / requests / self.max_tokens, 3) if self.max_tokens else None
+            }
+
+
 class EmbeddingGenerator:
-    def __init__(self, api_key: str = None, model: str = "text-embedding-3-small"):
+    def __init__(self, api_key: str = None, model: str = "text-embedding-3-small",
+                 dimensions: Optional[int] = None, cache: Optional[EmbeddingCache] = None,
+                 query_cache_size: int = 1024, concurrency: int = 4,
+                 rate_limiter: Optional[RateLimiter] = None, max_retries: int = 6,
+                 max_batch_tokens: int = 100000, max_batch_items: int = 256,
+                 base_url: Optional[str] = None):
         if api_key is None:
             api_key = os.getenv("OPENAI_API_KEY")
-            
+
         if not api_key:
             raise ValueError("OpenAI API key must be provided or set in environment variables")
-        
+
         # For newer versions of OpenAI client
         try:
             from openai import OpenAI
-            self.client = OpenAI(api_key=api_key)
+            # Retries are done here (see _embed_request), paced by the rate limiter
+            self.client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
         except TypeError:
             # Fallback for older versions
             import openai
             openai.api_key = api_key
             self.client = openai
-            
+
         self.model = model
-        
-    def generate_embeddings(self, chunks: List[Dict[str, Any]], 
-                          batch_size: int = 100) -> List[Dict[str, Any]]:
-        """Generate embeddings for text chunks"""
+        self.dimensions = dimensions  # None: the model's native size
+        self.cache = cache
+        self.query_cache_size = query_cache_size
+        self._query_cache = OrderedDict()  # LRU in front of the disk cache, queries repeat a lot
+        self._query_lock = threading.Lock()
+        self.concurrency = max(1, concurrency)  # Embedding requests in flight at once
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.max_batch_tokens = max_batch_tokens  # Token budget of one embeddings request
+        self.max_batch_items = max_batch_items  # Inputs per request
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="embed")
+            return self._executor
+
+    def _create_embeddings(self, texts) -> np.ndarray:
+        """One embeddings API call, returning a float32 matrix with a row per input.
+
+        The vectors are requested base64 encoded and decoded straight into the
+        matrix, so they never exist as lists of Python floats.
+        """
+        # Passed as extra_body: the pinned client predates the dimensions parameter
+        kwargs = {"extra_body": {"dimensions": self.dimensions}} if self.dimensions else {}
+        response = self.client.embeddings.create(model=self.model, input=texts, encoding_format="base64", **kwargs)
+        rows = [np.frombuffer(base64.b64decode(item.embedding), dtype=np.float32)
+                if isinstance(item.embedding, str) else np.asarray(item.embedding, dtype=np.float32)
+                for item in response.data]
+        matrix = np.empty((len(rows), len(rows[0]) if rows else 0), dtype=np.float32)
+        for i, row in enumerate(rows):
+            matrix[i] = row
+        return matrix
+
+    def _embed_request(self, batch: List[Tuple[str, str, int]]) -> Dict[str, np.ndarray]:
+        """Embed one request's (hash, text, tokens) items within the rate limits, retrying transient errors"""
+        texts = [text for _, text, _ in batch]
+        tokens = sum(token_count for _, _, token_count in batch)
+
+        def attempt():
+            self.rate_limiter.acquire(tokens)
+            return self._create_embeddings(texts)
+
+        matrix = call_with_retries(attempt, max_retries=self.max_retries,
+                                   description=f"Embedding request of {len(batch)} texts")
+        embedded = {batch_hash: row for (batch_hash, _, _), row in zip(batch, matrix)}
+        if self.cache:
+            self.cache.put_many(self.model, self.dimensions, embedded)
+        return embedded
+
+    def _plan_requests(self, chunks: List[Dict[str, Any]], batch_size: Optional[int] = None,
+                       stats: Optional[BatchStats] = None) -> Tuple[List[str], Dict[str, np.ndarray], List[list]]:
+        """Look chunks up in the cache and split the distinct missing texts into requests"""
+        hashes = [text_hash(chunk["text"]) for chunk in chunks]
+        cached = self.cache.get_many(self.model, self.dimensions, hashes) if self.cache else {}
+
+        # Each distinct missing text is sent once
+        missing = {}
+        for chunk, chunk_hash in zip(chunks, hashes):
+            if chunk_hash not in cached and chunk_hash not in missing:
+                missing[chunk_hash] = (chunk_hash, chunk["text"], estimate_tokens(chunk))
+        if self.cache:
+            logger.info(f"Embedding cache: {len(chunks) - len(missing)} hits, {len(missing)} texts to embed")
+
+        requests = pack_batches(list(missing.values()), self.max_batch_tokens, batch_size or self.max_batch_items)
+        if stats:
+            for batch in requests:
+                stats.record(batch)
+        return hashes, cached, requests
+
+    @staticmethod
+    def _apply(chunks: List[Dict[str, Any]], hashes: List[str], embedded: Dict[str, np.ndarray]) -> None:
+        """Copy the batch's vectors into one float32 matrix and give each chunk its row as a view"""
+        if not embedded:
+            return
+        dimensions = len(next(iter(embedded.values())))
+        matrix = np.empty((len(chunks), dimensions), dtype=np.float32)
+        for i, (chunk, chunk_hash) in enumerate(zip(chunks, hashes)):
+            if chunk_hash in embedded:
+                matrix[i] = embedded[chunk_hash]
+                chunk["embedding"] = matrix[i]
+
+    def generate_embeddings(self, chunks: List[Dict[str, Any]], batch_size: Optional[int] = None,
+                            stats: Optional[BatchStats] = None) -> List[Dict[str, Any]]:
+        """Generate embeddings for text chunks, sending only texts missing from the cache.
+
+        Texts are packed into requests of up to ``max_batch_tokens`` tokens and
+        ``batch_size`` (default ``max_batch_items``) inputs, and request sizes
+        are recorded in ``stats``. Up to ``concurrency`` requests run at once,
+        paced by the rate limiter; rate limit and server errors are retried
+        with jittered backoff.
+        """
         logger.info(f"Generating embeddings for {len(chunks)} chunks")
-        
-        for i in tqdm(range(0, len(chunks), batch_size), desc="Generating embeddings"):
-            batch = chunks[i:i + batch_size]
-            texts = [chunk["text"] for chunk in batch]
-            
-            try:
-                response = self.client.embeddings.create(
-                    model=self.model,
-                    input=texts
-                )
-                
-                for j, embedding in enumerate(response.data):
-                    chunks[i + j]["embedding"] = embedding.embedding
-                    
-            except Exception as e:
-                logger.error(f"Error generating embeddings for batch {i}: {e}")
-                raise
-        
+        hashes, embedded, requests = self._plan_requests(chunks, batch_size, stats)
+
+        executor = self._get_executor()
+        futures = [executor.submit(self._embed_request, batch) for batch in requests]
+        try:
+            for future in tqdm(futures, desc="Generating embeddings"):
+                embedded.update(future.result())
+        except Exception as e:
+            logger.error(f"Error generating embeddings: {e}")
+            for future in futures:
+                future.cancel()
+            raise
+
+        self._apply(chunks, hashes, embedded)
         return chunks
-    
-    def generate_query_embedding(self, query: str) -> List[float]:
-        """Generate embedding for a single query"""
+
+    def iter_embeddings(self, chunk_batches: Iterable[List[Dict[str, Any]]], batch_size: Optional[int] = None,
+                        stats: Optional[BatchStats] = None) -> Iterator[List[Dict[str, Any]]]:
+        """Embed a stream of chunk batches, yielding each batch once it has embeddings.
+
+        Requests for the next batches go out while earlier ones are in flight,
+        with at most ``concurrency`` batches outstanding. Batches come out in
+        the order they went in.
+        """
+        executor = self._get_executor()
+        pending = deque()
+
+        def finish(chunks, hashes, embedded, futures: List[Future]):
+            for future in futures:
+                embedded.update(future.result())
+            self._apply(chunks, hashes, embedded)
+            return chunks
+
         try:
-            response = self.client.embeddings.create(
-                model=self.model,
-                input=query
-            )
-            return response.data[0].embedding
+            for chunks in chunk_batches:
+                hashes, cached, requests = self._plan_requests(chunks, batch_size, stats)
+                pending.append((chunks, hashes, cached,
+                                [executor.submit(self._embed_request, batch) for batch in requests]))
+                while len(pending) > self.concurrency or (pending and all(f.done() for f in pending[0][3])):
+                    yield finish(*pending.popleft())
+            while pending:
+                yield finish(*pending.popleft())
+        finally:
+            for *_, futures in pending:
+                for future in futures:
+                    future.cancel()
+
+    def generate_query_embedding(self, query: str) -> np.ndarray:
+        """Generate embedding for a single query, as a float32 vector"""
+        query_hash = text_hash(query)
+        with self._query_lock:
+            if query_hash in self._query_cache:
+                self._query_cache.move_to_end(query_hash)
+                return self._query_cache[query_hash]
+
+        try:
+            cached = self.cache.get_many(self.model, self.dimensions, [query_hash]) if self.cache else {}
+            if query_hash in cached:
+                embedding = cached[query_hash]
+            else:
+                embedding = self._embed_request([(query_hash, query, len(query) // 4 + 1)])[query_hash]
         except Exception as e:
             logger.error(f"Error generating query embedding: {e}")
-            raise
\ No newline at end of file
+            raise
+
+        with self._query_lock:
+            self._query_cache[query_hash] = embedding
+            while len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+        return embedding
+
+    def close(self) -> None:
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
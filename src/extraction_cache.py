@@ -0,0 +1,109 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 3  # Bump when the cached page shape changes
+
+
+class ExtractionCache:
+    """On-disk cache of PDFProcessor output, keyed by file content and extractor settings.
+
+    Entries are gzip-compressed JSON files named after their key. When the
+    cache grows past ``max_bytes`` the least recently used entries are removed.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(pdf_path: str, settings: Dict[str, Any]) -> str:
+        """SHA-256 of the file bytes combined with the extractor settings"""
+        digest = hashlib.sha256()
+        with open(pdf_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        file_hash = digest.hexdigest()
+        settings_json = json.dumps({**settings, "version": CACHE_FORMAT_VERSION}, sort_keys=True)
+        return hashlib.sha256(f"{file_hash}:{settings_json}".encode()).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json.gz"
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        path = self._entry_path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                pages = json.load(f)
+            os.utime(path)  # Mark as recently used for eviction
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable extraction cache entry {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        logger.info(f"Extraction cache hit for {key[:12]} ({len(pages)} pages)")
+        return pages
+
+    def put(self, key: str, pages: List[Dict[str, Any]]) -> None:
+        path = self._entry_path(key)
+        tmp_path = path.with_suffix(f".tmp{threading.get_ident()}")
+        try:
+            with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+                json.dump(pages, f, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write extraction cache entry {path.name}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+        self._evict()
+
+    def _entries(self):
+        entries = []
+        for path in self.cache_dir.glob("*.json.gz"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                logger.info(f"Evicted extraction cache entry {path.name}")
+
+    def stats(self) -> Dict[str, Any]:
+        sizes = [size for _, size, _ in self._entries()]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(sizes),
+            "bytes": sum(sizes),
+            "max_bytes": self.max_bytes
+        }
@@ -0,0 +1,164 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from src.config import Config
+from src.metadata import detect_document_metadata
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[str, float], None]
+
+
+def process_upload(rag, pdf_path: str, file_name: str, file_id: str,
+                   progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    """Detect city/fiscal year of an uploaded PDF and ingest it. Runs inside a job."""
+    report = progress or (lambda stage, fraction: None)
+    report("detecting_metadata", 0.0)
+    # A cheap look at the first pages is enough here; the full extraction
+    # (OCR, tables) happens once, inside ingest_document
+    combined_text = rag.pdf_processor.extract_preview_text(pdf_path, max_pages=5)
+    city_name, fiscal_year = detect_document_metadata(combined_text, file_name, rag.config)
+
+    logger.info(f"Detected city: {city_name}, fiscal_year: {fiscal_year} for {file_name}")
+
+    # ingest_document derives the document_id from city and fiscal year
+    metadata = {
+        "file_name": file_name,
+        "city_name": city_name,  # Original city name for display
+        "fiscal_year": fiscal_year,
+        "file_id": file_id
+    }
+    result = rag.ingest_document(pdf_path, metadata, progress_callback=report)
+    if result.get("status") == "error":
+        raise RuntimeError(result.get("error", "Ingestion failed"))
+
+    return {**result, "file_id": file_id, "file_name": file_name}
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class LocalJobManager:
+    """Runs ingestion jobs in a bounded in-process thread pool and tracks their progress.
+
+    Finished jobs are kept for job_ttl seconds, and at most max_finished of them,
+    so that polling clients can read their result; after that they are forgotten.
+    """
+
+    def __init__(self, rag, max_workers: int = 1, max_pending: int = 8,
+                 job_ttl: float = 3600, max_finished: int = 1000):
+        self.rag = rag
+        self.max_pending = max_pending
+        self.job_ttl = job_ttl
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        # job_id -> monotonic time the job finished, oldest first
+        self._finished: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit_upload(self, pdf_path: str, file_name: str, file_id: str,
+                      on_success: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> str:
+        with self._lock:
+            self._evict()
+            pending = sum(1 for job in self._jobs.values() if job["status"] in ("queued", "running"))
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"{pending} ingestion jobs already pending")
+            job_id = uuid.uuid4().hex
+            now = datetime.utcnow().isoformat()
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "status": "queued",
+                "stage": "queued",
+                "progress": 0.0,
+                "result": None,
+                "error": None,
+                "created_at": now,
+                "updated_at": now
+            }
+
+        def run():
+            self._update(job_id, status="running")
+            try:
+                result = process_upload(self.rag, pdf_path, file_name, file_id,
+                                        progress=lambda stage, fraction: self._update(job_id, stage=stage, progress=fraction))
+            except Exception as e:
+                logger.error(f"Ingestion job {job_id} failed: {e}")
+                self._update(job_id, status="failed", stage="failed", error=str(e))
+                return
+            self._update(job_id, status="succeeded", stage="completed", progress=1.0, result=result)
+            if on_success:
+                on_success(job_id, result)
+
+        self._executor.submit(run)
+        logger.info(f"Queued ingestion job {job_id} for {file_name}")
+        return job_id
+
+    def _update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            self._jobs[job_id].update(fields, updated_at=datetime.utcnow().isoformat())
+            if fields.get("status") in ("succeeded", "failed"):
+                self._finished[job_id] = time.monotonic()
+
+    def _evict(self) -> None:
+        """Drop finished jobs past their TTL or beyond the cap. Caller holds the lock."""
+        expired_before = time.monotonic() - self.job_ttl
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            if finished_at > expired_before and len(self._finished) <= self.max_finished:
+                break
+            del self._finished[job_id]
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._evict()
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+
+class CeleryJobManager:
+    """Hands ingestion jobs to the Celery worker and reads their state back from Redis"""
+
+    def __init__(self):
+        from src.async_processor import celery_app, process_upload_async
+        self.celery_app = celery_app
+        self.task = process_upload_async
+
+    def submit_upload(self, pdf_path: str, file_name: str, file_id: str, on_success=None) -> str:
+        # on_success can't run here, the API applies results when a finished job is polled
+        return self.task.delay(pdf_path, file_name, file_id).id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        result = self.celery_app.AsyncResult(job_id)
+        job = {"job_id": job_id, "status": "queued", "stage": "queued", "progress": 0.0,
+               "result": None, "error": None}
+        if result.state == "PROGRESS":
+            info = result.info or {}
+            job.update(status="running", stage=info.get("stage", "running"), progress=info.get("progress", 0.0))
+        elif result.state == "SUCCESS":
+            job.update(status="succeeded", stage="completed", progress=1.0, result=result.result)
+        elif result.state == "FAILURE":
+            job.update(status="failed", stage="failed", error=str(result.info))
+        return job
+
+
+def create_job_manager(config: Config, rag):
+    """Celery when INGEST_BACKEND=celery and Redis answers, otherwise the in-process pool"""
+    if config.INGEST_BACKEND == "celery":
+        try:
+            import redis
+            redis.Redis(host=config.REDIS_HOST, port=config.REDIS_PORT, socket_connect_timeout=2).ping()
+            logger.info("Running ingestion jobs on Celery")
+            return CeleryJobManager()
+        except Exception as e:
+            logger.warning(f"Redis unavailable ({e}), running ingestion jobs in-process")
+    return LocalJobManager(rag, max_workers=config.INGEST_WORKERS, max_pending=config.INGEST_MAX_PENDING,
+                           job_ttl=config.INGEST_JOB_TTL, max_finished=config.INGEST_MAX_FINISHED)
@@ -0,0 +1,174 @@
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TOKEN = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from how in is it of on or the to was were what which who with "
+    "does do did this that these those much many total show me give list find".split()
+)
+# Fund numbers, account codes, years and amounts: tokens with digits
+CODE = re.compile(r"\d")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word and number tokens; amounts lose separators and zero cents ("$4,500.00" -> "4500")"""
+    tokens = []
+    for token in TOKEN.findall(text.lower()):
+        if token[0].isdigit():
+            token = re.sub(r"\.0+$", "", token.replace(",", ""))
+        tokens.append(token)
+    return tokens
+
+
+def is_lexical_query(query: str, max_terms: int = 4) -> bool:
+    """Whether a query is an exact lookup: a few terms, at least one of them a code or an amount.
+
+    "Fund 2100 total" and "Police overtime 2024" are; "How did police
+    overtime change since 2020?" is not, it needs the semantic match.
+    """
+    terms = [token for token in tokenize(query) if token not in STOPWORDS]
+    return 0 < len(terms) <= max_terms and any(CODE.search(term) for term in terms)
+
+
+class _DocumentIndex:
+    """BM25 statistics of one document's chunks"""
+
+    def __init__(self, chunks: Dict[str, Dict[str, Any]]):
+        self.chunks = chunks
+        self.ids = list(chunks)
+        self.lengths = np.zeros(len(self.ids), dtype=np.float32)
+        self.postings: Dict[str, tuple] = {}
+        postings: Dict[str, List[tuple]] = {}
+        for row, chunk_id in enumerate(self.ids):
+            counts = Counter(tokenize(chunks[chunk_id]["text"]))
+            self.lengths[row] = sum(counts.values())
+            for term, count in counts.items():
+                postings.setdefault(term, []).append((row, count))
+        for term, entries in postings.items():
+            rows, counts = zip(*entries)
+            self.postings[term] = (np.array(rows, dtype=np.int64), np.array(counts, dtype=np.float32))
+        self.average_length = float(self.lengths.mean()) if len(self.ids) else 0.0
+
+
+class LexicalIndex:
+    """Per-document BM25 index over chunk text, for exact line-item and number lookups.
+
+    Each document is one JSON file of {chunk_id: {"text", "metadata"}} under
+    ``directory``; the postings are rebuilt from it in memory when the
+    document is first searched. Changes are kept in memory until ``save``.
+    """
+
+    def __init__(self, directory: str, k1: float = 1.2, b: float = 0.75):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.k1 = k1
+        self.b = b
+        self._chunks: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._indexes: Dict[str, _DocumentIndex] = {}
+        self._lock = threading.RLock()
+
+    def _path(self, document_id: str) -> Path:
+        safe_id = "".join(c if c.isalnum() or c in "-_." else "_" for c in document_id)
+        return self.directory / f"{safe_id}.json"
+
+    def _document(self, document_id: str) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            if document_id not in self._chunks:
+                path = self._path(document_id)
+                chunks = {}
+                if path.exists():
+                    try:
+                        with path.open() as f:
+                            chunks = json.load(f)["chunks"]
+                    except (OSError, ValueError, KeyError) as e:
+                        logger.warning(f"Ignoring unreadable lexical index for {document_id}: {e}")
+                self._chunks[document_id] = chunks
+            return self._chunks[document_id]
+
+    def add(self, document_id: str, chunks: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            stored = self._document(document_id)
+            for chunk in chunks:
+                stored[chunk["chunk_id"]] = {"text": chunk["text"], "metadata": dict(chunk["metadata"])}
+            self._indexes.pop(document_id, None)
+
+    def delete(self, document_id: str, chunk_ids: Iterable[str]) -> None:
+        with self._lock:
+            stored = self._document(document_id)
+            for chunk_id in chunk_ids:
+                stored.pop(chunk_id, None)
+            self._indexes.pop(document_id, None)
+
+    def update_metadata(self, document_id: str, updates: Dict[str, Dict[str, Any]]) -> None:
+        with self._lock:
+            stored = self._document(document_id)
+            for chunk_id, metadata in updates.items():
+                if chunk_id in stored:
+                    stored[chunk_id]["metadata"].update(metadata)
+
+    def save(self, document_id: str) -> None:
+        with self._lock:
+            path = self._path(document_id)
+            tmp_path = path.with_suffix(".json.tmp")
+            with tmp_path.open("w") as f:
+                json.dump({"document_id": document_id, "chunks": self._document(document_id)}, f)
+            os.replace(tmp_path, path)
+
+    def has_document(self, document_id: str) -> bool:
+        return bool(self._document(document_id))
+
+    def _index(self, document_id: str) -> _DocumentIndex:
+        with self._lock:
+            if document_id not in self._indexes:
+                self._indexes[document_id] = _DocumentIndex(dict(self._document(document_id)))
+            return self._indexes[document_id]
+
+    def search(self, document_id: str, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """Top ``top_k`` chunks of a document by BM25, only chunks sharing a term with the query"""
+        index = self._index(document_id)
+        if not index.ids:
+            return []
+        scores = np.zeros(len(index.ids), dtype=np.float32)
+        for term in set(tokenize(query)) - STOPWORDS:
+            if term not in index.postings:
+                continue
+            rows, counts = index.postings[term]
+            idf = math.log(1 + (len(index.ids) - len(rows) + 0.5) / (len(rows) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * index.lengths[rows] / index.average_length)
+            scores[rows] += idf * counts * (self.k1 + 1) / (counts + norm)
+        hits = np.flatnonzero(scores)
+        if not len(hits):
+            return []
+        top = hits[np.argsort(-scores[hits])[:top_k]]
+        return [{
+            "content": index.chunks[index.ids[row]]["text"],
+            "metadata": dict(index.chunks[index.ids[row]]["metadata"]),
+            "score": float(scores[row])
+        } for row in top]
+
+
+def reciprocal_rank_fusion(rankings: List[List[Dict[str, Any]]], top_k: int = 5, k: int = 60) -> List[Dict[str, Any]]:
+    """Merge ranked result lists, scoring each chunk by sum(1 / (k + rank)) over the lists it is in.
+
+    Chunks are matched by their text, which is what their ids hash. Each
+    result keeps the score of the list it was first seen in.
+    """
+    fused: Dict[str, float] = {}
+    results: Dict[str, Dict[str, Any]] = {}
+    for ranking in rankings:
+        for rank, result in enumerate(ranking):
+            key = result["content"]
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank + 1)
+            results.setdefault(key, result)
+    return [results[key] for key in sorted(fused, key=fused.get, reverse=True)[:top_k]]
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def page_fingerprint(page: Dict[str, Any]) -> str:
+    """Hash of a page's extracted text and tables"""
+    digest = hashlib.sha256(page.get('text', '').encode())
+    for table in page.get('tables', []):
+        digest.update(b"\x00")
+        digest.update(table.encode())
+    return digest.hexdigest()
+
+
+class ManifestStore:
+    """Per-document record of what was ingested: page fingerprints and their chunk ids,
+    and the page span of every stored chunk.
+
+    One JSON file per document_id, used to work out which pages and chunks
+    changed between two ingests of the same document.
+    """
+
+    def __init__(self, manifest_dir: str):
+        self.manifest_dir = Path(manifest_dir)
+        self.manifest_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, document_id: str) -> Path:
+        safe_id = "".join(c if c.isalnum() or c in "-_." else "_" for c in document_id)
+        return self.manifest_dir / f"{safe_id}.json"
+
+    def _read(self, document_id: str) -> Dict[str, Any]:
+        path = self._path(document_id)
+        if not path.exists():
+            return {}
+        try:
+            with path.open() as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable manifest for {document_id}: {e}")
+            return {}
+
+    def load(self, document_id: str) -> Dict[int, Dict[str, Any]]:
+        """Return {page_num: {"fingerprint", "chunk_ids"}} for a document, empty if never ingested"""
+        return {int(page_num): record for page_num, record in self._read(document_id).get("pages", {}).items()}
+
+    def load_chunks(self, document_id: str) -> Dict[str, Tuple[int, int]]:
+        """Return {chunk_id: (page_start, page_end)} of the stored chunks, empty for older manifests"""
+        return {chunk_id: tuple(span) for chunk_id, span in self._read(document_id).get("chunks", {}).items()}
+
+    def save(self, document_id: str, pages: Dict[int, Dict[str, Any]],
+             chunks: Optional[Dict[str, Tuple[int, int]]] = None) -> None:
+        path = self._path(document_id)
+        manifest = {
+            "document_id": document_id,
+            "updated_at": datetime.utcnow().isoformat(),
+            "pages": {str(page_num): pages[page_num] for page_num in sorted(pages)},
+            "chunks": {chunk_id: list(span) for chunk_id, span in (chunks or {}).items()}
+        }
+        tmp_path = path.with_suffix(".json.tmp")
+        with tmp_path.open("w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+
+    def chunk_ids(self, document_id: str) -> List[str]:
+        """Every chunk id the document's last ingest left stored"""
+        manifest = self._read(document_id)
+        ids = [chunk_id for page_num in sorted(manifest.get("pages", {}), key=int)
+               for chunk_id in manifest["pages"][page_num]["chunk_ids"]]
+        return list(dict.fromkeys(ids + list(manifest.get("chunks", {}))))
+
+    def document_ids(self) -> List[str]:
+        """Every document with a manifest, i.e. every document ingested so far"""
+        ids = []
+        for path in sorted(self.manifest_dir.glob("*.json")):
+            try:
+                with path.open() as f:
+                    ids.append(json.load(f)["document_id"])
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Skipping unreadable manifest {path}: {e}")
+        return ids
+
+    def delete(self, document_id: str) -> None:
+        self._path(document_id).unlink(missing_ok=True)
+
+
+def stale_chunk_ids(previous: Dict[int, Dict[str, Any]], current: Dict[int, Dict[str, Any]]) -> List[str]:
+    """Chunk ids recorded in ``previous`` that no page of ``current`` still uses"""
+    live_ids = {chunk_id for record in current.values() for chunk_id in record["chunk_ids"]}
+    # dict, not set: once per chunk even if it spans pages, in page order
+    return list(dict.fromkeys(chunk_id
+                              for record in previous.values()
+                              for chunk_id in record["chunk_ids"]
+                              if chunk_id not in live_ids))
+
+
+def recorded_pages(pages: Dict[int, Dict[str, Any]]) -> Dict[str, List[int]]:
+    """{chunk_id: pages recording it, in order}: the pages a chunk spans and those whose duplicate it keeps"""
+    pages_of = {}
+    for page_num in sorted(pages):
+        for chunk_id in pages[page_num]["chunk_ids"]:
+            pages_of.setdefault(chunk_id, []).append(page_num)
+    return pages_of
+
+
+def chunk_reach(previous: Dict[int, Dict[str, Any]],
+                previous_chunks: Dict[str, Tuple[int, int]]) -> Tuple[Dict[int, int], Dict[int, int]]:
+    """({page_num: first page}, {page_num: last page}) spanned by the chunks on each page.
+
+    If a page changes, the chunks on it are rebuilt from that whole range
+    of pages. Pages whose chunks stay on the page itself are not listed.
+    Manifests without chunk spans fall back to the pages each chunk id is
+    recorded on.
+    """
+    spans = list(previous_chunks.values())
+    if not spans:
+        spans = [(min(pages), max(pages)) for pages in recorded_pages(previous).values()]
+
+    first, last = {}, {}
+    for start, end in spans:
+        if start == end:
+            continue
+        for page_num in range(start, end + 1):
+            first[page_num] = min(first.get(page_num, start), start)
+            last[page_num] = max(last.get(page_num, end), end)
+    return first, last
@@ -0,0 +1,87 @@
+import re
+import logging
+from typing import Optional, Tuple
+
+from src.config import Config
+
+logger = logging.getLogger(__name__)
+
+KNOWN_CITIES = ["pittsburgh", "cleveland", "tulsa", "anaheim", "chicago", "boston", "seattle", "phoenix", "dallas", "houston", "atlanta"]
+
+
+def extract_metadata_with_ai(text_content: str, openai_api_key: str, model: str = "gpt-4o-mini",
+                             base_url: Optional[str] = None) -> Tuple[str, str]:
+    from openai import OpenAI
+    client = OpenAI(api_key=openai_api_key, base_url=base_url)
+    sample_text = text_content[:3000]
+    prompt = f"""Analyze this government budget document and extract:
+1. The city name (just the city name, not \"City of X\")
+2. The fiscal year (in format YYYY-YY or YYYY-YYYY)
+If you can't find this information, respond with \"Unknown\" for that field.
+Document text:
+{sample_text}
+Respond in this exact format:
+City: [city name]
+Fiscal Year: [fiscal year]"""
+    try:
+        response = client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": "You are an expert at extracting information from government documents."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.1,
+            max_tokens=50
+        )
+        result = response.choices[0].message.content
+        city_match = re.search(r'City:\s*(.+)', result)
+        fy_match = re.search(r'Fiscal Year:\s*(.+)', result)
+        city_name = city_match.group(1).strip() if city_match else "Unknown"
+        fiscal_year = fy_match.group(1).strip() if fy_match else "Unknown"
+        return city_name, fiscal_year
+    except Exception as e:
+        logger.error(f"Error extracting metadata with AI: {e}")
+        return "Unknown", "Unknown"
+
+
+def extract_metadata_from_content(text_content: str) -> Tuple[str, str]:
+    city_patterns = [r'City of ([A-Za-z\s]+?)(?:\n|Budget|Fiscal)', r'([A-Za-z\s]+?) City', r'Municipality of ([A-Za-z\s]+)']
+    fiscal_year_patterns = [r'FY\s*(\d{4}[-/]\d{2,4})', r'Fiscal Year\s*(\d{4}[-/]\d{2,4})', r'Budget\s*(\d{4}[-/]\d{2,4})', r'(\d{4}[-/]\d{2,4})\s*Budget']
+    city_name, fiscal_year = "Unknown", "Unknown"
+    for pattern in city_patterns:
+        match = re.search(pattern, text_content[:5000], re.IGNORECASE)
+        if match:
+            city_name = match.group(1).strip()
+            break
+    for pattern in fiscal_year_patterns:
+        match = re.search(pattern, text_content[:5000], re.IGNORECASE)
+        if match:
+            fiscal_year = match.group(1).strip()
+            break
+    return city_name, fiscal_year
+
+
+def detect_document_metadata(text_content: str, file_name: str, config: Config) -> Tuple[str, str]:
+    """City name and fiscal year from the AI, then regexes, then the file name"""
+    city_name, fiscal_year = "Unknown", "Unknown"
+    if hasattr(config, 'OPENAI_API_KEY') and config.OPENAI_API_KEY:
+        city_name, fiscal_year = extract_metadata_with_ai(text_content, config.OPENAI_API_KEY, config.METADATA_EXTRACTION_MODEL,
+                                                          base_url=getattr(config, 'OPENAI_BASE_URL', None))
+    if city_name == "Unknown" or fiscal_year == "Unknown":
+        regex_city, regex_fy = extract_metadata_from_content(text_content)
+        if city_name == "Unknown" and regex_city != "Unknown":
+            city_name = regex_city
+        if fiscal_year == "Unknown" and regex_fy != "Unknown":
+            fiscal_year = regex_fy
+    if city_name == "Unknown" or fiscal_year == "Unknown":
+        filename_clean = file_name.replace('_', ' ').replace('-', ' ')
+        if city_name == "Unknown":
+            for city in KNOWN_CITIES:
+                if city in filename_clean.lower():
+                    city_name = city.title()
+                    break
+        if fiscal_year == "Unknown":
+            year_match = re.search(r'(\d{4})', filename_clean)
+            if year_match:
+                fiscal_year = year_match.group(1)
+    return city_name, fiscal_year
@@ -0,0 +1,127 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Tuple
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+
+class OCREngine:
+    """Rasterize pages straight from the pixmap buffer and OCR them in a thread pool.
+
+    tesseract runs as a subprocess, so threads are enough to keep several
+    pages in flight. Results are cached by the hash of the rendered image,
+    in memory and optionally on disk, so repeated scans are OCR'd once.
+    """
+
+    def __init__(self, dpi: int = 72, workers: int = 4,
+                 cache_dir: Optional[str] = None, memory_cache_size: int = 256):
+        self.dpi = dpi
+        self.workers = max(1, workers)
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.memory_cache_size = memory_cache_size
+        self._memory_cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def __getstate__(self):
+        # Each process builds its own pool and lock
+        state = self.__dict__.copy()
+        state['_executor'] = None
+        state['_lock'] = None
+        state['_memory_cache'] = OrderedDict()
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ocr")
+            return self._executor
+
+    def rasterize(self, page) -> fitz.Pixmap:
+        """Render a page to a grayscale pixmap at the configured DPI"""
+        return page.get_pixmap(dpi=self.dpi, colorspace=fitz.csGRAY, alpha=False)
+
+    @staticmethod
+    def to_image(pix: fitz.Pixmap) -> Image.Image:
+        """Wrap the pixmap's sample buffer as a PIL image without copying or PNG encoding.
+
+        The image borrows the buffer, so ``pix`` must outlive it.
+        """
+        return Image.frombuffer("L", (pix.width, pix.height), pix.samples_mv, "raw", "L", pix.stride, 1)
+
+    def submit(self, page) -> "Future[Tuple[str, float]]":
+        """Rasterize ``page`` now and OCR it in the pool; the future yields (text, seconds).
+
+        Rendering happens in the calling thread because fitz documents must
+        not be shared between threads.
+        """
+        start = time.perf_counter()
+        pix = self.rasterize(page)
+        image_hash = hashlib.sha256(pix.samples_mv).hexdigest()
+        render_seconds = time.perf_counter() - start
+
+        cached = self._cache_get(image_hash)
+        if cached is not None:
+            future = Future()
+            future.set_result((cached, render_seconds))
+            return future
+
+        def run() -> Tuple[str, float]:
+            import pytesseract
+            ocr_start = time.perf_counter()
+            text = pytesseract.image_to_string(self.to_image(pix))
+            self._cache_put(image_hash, text)
+            return text, render_seconds + time.perf_counter() - ocr_start
+
+        return self._get_executor().submit(run)
+
+    def ocr_page(self, page) -> Tuple[str, float]:
+        return self.submit(page).result()
+
+    def _cache_get(self, image_hash: str) -> Optional[str]:
+        with self._lock:
+            if image_hash in self._memory_cache:
+                self._memory_cache.move_to_end(image_hash)
+                return self._memory_cache[image_hash]
+        if self.cache_dir:
+            path = self.cache_dir / f"{image_hash}.txt"
+            if path.exists():
+                text = path.read_text(encoding="utf-8")
+                self._remember(image_hash, text)
+                return text
+        return None
+
+    def _cache_put(self, image_hash: str, text: str) -> None:
+        self._remember(image_hash, text)
+        if self.cache_dir:
+            try:
+                (self.cache_dir / f"{image_hash}.txt").write_text(text, encoding="utf-8")
+            except OSError as e:
+                logger.warning(f"Could not write OCR cache entry: {e}")
+
+    def _remember(self, image_hash: str, text: str) -> None:
+        with self._lock:
+            self._memory_cache[image_hash] = text
+            self._memory_cache.move_to_end(image_hash)
+            while len(self._memory_cache) > self.memory_cache_size:
+                self._memory_cache.popitem(last=False)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
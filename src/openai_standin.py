@@ -0,0 +1,219 @@
+"""Local stand-in for the OpenAI endpoints this project uses.
+
+Serves ``/v1/embeddings`` and ``/v1/chat/completions`` with deterministic
+answers, so the pipeline can be benchmarked and tested without an API key:
+
+- embeddings are hashed bag-of-words vectors (unit length, so texts that
+  share words are close), in float or base64 encoding, of any dimension;
+- chat completions are canned: the metadata prompt gets a "City:/Fiscal Year:"
+  reply, anything else a short answer citing the first source in the context.
+
+Latency, jitter, error rate and rate limits are configurable, to reproduce
+tail latency and 429 handling. Point the clients at it with
+``OPENAI_BASE_URL=http://127.0.0.1:8100/v1``.
+
+    python -m src.openai_standin --port 8100 --latency 0.2 --jitter 0.1 --error-rate 0.02 --rpm 3000
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import random
+import re
+import socket
+import threading
+import time
+from typing import List, Optional, Union
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from src.rate_limiter import TokenBucket
+
+WORD = re.compile(r"\w+")
+NATIVE_DIMENSIONS = {"text-embedding-3-small": 1536, "text-embedding-3-large": 3072, "text-embedding-ada-002": 1536}
+
+
+class EmbeddingRequest(BaseModel):
+    model: str
+    input: Union[str, List[str]]
+    encoding_format: Optional[str] = "float"
+    dimensions: Optional[int] = None
+
+
+class ChatRequest(BaseModel):
+    model: str
+    messages: List[dict]
+    max_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+
+
+def hashed_embedding(text: str, dimensions: int) -> np.ndarray:
+    """Unit float32 vector from feature-hashing the text's words: same text, same vector"""
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for word in WORD.findall(text.lower()):
+        digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+        index = int.from_bytes(digest[:4], "little") % dimensions
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        vector[0] = 1.0
+        return vector
+    return vector / norm
+
+
+def count_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def canned_completion(messages: List[dict]) -> str:
+    prompt = messages[-1].get("content", "") if messages else ""
+    if "Fiscal Year: [fiscal year]" in prompt:
+        city = re.search(r"City of ([A-Z][a-z]+)", prompt)
+        year = re.search(r"(?:FY|Fiscal Year)\s*(\d{4}[-/]\d{2,4})", prompt)
+        return f"City: {city.group(1) if city else 'Unknown'}\nFiscal Year: {year.group(1) if year else 'Unknown'}"
+    source = re.search(r"\[Source: ([^\]]+)\]", prompt)
+    cited = f" ({source.group(1)})" if source else ""
+    return f"Based on the provided context{cited}, this is a stand-in answer."
+
+
+def create_app(latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+               requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None,
+               seed: int = 0) -> FastAPI:
+    """Build the stand-in app.
+
+    Each response waits ``latency`` seconds plus an exponentially distributed
+    extra with mean ``jitter`` (a long tail, like the real API). A share
+    ``error_rate`` of requests fail with a 500. Requests over the rate limits
+    get a 429 with a Retry-After header.
+    """
+    app = FastAPI(title="OpenAI stand-in")
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+    requests_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+    tokens_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+    app.state.counters = {"requests": 0, "errors": 0, "rate_limited": 0}
+
+    def error(status: int, message: str, kind: str, retry_after: Optional[float] = None):
+        headers = {"retry-after": f"{retry_after:.3f}"} if retry_after else None
+        return JSONResponse({"error": {"message": message, "type": kind, "code": None}},
+                            status_code=status, headers=headers)
+
+    async def gate(tokens: int):
+        """Simulated network and queueing: None to go ahead, or the error response"""
+        app.state.counters["requests"] += 1
+        for bucket, amount in ((requests_bucket, 1), (tokens_bucket, tokens)):
+            wait = bucket.try_take(amount) if bucket else 0.0
+            if wait:
+                app.state.counters["rate_limited"] += 1
+                return error(429, "Rate limit reached", "requests", retry_after=wait)
+        with rng_lock:
+            delay = latency + (rng.expovariate(1 / jitter) if jitter else 0.0)
+            fail = rng.random() < error_rate
+        await asyncio.sleep(delay)
+        if fail:
+            app.state.counters["errors"] += 1
+            return error(500, "The server had an error while processing your request", "server_error")
+        return None
+
+    @app.post("/v1/embeddings")
+    async def embeddings(body: EmbeddingRequest):
+        texts = [body.input] if isinstance(body.input, str) else body.input
+        tokens = sum(count_tokens(text) for text in texts)
+        failure = await gate(tokens)
+        if failure:
+            return failure
+        dimensions = body.dimensions or NATIVE_DIMENSIONS.get(body.model, 1536)
+        data = []
+        for index, text in enumerate(texts):
+            vector = hashed_embedding(text, dimensions)
+            embedding = (base64.b64encode(vector.tobytes()).decode()
+                         if body.encoding_format == "base64" else vector.tolist())
+            data.append({"object": "embedding", "index": index, "embedding": embedding})
+        return {"object": "list", "data": data, "model": body.model,
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens}}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(body: ChatRequest):
+        prompt_tokens = sum(count_tokens(str(message.get("content", ""))) for message in body.messages)
+        failure = await gate(prompt_tokens + (body.max_tokens or 0))
+        if failure:
+            return failure
+        content = canned_completion(body.messages)
+        completion_tokens = count_tokens(content)
+        return {
+            "id": f"chatcmpl-standin-{app.state.counters['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                         "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens}
+        }
+
+    @app.get("/v1/stats")
+    async def stats(request: Request):
+        return request.app.state.counters
+
+    return app
+
+
+class StandInServer:
+    """Run the stand-in on a free local port in a background thread.
+
+        with StandInServer(latency=0.05) as server:
+            client = OpenAI(api_key="test", base_url=server.base_url)
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, **app_options):
+        import uvicorn
+        if not port:
+            with socket.socket() as sock:
+                sock.bind((host, 0))
+                port = sock.getsockname()[1]
+        self.app = create_app(**app_options)
+        self.base_url = f"http://{host}:{port}/v1"
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host=host, port=port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, name="openai-standin", daemon=True)
+
+    def __enter__(self) -> "StandInServer":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("OpenAI stand-in server did not start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
+
+    @property
+    def counters(self):
+        return self.app.state.counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=0.0, help="Base seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Mean of the exponential extra delay")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 500")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute, 0 for no limit")
+    parser.add_argument("--tpm", type=int, default=0, help="Tokens per minute, 0 for no limit")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import uvicorn
+    app = create_app(args.latency, args.jitter, args.error_rate, args.rpm or None, args.tpm or None, args.seed)
+    print(f"Serving on http://{args.host}:{args.port}/v1, set OPENAI_BASE_URL to point the clients here")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,79 +1,309 @@
 import fitz  # PyMuPDF
-import pytesseract
-from pdf2image import convert_from_path
-import camelot
-from PIL import Image
-import io
+import re
+import os
+import tempfile
 import logging
-from typing import List, Dict, Any
+import math
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 from pathlib import Path
+from src.extraction_cache import ExtractionCache
+from src.ocr_engine import OCREngine
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+TABLE_MODES = ("document", "page")
+TABLE_DETECTION_MODES = ("off", "heuristic", "always")
+
+NUMERIC_WORD = re.compile(r'^[(\-]?\$?[\d,]+(\.\d+)?%?\)?$')
+
 
 class PDFProcessor:
-    def __init__(self):
+    def __init__(self, table_mode: str = "document", workers: int = 1,
+                 ocr_dpi: int = 72, table_flavor: str = "stream",
+                 cache: Optional[ExtractionCache] = None,
+                 ocr_engine: Optional[OCREngine] = None,
+                 table_detection: str = "always"):
+        if table_mode not in TABLE_MODES:
+            raise ValueError(f"Unknown table_mode '{table_mode}', expected one of {TABLE_MODES}")
+        if table_detection not in TABLE_DETECTION_MODES:
+            raise ValueError(f"Unknown table_detection '{table_detection}', expected one of {TABLE_DETECTION_MODES}")
         self.min_text_length = 50  # Minimum text length to avoid OCR
+        self.table_mode = table_mode  # "document": one pass over the file, "page": camelot per page
+        self.workers = max(1, workers)  # Processes used to extract pages in parallel
+        self.ocr_engine = ocr_engine or OCREngine(dpi=ocr_dpi)
+        self.ocr_dpi = self.ocr_engine.dpi
+        self.table_flavor = table_flavor  # camelot flavor, "stream" or "lattice"
+        # "always": camelot on every page, "heuristic": only pages that look tabular, "off": no tables
+        self.table_detection = table_detection
+        self.cache = cache
+
+    def __getstate__(self):
+        # Worker processes never touch the cache, and its lock can't be pickled
+        state = self.__dict__.copy()
+        state['cache'] = None
+        return state
+
+    def cache_settings(self) -> Dict[str, Any]:
+        """Extractor settings that change the output, part of the cache key"""
+        return {
+            'min_text_length': self.min_text_length,
+            'ocr_dpi': self.ocr_dpi,
+            'table_flavor': self.table_flavor,
+            'table_detection': self.table_detection
+        }
         
     def extract_text_from_pdf(self, pdf_path: str) -> List[Dict[str, Any]]:
         """Extract text from PDF with OCR fallback"""
+        extracted_content = []
+        for pages in self.iter_pages(pdf_path):
+            extracted_content.extend(pages)
+
+        print(f"[pdf_processor] Extracted {len(extracted_content)} pages from {Path(pdf_path).name}")
+        return extracted_content
+
+    def extract_preview_text(self, pdf_path: str, max_pages: int = 5) -> str:
+        """Text of the first pages only, for metadata detection: no tables, OCR only if a page has no text"""
+        texts = []
+        with fitz.open(pdf_path) as doc:
+            for page in doc.pages(0, min(max_pages, len(doc))):
+                text = page.get_text()
+                if len(text.strip()) < self.min_text_length:
+                    text = self._ocr_page(page)
+                if text:
+                    texts.append(text + "\n")
+        return "".join(texts)
+
+    def page_count(self, pdf_path: str) -> int:
+        with fitz.open(pdf_path) as doc:
+            return len(doc)
+
+    def iter_pages(self, pdf_path: str, batch_size: int = 16) -> Iterator[List[Dict[str, Any]]]:
+        """Yield extracted pages in page order, at most ``batch_size`` pages at a time"""
         pdf_path = Path(pdf_path)
         if not pdf_path.exists():
             raise FileNotFoundError(f"PDF not found: {pdf_path}")
-            
+
+        if self.cache is None:
+            yield from self._iter_extracted(pdf_path, batch_size)
+            return
+
+        cache_key = self.cache.make_key(str(pdf_path), self.cache_settings())
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            for start in range(0, len(cached), batch_size):
+                yield cached[start:start + batch_size]
+            return
+
+        extracted_content = []
+        for pages in self._iter_extracted(pdf_path, batch_size):
+            extracted_content.extend(pages)
+            yield pages
+        self.cache.put(cache_key, extracted_content)
+
+    def _iter_extracted(self, pdf_path: Path, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+        """Extract the document page range by page range"""
+        with fitz.open(pdf_path) as doc:
+            page_count = len(doc)
+
+        if self.workers > 1 and page_count > 1:
+            # A few ranges per worker so one slow (OCR heavy) range doesn't leave the others idle
+            batch_size = min(batch_size, math.ceil(page_count / (self.workers * 4)))
+        page_ranges = [list(range(start, min(start + batch_size, page_count + 1)))
+                       for start in range(1, page_count + 1, batch_size)]
+
+        if self.workers > 1 and len(page_ranges) > 1:
+            yield from self._iter_parallel(pdf_path, page_ranges)
+        else:
+            for page_numbers in page_ranges:
+                yield self._extract_pages(pdf_path, page_numbers)
+
+    def _iter_parallel(self, pdf_path: Path, page_ranges: List[List[int]]) -> Iterator[List[Dict[str, Any]]]:
+        """Extract page ranges in a process pool, yielding them in page order"""
+        logger.info(f"Extracting {len(page_ranges)} page ranges with {self.workers} workers")
+
+        # Keep a bounded number of ranges in flight so a slow consumer doesn't
+        # leave the whole document sitting in finished futures
+        pending = deque()
+        ranges = iter(page_ranges)
+        # Spawned rather than forked: this runs in a pipeline thread next to the
+        # OCR/embedding pools and API threads, and a fork copies whatever locks
+        # they hold (logging, the sqlite cache) into the children
+        mp_context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=mp_context) as executor:
+            for page_numbers in islice(ranges, self.workers * 2):
+                pending.append(executor.submit(_extract_pages_worker, self, str(pdf_path), page_numbers))
+            while pending:
+                pages = pending.popleft().result()
+                for page_numbers in islice(ranges, 1):
+                    pending.append(executor.submit(_extract_pages_worker, self, str(pdf_path), page_numbers))
+                yield pages
+
+    def _extract_pages(self, pdf_path: Path, page_numbers: Iterable[int]) -> List[Dict[str, Any]]:
+        """Extract text and tables for the given 1-based page numbers"""
         doc = fitz.open(pdf_path)
         extracted_content = []
+        ocr_jobs = []
         
-        for page_num in range(len(doc)):
-            logger.info(f"Processing page {page_num + 1}/{len(doc)}")
-            page = doc[page_num]
+        for page_num in page_numbers:
+            logger.info(f"Processing page {page_num}/{len(doc)}")
+            page = doc[page_num - 1]
             
             # Try direct text extraction
             text = page.get_text()
             
-            # If text is too short, use OCR
+            # If text is too short, use OCR. The page is rendered here and
+            # recognized in the OCR pool while the following pages are processed
             if len(text.strip()) < self.min_text_length:
-                logger.info(f"Using OCR for page {page_num + 1}")
-                text = self._ocr_page(page)
+                logger.info(f"Using OCR for page {page_num}")
+                ocr_jobs.append((len(extracted_content), self.ocr_engine.submit(page)))
             
-            # Extract tables
-            tables = self._extract_tables(str(pdf_path), page_num + 1)
+            # Extract tables (per page only in legacy mode, see below)
+            tables = []
+            table_scan = self._table_scan(page)
+            if table_scan == "extracted" and self.table_mode == "page":
+                tables = self._extract_tables(str(pdf_path), page_num)
             
             extracted_content.append({
-                'page_num': page_num + 1,
+                'page_num': page_num,
                 'text': text,
-                'tables': tables
+                'tables': tables,
+                'table_scan': table_scan,
+                'ocr_seconds': None
             })
+
+        if self.table_mode == "document":
+            # Tables for every page come out of a single parse of the document
+            page_tables = self._extract_tables_bulk(
+                doc, [page['page_num'] for page in extracted_content if page['table_scan'] == "extracted"])
+            for page in extracted_content:
+                page['tables'] = page_tables.get(page['page_num'], [])
+
+        for index, ocr_job in ocr_jobs:
+            text, seconds = ocr_job.result()
+            extracted_content[index]['text'] = text
+            extracted_content[index]['ocr_seconds'] = round(seconds, 3)
         
         doc.close()
-        print(f"[pdf_processor] Extracted {len(extracted_content)} pages from {pdf_path.name}")
         return extracted_content
     
+    def _table_scan(self, page) -> str:
+        """Decide whether camelot should look at a page: "extracted", "skipped" or "off" """
+        if self.table_detection == "off":
+            return "off"
+        if self.table_detection == "always" or self._is_table_candidate(page):
+            return "extracted"
+        return "skipped"
+
+    def _is_table_candidate(self, page) -> bool:
+        """Cheap layout check for pages that may hold a table.
+
+        Uses the word geometry PyMuPDF already has: rows of words, how many
+        x positions line up across rows, how much of the page is numbers,
+        and ruling lines drawn on the page.
+        """
+        words = page.get_text("words")
+        if len(words) < 6:
+            # Too little text layer for camelot's stream parser to find anything
+            return False
+
+        # Group words into rows by their vertical middle
+        rows = {}
+        for x0, y0, x1, y1, word, *_ in words:
+            rows.setdefault(round((y0 + y1) / 4), []).append((x0, x1, word))
+        multi_cell_rows = [row for row in rows.values() if len(row) >= 3]
+
+        # Column edges that repeat across rows; numbers are usually right aligned
+        edge_rows = {}
+        for row_key, row in rows.items():
+            for x0, x1, word in row:
+                edge_rows.setdefault(("left", round(x0 / 4)), set()).add(row_key)
+                if NUMERIC_WORD.match(word):
+                    edge_rows.setdefault(("right", round(x1 / 4)), set()).add(row_key)
+        min_rows = max(3, len(multi_cell_rows) // 3)
+        aligned_columns = sum(1 for row_keys in edge_rows.values() if len(row_keys) >= min_rows)
+
+        numeric_ratio = sum(1 for word in words if NUMERIC_WORD.match(word[4])) / len(words)
+
+        ruling_lines = 0
+        for drawing in page.get_drawings():
+            for item in drawing["items"]:
+                if item[0] == "l" and (abs(item[1].x - item[2].x) < 1 or abs(item[1].y - item[2].y) < 1):
+                    ruling_lines += 1
+                elif item[0] == "re" and min(item[1].width, item[1].height) < 2:
+                    ruling_lines += 1
+
+        if ruling_lines >= 4 and len(multi_cell_rows) >= 2:
+            return True
+        if aligned_columns >= 3 and len(multi_cell_rows) >= 3 and numeric_ratio >= 0.1:
+            return True
+        return numeric_ratio >= 0.3 and len(multi_cell_rows) >= 3
+
     def _ocr_page(self, page) -> str:
         """OCR a single page"""
-        pix = page.get_pixmap()
-        img = Image.open(io.BytesIO(pix.pil_tobytes(format="PNG")))
-        text = pytesseract.image_to_string(img)
+        text, _ = self.ocr_engine.ocr_page(page)
         return text
     
     def _extract_tables(self, pdf_path: str, page_num: int) -> List[str]:
         """Extract tables from a specific page"""
         try:
-            tables = camelot.read_pdf(
-                pdf_path, 
-                pages=str(page_num), 
-                flavor='stream',
-                suppress_warnings=True
-            )
-            return [table.df.to_string() for table in tables]
+            return self._read_tables(pdf_path, str(page_num))
         except Exception as e:
             logger.warning(f"Table extraction failed for page {page_num}: {e}")
             return []
 
+    def _read_tables(self, pdf_path: str, pages: str) -> List[str]:
+        """Run camelot over the given pages and render each table as text"""
+        import camelot  # Pulls in OpenCV and pdfminer, only load it when tables are wanted
+        tables = camelot.read_pdf(
+            pdf_path, 
+            pages=pages, 
+            flavor=self.table_flavor,
+            suppress_warnings=True
+        )
+        return [table.df.to_string() for table in tables]
+
+    def _extract_tables_bulk(self, doc, page_numbers: Optional[Iterable[int]] = None) -> Dict[int, List[str]]:
+        """Extract tables for many pages from an already opened document.
+
+        camelot re-reads the whole file for every ``read_pdf`` call, so instead
+        each requested page is copied once into a one-page PDF and camelot only
+        ever parses that small file. Returns a mapping of page number to tables.
+        """
+        if page_numbers is None:
+            page_numbers = range(1, len(doc) + 1)
+
+        page_tables = {}
+        with tempfile.TemporaryDirectory(prefix="tables_") as tmp_dir:
+            for page_num in page_numbers:
+                page_file = os.path.join(tmp_dir, f"page-{page_num}.pdf")
+                try:
+                    single = fitz.open()
+                    single.insert_pdf(doc, from_page=page_num - 1, to_page=page_num - 1)
+                    single.save(page_file)
+                    single.close()
+                    page_tables[page_num] = self._read_tables(page_file, "1")
+                except Exception as e:
+                    logger.warning(f"Table extraction failed for page {page_num}: {e}")
+                    page_tables[page_num] = []
+                finally:
+                    if os.path.exists(page_file):
+                        os.remove(page_file)
+
+        return page_tables
+
+
+def _extract_pages_worker(processor: PDFProcessor, pdf_path: str, page_numbers: List[int]) -> List[Dict[str, Any]]:
+    """Process pool entry point: each worker opens its own fitz document"""
+    return processor._extract_pages(Path(pdf_path), page_numbers)
+
 
 # Example usage
 if __name__ == "__main__":
     processor = PDFProcessor()
     content = processor.extract_text_from_pdf("data/pdfs/sample_budget.pdf")
-    print(f"Extracted {len(content)} pages")
\ No newline at end of file
+    print(f"Extracted {len(content)} pages")
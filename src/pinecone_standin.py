@@ -0,0 +1,168 @@
+"""In-process stand-in for a Pinecone index, for tests and benchmarks.
+
+Implements the data-plane calls PineconeVectorStore makes (upsert, query,
+fetch, delete, update, describe_index_stats) with the same arguments and
+result shapes as the Pinecone client's ``Index``, over exact cosine search
+in numpy. Queries scan the whole namespace and evaluate metadata filters
+per vector, so filtered and namespaced searches cost what their data size
+says; ``latency`` adds a fixed round trip to every call. With ``delete_lag``
+deletes only take effect that many seconds later, like Pinecone's eventual
+consistency: until then deleted vectors still match queries and fetches.
+
+    index = StandInIndex(dimension=1536, latency=0.02)
+    store = PineconeVectorStore(index=index, namespaces=True)
+"""
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def matches_filter(metadata: Dict[str, Any], condition: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate the subset of Pinecone's filter language we use: $and, $or, $eq, $ne, $in and plain values"""
+    if not condition:
+        return True
+    for key, value in condition.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, part) for part in value):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, part) for part in value):
+                return False
+        elif isinstance(value, dict):
+            for operator, operand in value.items():
+                field = metadata.get(key)
+                if operator == "$eq" and field != operand:
+                    return False
+                if operator == "$ne" and field == operand:
+                    return False
+                if operator == "$in" and field not in operand:
+                    return False
+        elif metadata.get(key) != value:
+            return False
+    return True
+
+
+class _Namespace:
+    def __init__(self):
+        self.ids: List[str] = []
+        self.values: List[np.ndarray] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self.rows: Dict[str, int] = {}
+
+
+class StandInIndex:
+    def __init__(self, dimension: int = 1536, latency: float = 0.0, delete_lag: float = 0.0):
+        self.dimension = dimension
+        self.latency = latency
+        self.delete_lag = delete_lag
+        self.calls = {"upsert": 0, "query": 0, "fetch": 0, "delete": 0, "update": 0}
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._pending_deletes: List[Tuple[float, str, Optional[List[str]], bool]] = []
+        self._lock = threading.Lock()
+
+    def _call(self, name: str) -> None:
+        with self._lock:
+            self.calls[name] += 1
+            self._apply_due_deletes()
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _apply_due_deletes(self) -> None:
+        now = time.monotonic()
+        due = [pending for pending in self._pending_deletes if pending[0] <= now]
+        self._pending_deletes = [pending for pending in self._pending_deletes if pending[0] > now]
+        for _, namespace, ids, delete_all in due:
+            self._delete(namespace, ids, delete_all)
+
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: str = "") -> Dict[str, int]:
+        self._call("upsert")
+        with self._lock:
+            space = self._namespaces.setdefault(namespace, _Namespace())
+            for vector in vectors:
+                values = np.asarray(vector["values"], dtype=np.float32)
+                if values.shape != (self.dimension,):
+                    raise ValueError(f"Vector dimension {values.shape[0]} does not match the index ({self.dimension})")
+                row = space.rows.get(vector["id"])
+                if row is None:
+                    space.rows[vector["id"]] = len(space.ids)
+                    space.ids.append(vector["id"])
+                    space.values.append(values)
+                    space.metadata.append(dict(vector.get("metadata") or {}))
+                else:
+                    space.values[row] = values
+                    space.metadata[row] = dict(vector.get("metadata") or {})
+        return {"upserted_count": len(vectors)}
+
+    def query(self, vector, top_k: int = 10, include_metadata: bool = False, include_values: bool = False,
+              filter: Optional[Dict[str, Any]] = None, namespace: str = ""):
+        self._call("query")
+        with self._lock:
+            space = self._namespaces.get(namespace)
+            if space is None or not space.ids:
+                return SimpleNamespace(matches=[], namespace=namespace)
+            rows = [row for row, metadata in enumerate(space.metadata) if matches_filter(metadata, filter)]
+            if not rows:
+                return SimpleNamespace(matches=[], namespace=namespace)
+            matrix = np.stack([space.values[row] for row in rows])
+            query = np.asarray(vector, dtype=np.float32)
+            scores = (matrix @ query) / (np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1.0) + 1e-12)
+            order = np.argsort(-scores)[:top_k]
+            matches = [SimpleNamespace(
+                id=space.ids[rows[i]],
+                score=float(scores[i]),
+                values=space.values[rows[i]].tolist() if include_values else [],
+                metadata=dict(space.metadata[rows[i]]) if include_metadata else None
+            ) for i in order]
+        return SimpleNamespace(matches=matches, namespace=namespace)
+
+    def fetch(self, ids: List[str], namespace: str = ""):
+        self._call("fetch")
+        with self._lock:
+            space = self._namespaces.get(namespace) or _Namespace()
+            vectors = {chunk_id: SimpleNamespace(id=chunk_id, values=space.values[space.rows[chunk_id]].tolist(),
+                                                 metadata=dict(space.metadata[space.rows[chunk_id]]))
+                       for chunk_id in ids if chunk_id in space.rows}
+        return SimpleNamespace(vectors=vectors, namespace=namespace)
+
+    def delete(self, ids: Optional[List[str]] = None, delete_all: bool = False, namespace: str = "") -> Dict:
+        self._call("delete")
+        with self._lock:
+            if self.delete_lag:
+                self._pending_deletes.append((time.monotonic() + self.delete_lag, namespace, ids, delete_all))
+            else:
+                self._delete(namespace, ids, delete_all)
+        return {}
+
+    def _delete(self, namespace: str, ids: Optional[List[str]], delete_all: bool) -> None:
+        space = self._namespaces.get(namespace)
+        if space is None:
+            return
+        if delete_all:
+            del self._namespaces[namespace]
+            return
+        doomed = set(ids or [])
+        keep = [row for row, chunk_id in enumerate(space.ids) if chunk_id not in doomed]
+        fresh = _Namespace()
+        fresh.ids = [space.ids[row] for row in keep]
+        fresh.values = [space.values[row] for row in keep]
+        fresh.metadata = [space.metadata[row] for row in keep]
+        fresh.rows = {chunk_id: row for row, chunk_id in enumerate(fresh.ids)}
+        self._namespaces[namespace] = fresh
+
+    def update(self, id: str, set_metadata: Optional[Dict[str, Any]] = None, namespace: str = "") -> Dict:
+        self._call("update")
+        with self._lock:
+            space = self._namespaces.get(namespace)
+            if space is not None and id in space.rows and set_metadata:
+                space.metadata[space.rows[id]].update(set_metadata)
+        return {}
+
+    def describe_index_stats(self):
+        with self._lock:
+            self._apply_due_deletes()
+            namespaces = {name: {"vector_count": len(space.ids)} for name, space in self._namespaces.items()}
+        return SimpleNamespace(dimension=self.dimension, namespaces=namespaces,
+                               total_vector_count=sum(n["vector_count"] for n in namespaces.values()))
@@ -0,0 +1,77 @@
+import logging
+import queue
+import threading
+from typing import Iterable, Iterator, List, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+class _StageError:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def threaded_stage(iterable: Iterable[T], queue_depth: int = 2, name: str = "stage") -> Iterator[T]:
+    """Run ``iterable`` in a background thread, handing items over through a bounded queue.
+
+    Chaining these lets every stage of a generator pipeline work at the same
+    time while at most ``queue_depth`` items wait between two stages. Errors
+    raised in the stage are re-raised in the consumer, and closing the
+    consumer stops the stage.
+    """
+    items = queue.Queue(maxsize=max(1, queue_depth))
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(_StageError(e))
+        finally:
+            # Stops upstream stages too when this one is abandoned early
+            close = getattr(iterable, "close", None)
+            if close:
+                close()
+
+    thread = threading.Thread(target=run, name=f"pipeline-{name}", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                break
+            if isinstance(item, _StageError):
+                logger.error(f"Pipeline stage '{name}' failed: {item.error}")
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+def rebatch(batches: Iterable[List[T]], batch_size: int) -> Iterator[List[T]]:
+    """Regroup a stream of lists into lists of exactly ``batch_size`` (the last may be shorter)"""
+    buffer = []
+    for batch in batches:
+        buffer.extend(batch)
+        while len(buffer) >= batch_size:
+            yield buffer[:batch_size]
+            buffer = buffer[batch_size:]
+    if buffer:
+        yield buffer
@@ -0,0 +1,87 @@
+"""Compressed copies of embedding matrices for approximate scoring.
+
+Both schemes score unit-length rows against a query by inner product:
+
+- ``int8``: every row scaled by its largest absolute value into int8,
+  4x smaller than float32;
+- ``pq`` (product quantization): rows cut into ``subvectors`` slices, each
+  slice replaced by the id of its nearest of 256 centroids learned with
+  k-means, one byte per slice (1536-d in 96 bytes, 64x smaller).
+
+Approximate scores only pick candidates; NumpyVectorStore re-scores those
+from the full-precision matrix.
+"""
+from typing import Tuple
+
+import numpy as np
+
+QUANTIZATION_MODES = ("none", "int8", "pq")
+_BLOCK_ROWS = 4096  # Rows converted to float32 at a time while scoring int8 codes
+
+
+def int8_quantize(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (int8 codes, float32 per-row scales) with row ~= codes * scale"""
+    scales = np.abs(matrix).max(axis=1).astype(np.float32) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.rint(matrix / scales[:, None]).astype(np.int8)
+    return codes, scales
+
+
+def int8_scores(codes: np.ndarray, scales: np.ndarray, query: np.ndarray) -> np.ndarray:
+    scores = np.empty(len(codes), dtype=np.float32)
+    for start in range(0, len(codes), _BLOCK_ROWS):
+        block = codes[start:start + _BLOCK_ROWS].astype(np.float32)
+        scores[start:start + _BLOCK_ROWS] = block @ query
+    return scores * scales
+
+
+def default_subvectors(dimensions: int) -> int:
+    """Largest divisor of ``dimensions`` up to dimensions / 16, so slices are at least 16-d"""
+    for subvectors in range(max(1, dimensions // 16), 0, -1):
+        if dimensions % subvectors == 0:
+            return subvectors
+    return 1
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    # argmin of ||v - c||^2 = ||c||^2 - 2 v.c (||v||^2 is the same for every c)
+    return np.argmin((centroids * centroids).sum(axis=1) - 2 * vectors @ centroids.T, axis=1)
+
+
+def train_pq(matrix: np.ndarray, subvectors: int, centroids: int = 256, iterations: int = 12,
+             seed: int = 0) -> np.ndarray:
+    """k-means codebooks of shape (subvectors, centroids, dimensions / subvectors)"""
+    rows, dimensions = matrix.shape
+    if dimensions % subvectors:
+        raise ValueError(f"{dimensions} dimensions can't be cut into {subvectors} subvectors")
+    width = dimensions // subvectors
+    centroids = min(centroids, rows)  # A small document can't fill 256 centroids
+    rng = np.random.default_rng(seed)
+    codebooks = np.empty((subvectors, centroids, width), dtype=np.float32)
+    for j in range(subvectors):
+        part = np.ascontiguousarray(matrix[:, j * width:(j + 1) * width], dtype=np.float32)
+        book = part[rng.choice(rows, centroids, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = _nearest(part, book)
+            counts = np.bincount(assignment, minlength=centroids)
+            sums = np.zeros_like(book)
+            np.add.at(sums, assignment, part)
+            filled = counts > 0
+            book[filled] = sums[filled] / counts[filled, None]
+        codebooks[j] = book
+    return codebooks
+
+
+def pq_encode(matrix: np.ndarray, codebooks: np.ndarray) -> np.ndarray:
+    subvectors, _, width = codebooks.shape
+    codes = np.empty((len(matrix), subvectors), dtype=np.uint8)
+    for j in range(subvectors):
+        codes[:, j] = _nearest(np.asarray(matrix[:, j * width:(j + 1) * width], dtype=np.float32), codebooks[j])
+    return codes
+
+
+def pq_scores(codes: np.ndarray, codebooks: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Inner products from a (subvectors, centroids) table of query-slice x centroid products"""
+    subvectors, _, width = codebooks.shape
+    table = np.einsum("jkw,jw->jk", codebooks, query.reshape(subvectors, width))
+    return table[np.arange(subvectors), codes].sum(axis=1)
@@ -1,20 +1,48 @@
-from openai import OpenAI
 import redis
 import json
 import hashlib
 from typing import List, Dict, Any, Optional
 import logging
 from datetime import datetime
+from src.lexical_index import LexicalIndex, is_lexical_query, reciprocal_rank_fusion
 
 logger = logging.getLogger(__name__)
 
+# "auto": lexical only for code/amount lookups, else fusion of lexical and vector results
+RETRIEVAL_MODES = ("auto", "vector", "lexical", "hybrid")
+
+
+def page_label(metadata: Dict[str, Any]) -> str:
+    """Page a chunk comes from, as "12" or "12-13" when it spans pages"""
+    page_start = metadata.get('page_start', metadata['page_number'])
+    page_end = metadata.get('page_end', page_start)
+    return f"{page_start}-{page_end}" if page_end != page_start else str(page_start)
+
+
+def source_pages(metadata: Dict[str, Any]) -> List[int]:
+    """Every page a chunk's text was found on, including repeats merged into it at ingest"""
+    if metadata.get('source_pages'):
+        return [int(page) for page in str(metadata['source_pages']).split(",")]
+    page_start = metadata.get('page_start', metadata['page_number'])
+    return list(range(page_start, metadata.get('page_end', page_start) + 1))
+
+
 class QueryEngine:
-    def __init__(self, openai_api_key: str, vector_store, embedding_generator, redis_config: Optional[Dict] = None, llm_model: str = "gpt-4o-mini"):
-        self.llm_client = OpenAI(api_key=openai_api_key)
+    """Answers questions about one document per call; safe to share between threads"""
+
+    def __init__(self, openai_api_key: str, vector_store, embedding_generator, redis_config: Optional[Dict] = None, llm_model: str = "gpt-4o-mini",
+                 base_url: Optional[str] = None, lexical_index: Optional[LexicalIndex] = None,
+                 retrieval_mode: str = "auto"):
+        if retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"retrieval_mode must be one of {RETRIEVAL_MODES}, got {retrieval_mode!r}")
+        from openai import OpenAI  # The client library is slow to import, load it with the engine
+        self.llm_client = OpenAI(api_key=openai_api_key, base_url=base_url)
         self.vector_store = vector_store
         self.embedding_generator = embedding_generator
         self.redis_client = redis.Redis(**redis_config) if redis_config else None
         self.llm_model = llm_model
+        self.lexical_index = lexical_index
+        self.retrieval_mode = retrieval_mode if lexical_index else "vector"
 
     def answer_query(self, query: str, document_id: Optional[str] = None, use_cache: bool = True) -> Dict[str, Any]:
         """
@@ -32,14 +60,8 @@ class QueryEngine:
             logger.error("No document_id provided for query")
             raise ValueError("No document_id provided for query")
             
-        # Set the active document for the vector store
-        logger.info(f"Setting active document_id for query: {document_id}")
-        self.vector_store.set_active_document_id(document_id)
-        
-        # Verify the active document was set correctly
-        active_doc = self.vector_store.get_active_document_id()
-        logger.info(f"Confirmed active document_id: {active_doc}")
-        
+        # The document travels with the request; nothing shared is switched, so
+        # concurrent queries for different documents can't see each other's chunks
         # Check if we have a cached response
         if use_cache and self.redis_client:
             cached = self._check_cache(query, document_id)
@@ -47,14 +69,10 @@ class QueryEngine:
                 logger.info(f"Cache hit for query with document_id: {document_id}")
                 return cached
 
-        # Generate query embedding
-        logger.info("Generating query embedding")
-        query_embedding = self.embedding_generator.generate_query_embedding(query)
-        
         # Retrieve relevant chunks
         logger.info(f"Retrieving relevant chunks for document_id: {document_id}")
-        relevant_chunks = self.vector_store.query(query_embedding, top_k=5)
-        logger.info(f"Retrieved {len(relevant_chunks)} chunks")
+        relevant_chunks, retrieval = self._retrieve(query, document_id, top_k=5)
+        logger.info(f"Retrieved {len(relevant_chunks)} chunks ({retrieval})")
         
         # Log chunk sources for debugging
         for i, chunk in enumerate(relevant_chunks):
@@ -65,6 +83,7 @@ class QueryEngine:
         # Generate answer
         answer = self._generate_answer(query, relevant_chunks)
         response = self._format_response(answer, relevant_chunks)
+        response["metadata"]["retrieval"] = retrieval
 
         # Cache the result if enabled
         if use_cache and self.redis_client:
@@ -72,10 +91,30 @@ class QueryEngine:
             
         return response
 
+    def _retrieve(self, query: str, document_id: str, top_k: int = 5):
+        """Chunks for the query and the way they were found: "lexical", "vector" or "hybrid".
+
+        Lexical-only retrieval needs no query embedding. A lookup query falls
+        through to the other modes when the lexical index has no hits.
+        """
+        mode = self.retrieval_mode
+        lexical = []
+        if mode != "vector":
+            lexical = self.lexical_index.search(document_id, query, top_k=top_k * 2)
+            if lexical and (mode == "lexical" or (mode == "auto" and is_lexical_query(query))):
+                return lexical[:top_k], "lexical"
+
+        logger.info("Generating query embedding")
+        query_embedding = self.embedding_generator.generate_query_embedding(query)
+        if mode == "vector" or not lexical:
+            return self.vector_store.query(query_embedding, top_k=top_k, document_id=document_id), "vector"
+        semantic = self.vector_store.query(query_embedding, top_k=top_k * 2, document_id=document_id)
+        return reciprocal_rank_fusion([semantic, lexical], top_k=top_k), "hybrid"
+
     def _generate_answer(self, query: str, chunks: List[Dict[str, Any]]) -> str:
         """Generate an answer using the LLM based on retrieved chunks"""
         context = "\n\n".join([
-            f"[Source: Page {chunk['metadata']['page_number']}, {chunk['metadata']['file_name']}]\n{chunk['content']}"
+            f"[Source: Page {page_label(chunk['metadata'])}, {chunk['metadata']['file_name']}]\n{chunk['content']}"
             for chunk in chunks
         ])
         if not chunks or len(context.strip()) == 0:
@@ -117,7 +156,11 @@ Answer:"""
         """Format the response with sources and metadata"""
         sources = [{
             "reference": f"[{i+1}]",
-            "page": chunk['metadata']['page_number'],
+            "page": chunk['metadata'].get('page_start', chunk['metadata']['page_number']),
+            "pages": page_label(chunk['metadata']),
+            "page_start": chunk['metadata'].get('page_start', chunk['metadata']['page_number']),
+            "page_end": chunk['metadata'].get('page_end', chunk['metadata']['page_number']),
+            "source_pages": source_pages(chunk['metadata']),
             "document": chunk['metadata']['file_name'],
             "city": chunk['metadata'].get('city_name', 'Unknown'),
             "fiscal_year": chunk['metadata'].get('fiscal_year', 'Unknown'),
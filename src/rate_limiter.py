@@ -0,0 +1,116 @@
+import logging
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {408, 409, 429}
+RETRYABLE_ERRORS = {"APIConnectionError", "APITimeoutError", "Timeout", "ConnectionError"}
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``per_minute / 60`` per second.
+
+    ``reserve`` takes the amount right away and lets the bucket go into
+    debt, returning how long the caller has to wait before it may go. Callers
+    are served in the order they reserve, and a request larger than the
+    bucket still gets through once the debt is paid off.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if per_minute <= 0:
+            raise ValueError("per_minute must be positive")
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1.0) -> float:
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def try_take(self, amount: float = 1.0) -> float:
+        """Take ``amount`` if the bucket holds it and return 0, else take nothing and return the seconds to wait"""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.rate
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute budgets for one API.
+
+    Either budget can be None for no limit. ``burst_seconds`` is how much of
+    the budget may be spent at once; the default allows a full minute's worth.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 burst_seconds: float = 60.0, sleep: Callable[[float], None] = time.sleep,
+                 clock: Callable[[], float] = time.monotonic):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute * burst_seconds / 60,
+                                    clock=clock) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute * burst_seconds / 60,
+                                  clock=clock) if tokens_per_minute else None
+        self._sleep = sleep
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block until a request of ``tokens`` tokens fits both budgets; return the seconds waited"""
+        wait = max(self.requests.reserve(1) if self.requests else 0.0,
+                   self.tokens.reserve(tokens) if self.tokens and tokens else 0.0)
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, timeouts, connection drops and server errors are worth retrying"""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    return type(error).__name__ in RETRYABLE_ERRORS
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds the server asked us to wait, from a Retry-After header"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        value = headers.get("retry-after")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0,
+                  rng: Callable[[float, float], float] = random.uniform) -> float:
+    """Exponential backoff with full jitter: uniform in [0, min(cap, base * 2**attempt)]"""
+    return rng(0, min(cap, base * 2 ** attempt))
+
+
+def call_with_retries(func: Callable[[], object], max_retries: int = 6, base_delay: float = 0.5,
+                      max_delay: float = 30.0, sleep: Callable[[float], None] = time.sleep,
+                      description: str = "request"):
+    """Run ``func``, retrying retryable errors with jittered exponential backoff"""
+    for attempt in range(max_retries + 1):
+        try:
+            return func()
+        except Exception as e:
+            if attempt == max_retries or not is_retryable(e):
+                raise
+            delay = max(backoff_delay(attempt, base_delay, max_delay), retry_after(e) or 0.0)
+            logger.warning(f"{description} failed ({type(e).__name__}: {e}), "
+                           f"retry {attempt + 1}/{max_retries} in {delay:.2f}s")
+            sleep(delay)
@@ -1,19 +1,106 @@
 import re
-import spacy
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 import tiktoken
-from typing import List, Dict, Any
+from bisect import bisect_right
+from itertools import count
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 import hashlib
 from datetime import datetime
+from src.token_chunker import TokenChunker
+from src.chunk import Chunk
 
-nlp = spacy.load("en_core_web_sm")
+
+def content_chunk_id(scope: str, text: str, occurrences: Optional[Dict[str, int]] = None) -> str:
+    """Chunk id from the chunk's text, so an unchanged chunk keeps its id when the document is re-ingested.
+
+    ``scope`` (the document id) keeps equal texts of different documents
+    apart. ``occurrences`` counts the copies of each text seen so far in the
+    document; repeats get their copy number mixed in.
+    """
+    digest = hashlib.sha256(text.encode()).hexdigest()
+    copy = 0
+    if occurrences is not None:
+        copy = occurrences.get(digest, 0)
+        occurrences[digest] = copy + 1
+    return _copy_id(scope, digest, copy)
+
+
+def content_chunk_ids(scope: str, text: str) -> Iterator[str]:
+    """Ids of the first, second, ... copy of ``text`` in a document, numbered as by content_chunk_id"""
+    digest = hashlib.sha256(text.encode()).hexdigest()
+    return (_copy_id(scope, digest, copy) for copy in count())
+
+
+def _copy_id(scope: str, digest: str, copy: int) -> str:
+    return hashlib.sha256(f"{scope}\x00{copy}\x00{digest}".encode()).hexdigest()[:24]
+
+
+CHUNKERS = ("token", "recursive")
+CHUNKING_SCOPES = ("page", "document")
+SEPARATORS = ["\n\n", "\n", ". ", " ", ""]  # "" only matters to the recursive splitter
+
+
+class _PageRun:
+    """Text of consecutive pages waiting to be chunked, and where each page starts in it"""
+
+    def __init__(self):
+        self.text = ""
+        self.page_offsets = []
+        self.page_numbers = []
+        self.last_page = None
+
+    def append(self, page_num: int, text: str) -> None:
+        self.last_page = page_num
+        if not text:
+            return
+        if self.text:
+            # A line break, not a paragraph one, so the chunker doesn't favour page ends as split points
+            self.text += "\n"
+        self.page_offsets.append(len(self.text))
+        self.page_numbers.append(page_num)
+        self.text += text
+
+    def page_at(self, char: int) -> int:
+        return self.page_numbers[bisect_right(self.page_offsets, char) - 1]
+
+    def drop_before(self, char: int) -> None:
+        """Forget the text before ``char``, keeping the pages after it"""
+        first = bisect_right(self.page_offsets, char) - 1
+        self.page_offsets = [0] + [offset - char for offset in self.page_offsets[first + 1:]]
+        self.page_numbers = self.page_numbers[first:]
+        self.text = self.text[char:]
+
+    def clear(self) -> None:
+        self.__init__()
 
 
 class TextProcessor:
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200, chunker: str = "token",
+                 chunking_scope: str = "page"):
+        if chunker not in CHUNKERS:
+            raise ValueError(f"Unknown chunker '{chunker}', expected one of {CHUNKERS}")
+        if chunking_scope not in CHUNKING_SCOPES:
+            raise ValueError(f"Unknown chunking_scope '{chunking_scope}', expected one of {CHUNKING_SCOPES}")
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
+        self.chunker = chunker  # "token": TokenChunker, "recursive": LangChain splitter
+        # "page": every page chunked on its own, "document": text flows across consecutive pages
+        self.chunking_scope = chunking_scope
+        self._encoding = None
+        self._token_chunker = None
+
+    @property
+    def encoding(self):
+        # Loading the BPE ranks is deferred until something is actually tokenized
+        if self._encoding is None:
+            self._encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
+        return self._encoding
+
+    @property
+    def token_chunker(self) -> TokenChunker:
+        if self._token_chunker is None:
+            self._token_chunker = TokenChunker(self.encoding, self.chunk_size, self.chunk_overlap,
+                                               separators=SEPARATORS[:-1])
+        return self._token_chunker
         
     def clean_text(self, text: str) -> str:
         """Clean and normalize text"""
@@ -45,68 +132,156 @@ class TextProcessor:
     
     def chunk_text(self, text: str) -> List[str]:
         """Split text into chunks with overlap"""
+        return [chunk for chunk, _ in self.chunk_text_with_counts(text)]
+
+    def chunk_text_with_counts(self, text: str) -> List[Tuple[str, Optional[int]]]:
+        """Split text into (chunk, token_count) pairs; the count is None if it wasn't computed"""
+        if self.chunker == "token":
+            return self.token_chunker.split_text(text)
+
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
         splitter = RecursiveCharacterTextSplitter(
             chunk_size=self.chunk_size,
             chunk_overlap=self.chunk_overlap,
             length_function=lambda t: len(self.encoding.encode(t)),
-            separators=["\n\n", "\n", ". ", " ", ""]
+            separators=SEPARATORS
         )
         
         chunks = splitter.split_text(text)
-        return chunks
+        return [(chunk, None) for chunk in chunks]
     
+    def chunk_spans(self, text: str) -> List[Tuple[int, int, Optional[int]]]:
+        """Split text into (start_char, end_char, token_count) spans; the count is None if it wasn't computed"""
+        if self.chunker == "token":
+            return self.token_chunker.split_spans(text)
+
+        # The recursive splitter returns stripped substrings of the text, in order
+        spans = []
+        position = 0
+        for chunk, _ in self.chunk_text_with_counts(text):
+            start = text.find(chunk, position)
+            if start == -1:
+                start = position
+            spans.append((start, start + len(chunk), None))
+            position = start + 1
+        return spans
+
+    def page_text(self, page_data: Dict[str, Any]) -> str:
+        """Cleaned text of a page followed by its tables"""
+        # Clean text
+        cleaned_text = self.clean_text(page_data['text'])
+        
+        # Process tables
+        cleaned_tables = [self.process_table(table) for table in page_data['tables']]
+        
+        # Combine text and tables
+        combined_text = cleaned_text
+        if cleaned_tables:
+            combined_text += "\n\n" + "\n\n".join(cleaned_tables)
+        return combined_text
+
     def process_document_content(self, content: List[Dict[str, Any]], 
                                doc_metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Process entire document content"""
-        all_chunks = []
-        
-        for page_data in content:
-            # Clean text
-            cleaned_text = self.clean_text(page_data['text'])
-            
-            # Process tables
-            cleaned_tables = [self.process_table(table) for table in page_data['tables']]
-            
-            # Combine text and tables
-            combined_text = cleaned_text
-            if cleaned_tables:
-                combined_text += "\n\n" + "\n\n".join(cleaned_tables)
-            
-            # Create chunks
-            chunks = self.chunk_text(combined_text)
-            
-            # Create metadata for each chunk
-            for i, chunk in enumerate(chunks):
-                chunk_metadata = self._create_chunk_metadata(
-                    chunk, doc_metadata, page_data['page_num'], i
-                )
-                all_chunks.append(chunk_metadata)
-        
-        return all_chunks
+        return [chunk for chunks in self.iter_document_chunks([content], doc_metadata) for chunk in chunks]
     
+    def iter_document_chunks(self, page_batches: Iterable[List[Dict[str, Any]]],
+                             doc_metadata: Dict[str, Any]) -> Iterator[List[Dict[str, Any]]]:
+        """Chunk a stream of page batches, yielding one list of chunks per batch.
+
+        In "document" scope the last, still growing chunk of a batch is held
+        back and chunked again together with the next batch, so chunks cross
+        page and batch boundaries. Runs only break where page numbers skip
+        (pages left out of an incremental ingest).
+        """
+        if self.chunking_scope == "page":
+            occurrences = {}
+            for pages in page_batches:
+                chunks = [chunk for page_data in pages
+                          for chunk in self._chunk_page(page_data, doc_metadata, occurrences)]
+                if chunks:
+                    yield chunks
+            return
+
+        run = _PageRun()
+        chunk_numbers = {}  # page_start -> chunks emitted so far
+        occurrences = {}  # text hash -> copies emitted so far, keeps chunk ids unique
+        for pages in page_batches:
+            chunks = []
+            for page_data in pages:
+                if run.last_page is not None and page_data['page_num'] != run.last_page + 1:
+                    chunks.extend(self._chunk_run(run, doc_metadata, chunk_numbers, occurrences, final=True))
+                run.append(page_data['page_num'], self.page_text(page_data))
+            chunks.extend(self._chunk_run(run, doc_metadata, chunk_numbers, occurrences, final=False))
+            if chunks:
+                yield chunks
+
+        chunks = self._chunk_run(run, doc_metadata, chunk_numbers, occurrences, final=True)
+        if chunks:
+            yield chunks
+
+    def _chunk_page(self, page_data: Dict[str, Any], doc_metadata: Dict[str, Any],
+                    occurrences: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+        chunks = self.chunk_text_with_counts(self.page_text(page_data))
+        return [self._create_chunk_metadata(chunk, doc_metadata, page_data['page_num'], i, token_count,
+                                            occurrences=occurrences)
+                for i, (chunk, token_count) in enumerate(chunks)]
+
+    def _chunk_run(self, run: _PageRun, doc_metadata: Dict[str, Any], chunk_numbers: Dict[int, int],
+                   occurrences: Dict[str, int], final: bool) -> List[Dict[str, Any]]:
+        """Chunk the text of a page run.
+
+        Unless ``final``, the last span may still grow with the next pages:
+        it is not emitted, and the run keeps the text from where it starts.
+        """
+        spans = self.chunk_spans(run.text) if run.text else []
+        held_back = None
+        if not final and spans:
+            held_back = spans[-1][0]
+            spans = spans[:-1]
+
+        chunks = []
+        for start, end, token_count in spans:
+            page_start, page_end = run.page_at(start), run.page_at(end - 1)
+            chunk_num = chunk_numbers.get(page_start, 0)
+            chunk_numbers[page_start] = chunk_num + 1
+            chunks.append(self._create_chunk_metadata(
+                run.text[start:end], doc_metadata, page_start, chunk_num, token_count, page_end=page_end,
+                occurrences=occurrences))
+
+        if final:
+            run.clear()
+        elif held_back:
+            run.drop_before(held_back)
+        return chunks
+
     def _create_chunk_metadata(self, chunk_text: str, doc_metadata: Dict[str, Any],
-                             page_num: int, chunk_num: int) -> Dict[str, Any]:
+                             page_num: int, chunk_num: int,
+                             token_count: Optional[int] = None,
+                             page_end: Optional[int] = None,
+                             occurrences: Optional[Dict[str, int]] = None) -> Chunk:
         """Create metadata for a chunk"""
-        chunk_id = hashlib.md5(
-            f"{doc_metadata['file_name']}_{page_num}_{chunk_num}".encode()
-        ).hexdigest()[:12]
+        chunk_id = content_chunk_id(doc_metadata.get("document_id") or doc_metadata["file_name"],
+                                    chunk_text, occurrences)
         
-        return {
-            "chunk_id": chunk_id,
-            "text": chunk_text,
-            "metadata": {
+        return Chunk(
+            chunk_id=chunk_id,
+            text=chunk_text,
+            metadata={
                 "city_name": doc_metadata.get("city_name"),
                 "fiscal_year": doc_metadata.get("fiscal_year"),
                 "document_type": "budget",
                 "page_number": page_num,
+                "page_start": page_num,
+                "page_end": page_end if page_end is not None else page_num,
                 "chunk_number": chunk_num,
                 "file_name": doc_metadata["file_name"],
                 "section": self._extract_section(chunk_text),
                 "created_at": datetime.utcnow().isoformat(),
                 "char_count": len(chunk_text),
-                "token_count": len(self.encoding.encode(chunk_text))
+                "token_count": token_count if token_count is not None else len(self.encoding.encode(chunk_text))
             }
-        }
+        )
     
     def _extract_section(self, text: str) -> str:
         """Extract section from text (safe version)"""
@@ -0,0 +1,84 @@
+from bisect import bisect_right
+from typing import List, Sequence, Tuple
+
+DEFAULT_SEPARATORS = ("\n\n", "\n", ". ", " ")
+
+
+class TokenChunker:
+    """Split text on token offsets, encoding it only once.
+
+    The text is tokenized a single time; every chunk then ends at the last
+    separator (tried in order, like RecursiveCharacterTextSplitter) that
+    falls in the second half of a ``chunk_size`` token window, or at the
+    window edge when there is none. Token counts fall out of the offsets, so
+    nothing is re-encoded to measure a chunk.
+    """
+
+    def __init__(self, encoding, chunk_size: int = 1000, chunk_overlap: int = 200,
+                 separators: Sequence[str] = DEFAULT_SEPARATORS):
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = separators
+
+    def split_spans(self, text: str) -> List[Tuple[int, int, int]]:
+        """Return (start_char, end_char, token_count) for each chunk of ``text``"""
+        tokens = self.encoding.encode_ordinary(text)
+        if not tokens:
+            return []
+        _, offsets = self.encoding.decode_with_offsets(tokens)
+        token_count = len(tokens)
+        char_at = offsets + [len(text)]  # char_at[i]: where token i starts
+
+        spans = []
+        start = 0
+        while start < token_count:
+            limit = min(start + self.chunk_size, token_count)
+            end = limit if limit == token_count else self._split_point(text, char_at, start, limit)
+
+            span = self._strip(text, char_at[start], char_at[end])
+            if span:
+                spans.append((*span, end - start))
+            if end >= token_count:
+                break
+            start = self._overlap_start(text, char_at, start, end)
+        return spans
+
+    def split_text(self, text: str) -> List[Tuple[str, int]]:
+        """Return (chunk_text, token_count) pairs"""
+        return [(text[start:end], count) for start, end, count in self.split_spans(text)]
+
+    def _split_point(self, text: str, char_at: List[int], start: int, limit: int) -> int:
+        """Token index to end the chunk at, preferring the strongest separator"""
+        window_start = char_at[start + (limit - start) // 2]
+        window_end = char_at[limit]
+        for separator in self.separators:
+            position = text.rfind(separator, window_start, window_end)
+            if position == -1:
+                continue
+            # End at the last token starting at or before the separator's end:
+            # in cl100k the space after ". " opens the next word's token, and
+            # going past it would pull that word into this chunk
+            end = bisect_right(char_at, position + len(separator), start + 1, limit + 1) - 1
+            if start < end <= limit:
+                return end
+        return limit
+
+    def _overlap_start(self, text: str, char_at: List[int], start: int, end: int) -> int:
+        """Start of the next chunk: ``chunk_overlap`` tokens back, moved to a word boundary"""
+        next_start = max(end - self.chunk_overlap, start + 1)
+        for candidate in range(next_start, end):
+            char = char_at[candidate]
+            if char == 0 or text[char - 1].isspace() or text[char].isspace():
+                return candidate
+        return next_start
+
+    @staticmethod
+    def _strip(text: str, start: int, end: int):
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        return (start, end) if end > start else None
@@ -1,12 +1,35 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Sequence
+import io
+import json
 import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from abc import ABC, abstractmethod
+from pathlib import Path
+import numpy as np
+from src.catalog import DocumentCatalog
+from src.chunk import embedding_list
+from src.quantization import (QUANTIZATION_MODES, default_subvectors, int8_quantize, int8_scores,
+                              pq_encode, pq_scores, train_pq)
 
 logger = logging.getLogger(__name__)
 
 class VectorStore(ABC):
+    """Vectors grouped by document_id.
+
+    Every call takes the document it is about, so one store can serve
+    concurrent requests for different documents. The "active document"
+    (``set_active_document_id``) is a legacy default, used only when a
+    call leaves ``document_id`` out; it is shared by all threads.
+    """
+
     def __init__(self):
         self._active_document_id = None
+        # Set by stores whose vectors outlive the process: which documents are indexed
+        self.catalog: Optional[DocumentCatalog] = None
 
     def set_active_document_id(self, doc_id: str):
         if not doc_id:
@@ -24,34 +47,84 @@ class VectorStore(ABC):
         logger.info("Resetting active document ID")
         self._active_document_id = None
 
+    def _document_id(self, document_id: Optional[str]) -> str:
+        """The document a call is about: the one passed in, else the active one"""
+        return document_id or self.get_active_document_id()
+
+    @abstractmethod
+    def store_embeddings(self, chunks: List[Dict[str, Any]], document_id: Optional[str] = None) -> None:
+        pass
+
     @abstractmethod
-    def store_embeddings(self, chunks: List[Dict[str, Any]]) -> None:
+    def query(self, query_embedding: Sequence[float], top_k: int = 5,
+              document_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Top ``top_k`` chunks of one document"""
         pass
 
     @abstractmethod
-    def query(self, query_embedding: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
+    def delete(self, chunk_ids: List[str], document_id: Optional[str] = None) -> None:
+        """Delete vectors by id; ``document_id``, when given, is the document they belong to"""
+        pass
+
+    @abstractmethod
+    def update_metadata(self, updates: Dict[str, Dict[str, Any]], document_id: Optional[str] = None) -> None:
+        """Merge ``{chunk_id: metadata}`` into the metadata of stored vectors"""
+        pass
+
+    def finish_ingest(self, document_id: str) -> None:
+        """Called once an ingest has written all of a document's changes; for stores with derived indexes"""
         pass
 
 
 class PineconeVectorStore(VectorStore):
-    def __init__(self, api_key: str, environment: str, index_name: str):
+    def __init__(self, api_key: str = None, environment: str = None, index_name: str = None,
+                 dimension: int = 1536, namespaces: bool = False, upsert_workers: int = 4,
+                 upsert_batch_size: int = 100, index=None):
+        """``namespaces`` puts each document's vectors in a namespace named
+        after its document_id, so queries need no metadata filter. Upsert
+        batches go out ``upsert_workers`` at a time. ``index`` is an already
+        open index (or a stand-in), in which case no client is created."""
         super().__init__()
+        self.namespaces = namespaces
+        self.upsert_workers = max(1, upsert_workers)
+        self.upsert_batch_size = upsert_batch_size
+        if index is not None:
+            self.index = index
+            return
         from pinecone import Pinecone, ServerlessSpec
         self.pc = Pinecone(api_key=api_key)
         if index_name not in [index.name for index in self.pc.list_indexes()]:
             logger.info(f"Creating new Pinecone index: {index_name}")
             self.pc.create_index(
                 name=index_name,
-                dimension=1536,
+                dimension=dimension,
                 metric="cosine",
                 spec=ServerlessSpec(cloud="aws", region=environment)
             )
         self.index = self.pc.Index(index_name)
-        logger.info(f"Initialized Pinecone vector store with index: {index_name}")
+        logger.info(f"Initialized Pinecone vector store with index: {index_name}"
+                    f"{' (namespace per document)' if namespaces else ''}")
+
+    def _namespace(self, document_id: Optional[str]) -> str:
+        """Namespace holding a document's vectors; the default namespace unless namespaces are on"""
+        return document_id if self.namespaces and document_id else ""
 
-    def store_embeddings(self, chunks: List[Dict[str, Any]]) -> None:
+    def _upsert(self, vectors: List[Dict[str, Any]], namespace: str) -> None:
+        batches = [vectors[i:i + self.upsert_batch_size] for i in range(0, len(vectors), self.upsert_batch_size)]
+        if len(batches) <= 1 or self.upsert_workers == 1:
+            for batch in batches:
+                self.index.upsert(vectors=batch, namespace=namespace)
+            return
+        with ThreadPoolExecutor(max_workers=min(self.upsert_workers, len(batches)),
+                                thread_name_prefix="pinecone-upsert") as executor:
+            # result() re-raises the first failed batch
+            for future in [executor.submit(self.index.upsert, vectors=batch, namespace=namespace)
+                           for batch in batches]:
+                future.result()
+
+    def store_embeddings(self, chunks: List[Dict[str, Any]], document_id: Optional[str] = None) -> None:
         vectors = []
-        document_id = self.get_active_document_id()
+        document_id = self._document_id(document_id)
         logger.info(f"Storing embeddings for document_id: {document_id}")
 
         for chunk in chunks:
@@ -62,39 +135,39 @@ class PineconeVectorStore(VectorStore):
                 metadata["city_name"] = document_id
                 vectors.append({
                     "id": chunk["chunk_id"],
-                    "values": chunk["embedding"],
+                    "values": embedding_list(chunk["embedding"]),
                     "metadata": metadata
                 })
                 
         logger.info(f"Prepared {len(vectors)} vectors for storage")
-        
-        # Store in batches
-        for i in range(0, len(vectors), 100):
-            batch = vectors[i:i + 100]
-            logger.info(f"Storing batch of {len(batch)} vectors")
-            self.index.upsert(batch)
-            
+        self._upsert(vectors, self._namespace(document_id))
         logger.info(f"Successfully stored {len(vectors)} vectors for document_id: {document_id}")
 
-    def query(self, query_embedding: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
-        document_id = self.get_active_document_id()
+    def query(self, query_embedding: Sequence[float], top_k: int = 5,
+              document_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        document_id = self._document_id(document_id)
         logger.info(f"Querying Pinecone for document_id: {document_id}")
+
+        if self.namespaces:
+            # The namespace already holds only this document
+            filter_condition = None
+        else:
+            # Use both document_id and city_name in filter for robustness
+            filter_condition = {
+                "$or": [
+                    {"document_id": {"$eq": document_id}},
+                    {"city_name": {"$eq": document_id}}
+                ]
+            }
         
-        # Use both document_id and city_name in filter for robustness
-        filter_condition = {
-            "$or": [
-                {"document_id": {"$eq": document_id}},
-                {"city_name": {"$eq": document_id}}
-            ]
-        }
-        
-        logger.info(f"Query filter: {filter_condition}")
+        logger.info(f"Query filter: {filter_condition}, namespace: {self._namespace(document_id)!r}")
         
         results = self.index.query(
-            vector=query_embedding,
+            vector=embedding_list(query_embedding),
             top_k=top_k,
             include_metadata=True,
-            filter=filter_condition
+            filter=filter_condition,
+            namespace=self._namespace(document_id)
         )
         
         logger.info(f"Retrieved {len(results.matches)} matches from Pinecone")
@@ -111,19 +184,102 @@ class PineconeVectorStore(VectorStore):
             "score": match.score
         } for match in results.matches]
 
+    def delete(self, chunk_ids: List[str], document_id: Optional[str] = None) -> None:
+        namespace = self._namespace(document_id or self._active_document_id)
+        for i in range(0, len(chunk_ids), 1000):
+            self.index.delete(ids=chunk_ids[i:i + 1000], namespace=namespace)
+        logger.info(f"Deleted {len(chunk_ids)} vectors from Pinecone")
+
+    def update_metadata(self, updates: Dict[str, Dict[str, Any]], document_id: Optional[str] = None) -> None:
+        namespace = self._namespace(document_id or self._active_document_id)
+        for chunk_id, metadata in updates.items():
+            self.index.update(id=chunk_id, set_metadata=metadata, namespace=namespace)
+        logger.info(f"Updated metadata of {len(updates)} vectors in Pinecone")
+
+    def migrate_to_namespaces(self, document_ids: List[str], batch_size: int = 200,
+                              chunk_ids: Optional[Dict[str, List[str]]] = None) -> Dict[str, int]:
+        """Move documents stored with the metadata filter layout into their own namespaces.
+
+        Each document is moved by a fixed list of ids, taken from
+        ``chunk_ids`` (its ingest manifest) or else from one filtered query
+        made before anything is deleted. Querying again after each delete
+        would not work: Pinecone's deletes are eventually consistent, so
+        moved vectors can still match. Batch by batch, vectors are fetched
+        from the default namespace, upserted into the document's namespace
+        and only then deleted from the default one, so an interrupted run
+        can simply be started again. Returns {document_id: vectors moved}.
+        """
+        moved = {}
+        for document_id in document_ids:
+            ids = list((chunk_ids or {}).get(document_id) or self._filtered_ids(document_id))
+            moved[document_id] = 0
+            for i in range(0, len(ids), batch_size):
+                fetched = self.index.fetch(ids=ids[i:i + batch_size], namespace="").vectors
+                if not fetched:
+                    continue
+                self._upsert([{"id": chunk_id, "values": list(vector.values), "metadata": vector.metadata or {}}
+                              for chunk_id, vector in fetched.items()], namespace=document_id)
+                self.index.delete(ids=list(fetched), namespace="")
+                moved[document_id] += len(fetched)
+            logger.info(f"Moved {moved[document_id]} vectors of {document_id} into their namespace")
+        return moved
+
+    def _filtered_ids(self, document_id: str, limit: int = 10000) -> List[str]:
+        """Ids of a document's vectors in the default namespace, found with the old filter"""
+        filter_condition = {"$or": [{"document_id": {"$eq": document_id}},
+                                    {"city_name": {"$eq": document_id}}]}
+        # Any vector will do as the query, only the filter matters; 10000 is Pinecone's top_k limit
+        results = self.index.query(vector=[0.0] * (self._dimension() - 1) + [1.0], top_k=limit,
+                                   include_metadata=False, include_values=False, filter=filter_condition,
+                                   namespace="")
+        if len(results.matches) == limit:
+            logger.warning(f"{document_id} may have more than {limit} vectors to move, "
+                           f"run the migration again once this one is done")
+        return [match.id for match in results.matches]
+
+    def _dimension(self) -> int:
+        stats = self.index.describe_index_stats()
+        return stats["dimension"] if isinstance(stats, dict) else stats.dimension
+
 
 class ChromaVectorStore(VectorStore):
-    def __init__(self, collection_name: str = "city_budgets"):
+    def __init__(self, collection_name: str = "city_budgets", persist_directory: Optional[str] = None):
+        """In-memory by default; with ``persist_directory`` the collection and a
+        document catalog are kept on disk and picked up again on restart."""
         super().__init__()
         import chromadb
-        self.client = chromadb.Client()
+        start = time.perf_counter()
+        if persist_directory:
+            self.client = chromadb.PersistentClient(path=persist_directory)
+        else:
+            self.client = chromadb.Client()
         self.collection = self.client.get_or_create_collection(
             name=collection_name, metadata={"hnsw:space": "cosine"}
         )
+        if persist_directory:
+            self.catalog = DocumentCatalog(os.path.join(persist_directory, f"{collection_name}.catalog.json"))
+            if not len(self.catalog) and self.collection.count():
+                self._rebuild_catalog()
+            logger.info(f"Loaded persistent ChromaDB collection {collection_name} from {persist_directory}: "
+                        f"{self.collection.count()} vectors, {len(self.catalog)} documents "
+                        f"in {time.perf_counter() - start:.2f}s")
         logger.info(f"Initialized ChromaDB vector store with collection: {collection_name}")
 
-    def store_embeddings(self, chunks: List[Dict[str, Any]]) -> None:
-        document_id = self.get_active_document_id()
+    def _rebuild_catalog(self, page_size: int = 5000) -> None:
+        """Recover the catalog from stored metadata, e.g. for a collection persisted before it existed"""
+        counts = {}
+        for offset in range(0, self.collection.count(), page_size):
+            stored = self.collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            for metadata in stored["metadatas"]:
+                document_id = metadata.get("document_id")
+                if document_id:
+                    counts[document_id] = counts.get(document_id, 0) + 1
+        for document_id, chunks in counts.items():
+            self.catalog.record(document_id, chunks=chunks)
+        logger.info(f"Rebuilt the document catalog from the collection: {len(counts)} documents")
+
+    def store_embeddings(self, chunks: List[Dict[str, Any]], document_id: Optional[str] = None) -> None:
+        document_id = self._document_id(document_id)
         logger.info(f"Storing embeddings in ChromaDB for document_id: {document_id}")
         ids, embeddings, metadatas, documents = [], [], [], []
 
@@ -134,12 +290,13 @@ class ChromaVectorStore(VectorStore):
                 metadata["document_id"] = document_id
                 metadata["city_name"] = document_id
                 ids.append(chunk["chunk_id"])
-                embeddings.append(chunk["embedding"])
+                embeddings.append(embedding_list(chunk["embedding"]))
                 metadatas.append(metadata)
                 documents.append(chunk["text"])
 
         logger.info(f"Adding {len(ids)} chunks to ChromaDB")
-        self.collection.add(
+        # upsert rather than add, so re-ingested chunks replace their old version
+        self.collection.upsert(
             ids=ids,
             embeddings=embeddings,
             metadatas=metadatas,
@@ -147,8 +304,9 @@ class ChromaVectorStore(VectorStore):
         )
         logger.info(f"Successfully stored {len(ids)} vectors for document_id: {document_id}")
 
-    def query(self, query_embedding: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
-        document_id = self.get_active_document_id()
+    def query(self, query_embedding: Sequence[float], top_k: int = 5,
+              document_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        document_id = self._document_id(document_id)
         logger.info(f"Querying ChromaDB for document_id: {document_id}")
         
         # Use document_id for querying (city_name is also set to document_id for compatibility)
@@ -160,7 +318,7 @@ class ChromaVectorStore(VectorStore):
         logger.info(f"Query filter: {where_filter}")
         
         results = self.collection.query(
-            query_embeddings=[query_embedding],
+            query_embeddings=[embedding_list(query_embedding)],
             n_results=top_k,
             where=where_filter
         )
@@ -177,4 +335,412 @@ class ChromaVectorStore(VectorStore):
             "content": results['documents'][0][i],
             "metadata": results['metadatas'][0][i],
             "score": 1 - results['distances'][0][i]  # Convert distance to similarity score
-        } for i in range(len(results['ids'][0]))]
\ No newline at end of file
+        } for i in range(len(results['ids'][0]))]
+
+    def delete(self, chunk_ids: List[str], document_id: Optional[str] = None) -> None:
+        if chunk_ids:
+            self.collection.delete(ids=chunk_ids)
+        logger.info(f"Deleted {len(chunk_ids)} vectors from ChromaDB")
+
+    def update_metadata(self, updates: Dict[str, Dict[str, Any]], document_id: Optional[str] = None) -> None:
+        if not updates:
+            return
+        # Read and merge first, so the update can't drop the other metadata fields
+        stored = self.collection.get(ids=list(updates), include=["metadatas"])
+        metadatas = [{**metadata, **updates[chunk_id]}
+                     for chunk_id, metadata in zip(stored["ids"], stored["metadatas"])]
+        self.collection.update(ids=stored["ids"], metadatas=metadatas)
+        logger.info(f"Updated metadata of {len(metadatas)} vectors in ChromaDB")
+
+
+class _Partition:
+    """One document's vectors: a float32 matrix (memory-mapped once saved) plus its ids, texts and metadata"""
+
+    def __init__(self, ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]], matrix: np.ndarray):
+        self.ids = ids
+        self.texts = texts
+        self.metadatas = metadatas
+        self.matrix = matrix
+        self.rows = {chunk_id: row for row, chunk_id in enumerate(ids)}
+        self.quantized: Optional[Dict[str, np.ndarray]] = None  # Codes, once built or loaded
+
+
+class NumpyVectorStore(VectorStore):
+    """Exact search over one contiguous float32 matrix per document.
+
+    Queries always target a single document, and a budget is a few thousand
+    vectors, so a matrix-vector product and ``argpartition`` beat an ANN
+    index and need no server. Each document lives in its own directory under
+    ``directory/collection_name``: ``vectors.npy`` (unit-length rows, opened
+    memory-mapped) and ``records.json`` (ids, texts and metadata by row).
+    New chunks are appended: their rows go at the end of ``vectors.npy`` and
+    their records into the log ``records.json`` names, so an ingest writes
+    each batch once. Deletes, metadata updates and re-stored ids rewrite
+    both files and start a new log.
+
+    With ``quantization`` "int8" or "pq" (see src.quantization) queries scan
+    compact codes held in memory instead, and only the best
+    ``top_k * rescore_factor`` candidates are re-scored from the memory-mapped
+    full-precision rows. Codes are built when an ingest finishes
+    (``finish_ingest``), or in the background if a query finds none, and
+    saved next to its vectors (``quantized.npz``); until they exist queries
+    scan the full rows. The setting belongs to the collection: it is saved
+    in ``collection.json`` and used on reopening unless another one is
+    passed.
+
+    Writes to a document hold that document's lock only; queries take no
+    lock, they read whichever partition is current.
+    """
+
+    def __init__(self, directory: str = "data/vectors", collection_name: str = "city_budgets",
+                 quantization: Optional[str] = None, pq_subvectors: Optional[int] = None,
+                 rescore_factor: int = 8):
+        super().__init__()
+        self.directory = Path(directory) / collection_name
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.catalog = DocumentCatalog(str(self.directory / "catalog.json"))
+        self._partitions: Dict[str, _Partition] = {}
+        self._lock = threading.RLock()  # Guards the two dicts below
+        self._document_locks: Dict[str, threading.RLock] = {}
+        self._builds: Dict[str, Future] = {}  # Code builds started by queries
+        self._builder: Optional[ThreadPoolExecutor] = None
+        self.quantization, self.pq_subvectors = self._settings(quantization, pq_subvectors)
+        self.rescore_factor = max(1, rescore_factor)
+        logger.info(f"Initialized NumPy vector store in {self.directory} (quantization: {self.quantization})")
+
+    def _settings(self, quantization: Optional[str], pq_subvectors: Optional[int]):
+        """The collection's quantization: the one passed in (and saved), else the saved one, else none"""
+        path = self.directory / "collection.json"
+        saved = {}
+        if path.exists():
+            with path.open() as f:
+                saved = json.load(f)
+        if quantization is None:
+            return saved.get("quantization", "none"), saved.get("pq_subvectors")
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"quantization must be one of {QUANTIZATION_MODES}, got {quantization!r}")
+        if (quantization, pq_subvectors) != (saved.get("quantization"), saved.get("pq_subvectors")):
+            with path.open("w") as f:
+                json.dump({"quantization": quantization, "pq_subvectors": pq_subvectors}, f)
+        return quantization, pq_subvectors
+
+    def _path(self, document_id: str) -> Path:
+        safe_id = "".join(c if c.isalnum() or c in "-_." else "_" for c in document_id)
+        return self.directory / safe_id
+
+    def _document_ids(self) -> List[str]:
+        """Every stored document, loaded or not"""
+        ids = set(self._partitions)
+        for records in self.directory.glob("*/records.json"):
+            with records.open() as f:
+                ids.add(json.load(f)["document_id"])
+        return sorted(ids)
+
+    def _document_lock(self, document_id: str) -> threading.RLock:
+        with self._lock:
+            return self._document_locks.setdefault(document_id, threading.RLock())
+
+    def _partition(self, document_id: str) -> Optional[_Partition]:
+        partition = self._partitions.get(document_id)
+        if partition is not None:
+            return partition
+        with self._document_lock(document_id):
+            if document_id not in self._partitions:
+                path = self._path(document_id)
+                if not (path / "records.json").exists():
+                    return None
+                with (path / "records.json").open() as f:
+                    records = json.load(f)
+                ids, texts, metadatas = records["ids"], records["texts"], records["metadatas"]
+                if records.get("log") and (path / records["log"]).exists():
+                    with (path / records["log"]).open() as f:
+                        for line in f:
+                            try:
+                                record = json.loads(line)
+                            except ValueError:
+                                break  # Cut short by a crash, and so were any rows after it
+                            if record["row"] == len(ids):
+                                ids.append(record["id"])
+                                texts.append(record["text"])
+                                metadatas.append(record["metadata"])
+                # Rows past the records are from an append that didn't finish
+                matrix = np.load(path / "vectors.npy", mmap_mode="r")[:len(ids)]
+                self._partitions[document_id] = _Partition(ids, texts, metadatas, matrix)
+            return self._partitions[document_id]
+
+    def _save(self, document_id: str, ids: List[str], texts: List[str],
+              metadatas: List[Dict[str, Any]], matrix: np.ndarray, vectors_changed: bool = True) -> None:
+        """Write the partition (to temporary files, swapped in) and reopen it memory-mapped"""
+        path = self._path(document_id)
+        path.mkdir(parents=True, exist_ok=True)
+        if vectors_changed:
+            with (path / "vectors.npy.tmp").open("wb") as f:
+                np.save(f, np.ascontiguousarray(matrix, dtype=np.float32))
+        log = f"records.{uuid.uuid4().hex[:12]}.log"
+        with (path / "records.json.tmp").open("w") as f:
+            json.dump({"document_id": document_id, "ids": ids, "texts": texts, "metadatas": metadatas,
+                       "log": log}, f)
+        if vectors_changed:
+            os.replace(path / "vectors.npy.tmp", path / "vectors.npy")
+            # Codes of the old vectors; rebuilt on the next query
+            (path / "quantized.npz").unlink(missing_ok=True)
+        os.replace(path / "records.json.tmp", path / "records.json")
+        # Rows appended before this rewrite are part of it now
+        for old_log in path.glob("records.*.log"):
+            if old_log.name != log:
+                old_log.unlink(missing_ok=True)
+        previous = self._partitions.get(document_id)
+        partition = _Partition(ids, texts, metadatas,
+                               np.load(path / "vectors.npy", mmap_mode="r") if vectors_changed else matrix)
+        if not vectors_changed and previous is not None:
+            partition.quantized = previous.quantized
+        self._partitions[document_id] = partition
+
+    def _append(self, document_id: str, partition: _Partition, ids: List[str], texts: List[str],
+                metadatas: List[Dict[str, Any]], vectors: np.ndarray) -> bool:
+        """Add rows at the end of the partition's files; False if the .npy header can't grow in place"""
+        path = self._path(document_id)
+        with (path / "records.json").open() as f:
+            log = json.load(f).get("log")
+        if not log:
+            return False
+        rows, dimension = len(partition.ids), vectors.shape[1]
+        with (path / "vectors.npy").open("r+b") as f:
+            if np.lib.format.read_magic(f) != (1, 0):
+                return False
+            np.lib.format.read_array_header_1_0(f)
+            header_length = f.tell()
+            # np.save leaves room in the header for the row count to grow; check before writing anything
+            header = io.BytesIO()
+            np.lib.format.write_array_header_1_0(header, {
+                "descr": np.lib.format.dtype_to_descr(np.dtype(np.float32)), "fortran_order": False,
+                "shape": (rows + len(ids), dimension)})
+            if header.tell() != header_length:
+                return False
+            f.seek(header_length + rows * dimension * 4)
+            f.truncate()
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+            f.flush()
+            f.seek(0)
+            f.write(header.getvalue())
+        with (path / log).open("a") as f:
+            for row, (chunk_id, text, metadata) in enumerate(zip(ids, texts, metadatas), start=rows):
+                f.write(json.dumps({"row": row, "id": chunk_id, "text": text, "metadata": metadata}) + "\n")
+        # Codes of the old vectors; rebuilt on the next query
+        (path / "quantized.npz").unlink(missing_ok=True)
+        self._partitions[document_id] = _Partition(
+            partition.ids + ids, partition.texts + texts, partition.metadatas + metadatas,
+            np.load(path / "vectors.npy", mmap_mode="r"))
+        return True
+
+    def _load_codes(self, document_id: str, partition: _Partition) -> Optional[Dict[str, np.ndarray]]:
+        """The partition's saved codes, if they match its vectors and the collection's quantization"""
+        path = self._path(document_id) / "quantized.npz"
+        if not path.exists():
+            return None
+        with np.load(path) as stored:
+            quantized = dict(stored)
+        subvectors = self.pq_subvectors or default_subvectors(partition.matrix.shape[1])
+        if (str(quantized["mode"]) == self.quantization and len(quantized["codes"]) == len(partition.ids)
+                and (self.quantization != "pq" or quantized["codebooks"].shape[0] == subvectors)):
+            return quantized
+        return None
+
+    def _build_codes(self, document_id: str) -> None:
+        """Load or build (and save) the codes of a document's current vectors.
+
+        Training runs outside any lock. If the vectors change meanwhile the
+        codes are dropped; the next ``finish_ingest`` or query builds again.
+        """
+        partition = self._partition(document_id)
+        if partition is None or partition.quantized is not None or not partition.ids:
+            return
+        quantized = self._load_codes(document_id, partition)
+        built = quantized is None
+        if built:
+            start = time.perf_counter()
+            matrix = np.asarray(partition.matrix)
+            if self.quantization == "int8":
+                codes, scales = int8_quantize(matrix)
+                quantized = {"mode": np.array("int8"), "codes": codes, "scales": scales}
+            else:
+                codebooks = train_pq(matrix, self.pq_subvectors or default_subvectors(matrix.shape[1]))
+                quantized = {"mode": np.array("pq"), "codes": pq_encode(matrix, codebooks), "codebooks": codebooks}
+            logger.info(f"Built {self.quantization} codes for {len(partition.ids)} vectors of {document_id} "
+                        f"in {time.perf_counter() - start:.2f}s")
+        with self._document_lock(document_id):
+            current = self._partitions.get(document_id)
+            # A metadata-only rewrite keeps the matrix, and the codes still fit it
+            if current is None or current.matrix is not partition.matrix:
+                logger.info(f"Vectors of {document_id} changed while building codes, dropped them")
+                return
+            if built:
+                path = self._path(document_id) / "quantized.npz"
+                with path.with_suffix(".tmp.npz").open("wb") as f:
+                    np.savez(f, **quantized)
+                os.replace(path.with_suffix(".tmp.npz"), path)
+            current.quantized = quantized
+
+    def _schedule_build(self, document_id: str) -> None:
+        """Build a document's codes in the background, one build per document at a time"""
+        with self._lock:
+            build = self._builds.get(document_id)
+            if build is not None and not build.done():
+                return
+            if self._builder is None:
+                self._builder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="numpy-codes")
+            self._builds[document_id] = self._builder.submit(self._build_codes, document_id)
+
+    def finish_ingest(self, document_id: str) -> None:
+        if self.quantization != "none":
+            self._build_codes(document_id)
+
+    def _candidates(self, document_id: str, partition: _Partition, query: np.ndarray,
+                    top_k: int) -> Optional[np.ndarray]:
+        """Rows worth exact scoring: the best by approximate score, or None for all of them"""
+        candidates = top_k * self.rescore_factor
+        if self.quantization == "none" or candidates >= len(partition.ids):
+            return None
+        quantized = partition.quantized
+        if quantized is None:
+            quantized = partition.quantized = self._load_codes(document_id, partition)
+        if quantized is None:
+            # Never train on the query path: scan the full rows until the codes are there
+            self._schedule_build(document_id)
+            return None
+        if self.quantization == "int8":
+            approximate = int8_scores(quantized["codes"], quantized["scales"], query)
+        else:
+            approximate = pq_scores(quantized["codes"], quantized["codebooks"], query)
+        return np.sort(np.argpartition(-approximate, candidates - 1)[:candidates])
+
+    def memory_bytes(self, document_id: str) -> Dict[str, int]:
+        """Bytes a document's query path keeps in memory: full float32 rows, or codes (and codebooks)"""
+        partition = self._partition(document_id)
+        if partition is None:
+            return {"full": 0, "resident": 0}
+        full = partition.matrix.nbytes
+        if self.quantization == "none":
+            return {"full": full, "resident": full}
+        self._build_codes(document_id)
+        quantized = self._partition(document_id).quantized
+        if quantized is None:
+            return {"full": full, "resident": full}
+        return {"full": full, "resident": sum(array.nbytes for key, array in quantized.items() if key != "mode")}
+
+    def store_embeddings(self, chunks: List[Dict[str, Any]], document_id: Optional[str] = None) -> None:
+        document_id = self._document_id(document_id)
+        chunks = [chunk for chunk in chunks if "embedding" in chunk]
+        if not chunks:
+            return
+        vectors = np.asarray([chunk["embedding"] for chunk in chunks], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1, norms)  # Unit rows: the dot product is the cosine similarity
+
+        with self._document_lock(document_id):
+            partition = self._partition(document_id)
+            chunk_ids = [chunk["chunk_id"] for chunk in chunks]
+            if (partition and len(set(chunk_ids)) == len(chunk_ids)
+                    and not any(chunk_id in partition.rows for chunk_id in chunk_ids)
+                    and self._append(document_id, partition, chunk_ids, [chunk["text"] for chunk in chunks],
+                                     [{**chunk["metadata"], "document_id": document_id, "city_name": document_id}
+                                      for chunk in chunks], vectors)):
+                # Only new ids: just these rows were written
+                logger.info(f"Appended {len(chunks)} vectors for document_id: {document_id} "
+                            f"({len(partition.ids) + len(chunks)} in total)")
+                return
+            ids = list(partition.ids) if partition else []
+            texts = list(partition.texts) if partition else []
+            metadatas = list(partition.metadatas) if partition else []
+            rows = dict(partition.rows) if partition else {}
+            new_rows = []
+            for chunk, vector in zip(chunks, vectors):
+                metadata = {**chunk["metadata"], "document_id": document_id, "city_name": document_id}
+                row = rows.get(chunk["chunk_id"])
+                if row is None:
+                    # Upsert: a re-ingested chunk replaces its old row
+                    row = rows[chunk["chunk_id"]] = len(ids)
+                    ids.append(chunk["chunk_id"])
+                    texts.append(chunk["text"])
+                    metadatas.append(metadata)
+                else:
+                    texts[row], metadatas[row] = chunk["text"], metadata
+                new_rows.append(row)
+
+            matrix = np.empty((len(ids), vectors.shape[1]), dtype=np.float32)
+            if partition:
+                matrix[:len(partition.ids)] = partition.matrix
+            matrix[new_rows] = vectors
+            self._save(document_id, ids, texts, metadatas, matrix)
+        logger.info(f"Stored {len(chunks)} vectors for document_id: {document_id} ({len(ids)} in total)")
+
+    def query(self, query_embedding: Sequence[float], top_k: int = 5,
+              document_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        document_id = self._document_id(document_id)
+        partition = self._partition(document_id)
+        if partition is None or not partition.ids:
+            logger.info(f"No vectors stored for document_id: {document_id}")
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        rows = self._candidates(document_id, partition, query, top_k)
+        if rows is None:
+            rows = np.arange(len(partition.ids))
+            scores = partition.matrix @ query
+        else:
+            # Exact scores, reading only the candidate rows from disk
+            scores = partition.matrix[rows] @ query
+        k = min(top_k, len(scores))
+        # Top k unordered in O(n), then only those k sorted
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        logger.info(f"Retrieved {k} matches from {len(partition.ids)} vectors for document_id: {document_id}")
+        return [{
+            "content": partition.texts[rows[i]],
+            "metadata": dict(partition.metadatas[rows[i]]),
+            "score": float(scores[i])
+        } for i in top]
+
+    def _rewrite(self, document_id: str, keep: np.ndarray, metadatas: List[Dict[str, Any]]) -> None:
+        partition = self._partitions[document_id]
+        ids = [partition.ids[row] for row in keep]
+        texts = [partition.texts[row] for row in keep]
+        self._save(document_id, ids, texts, [metadatas[row] for row in keep], partition.matrix[keep])
+
+    def _rewrite_metadata(self, document_id: str, metadatas: List[Dict[str, Any]]) -> None:
+        """Save new metadata; the vectors, and so their codes, stay as they are"""
+        partition = self._partitions[document_id]
+        self._save(document_id, partition.ids, partition.texts, metadatas, partition.matrix, vectors_changed=False)
+
+    def delete(self, chunk_ids: List[str], document_id: Optional[str] = None) -> None:
+        doomed = set(chunk_ids)
+        deleted = 0
+        for document_id in [document_id] if document_id else self._document_ids():
+            with self._document_lock(document_id):
+                partition = self._partition(document_id)
+                if partition is None:
+                    continue
+                keep = np.array([row for row, chunk_id in enumerate(partition.ids) if chunk_id not in doomed],
+                                dtype=np.int64)
+                if len(keep) < len(partition.ids):
+                    deleted += len(partition.ids) - len(keep)
+                    self._rewrite(document_id, keep, partition.metadatas)
+        logger.info(f"Deleted {deleted} vectors from the NumPy store")
+
+    def update_metadata(self, updates: Dict[str, Dict[str, Any]], document_id: Optional[str] = None) -> None:
+        updated = 0
+        for document_id in ([document_id] if document_id else self._document_ids()) if updates else []:
+            with self._document_lock(document_id):
+                partition = self._partition(document_id)
+                if partition is None:
+                    continue
+                rows = [partition.rows[chunk_id] for chunk_id in updates if chunk_id in partition.rows]
+                if not rows:
+                    continue
+                metadatas = list(partition.metadatas)
+                for row in rows:
+                    metadatas[row] = {**metadatas[row], **updates[partition.ids[row]]}
+                updated += len(rows)
+                self._rewrite_metadata(document_id, metadatas)
+        logger.info(f"Updated metadata of {updated} vectors in the NumPy store")
@@ -0,0 +1,60 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import httpx
+
+api = None
+
+
+def setUpModule():
+    # Importing api builds the RAG system; keep its data/ directories out of the checkout
+    global api
+    tmp = tempfile.TemporaryDirectory()
+    cwd = os.getcwd()
+    os.mkdir(os.path.join(tmp.name, "static"))
+    os.chdir(tmp.name)
+    try:
+        with mock.patch.dict(os.environ, {"OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "test-key")}):
+            import api as module
+    finally:
+        os.chdir(cwd)
+    api = module
+    unittest.addModuleCleanup(tmp.cleanup)
+
+
+class BlockingRAG:
+    """query() only returns once `parties` queries are in flight at the same time"""
+
+    def __init__(self, parties):
+        self.barrier = threading.Barrier(parties)
+
+    def query(self, question, document_id=None, use_cache=True):
+        self.barrier.wait(5)
+        return {"answer": f"answer to {question}", "sources": [], "timestamp": "2024-07-01T00:00:00",
+                "metadata": {"document_id": document_id}}
+
+
+class TestQueryEndpoint(unittest.TestCase):
+    def test_overlapping_queries_run_concurrently(self):
+        rag = BlockingRAG(parties=3)
+        document = {"documentId": "tulsa_2024-25"}
+
+        async def ask_all():
+            async with httpx.AsyncClient(app=api.app, base_url="http://test") as client:
+                return await asyncio.gather(*[
+                    client.post("/query", json={"question": f"question {i}"}) for i in range(3)])
+
+        with mock.patch.object(api, "rag_system", rag), mock.patch.object(api, "current_document", document):
+            responses = asyncio.run(ask_all())
+
+        self.assertEqual([response.status_code for response in responses], [200] * 3)
+        self.assertEqual({response.json()["answer"] for response in responses},
+                         {f"answer to question {i}" for i in range(3)})
+
+
+if __name__ == '__main__':
+    unittest.main()
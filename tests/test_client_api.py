@@ -1,3 +1,4 @@
+import time
 import requests
 
 # Base URL
@@ -11,7 +12,15 @@ data = {
 }
 
 response = requests.post(f"{BASE_URL}/ingest", files=files, data=data)
-print(response.json())
+job = response.json()
+print(job)
+
+# Processing runs in the background, poll the job until it is done
+while job["status"] not in ("succeeded", "failed"):
+    time.sleep(2)
+    job = requests.get(f"{BASE_URL}/jobs/{job['job_id']}").json()
+    print(job["stage"], job["progress"])
+print(job["result"] or job["error"])
 
 # 2. Query the system
 query_data = {
@@ -0,0 +1,80 @@
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.chunk import Chunk
+from src.openai_standin import hashed_embedding
+from src.pinecone_standin import StandInIndex
+from src.query_engine import QueryEngine
+from src.vector_store import NumpyVectorStore, PineconeVectorStore
+
+DIMENSIONS = 64
+DOCUMENTS = [f"city_{d}_2024" for d in range(6)]
+
+
+class HashedEmbeddings:
+    def generate_query_embedding(self, query):
+        return hashed_embedding(query, DIMENSIONS)
+
+
+def fill(store):
+    for document_id in DOCUMENTS:
+        store.store_embeddings([
+            Chunk(f"{document_id}_{i}", f"{document_id} line item {i}",
+                  {"page_number": i + 1, "file_name": f"{document_id}.pdf"},
+                  hashed_embedding(f"line item {i} police overtime", DIMENSIONS))
+            for i in range(40)], document_id=document_id)
+
+
+class TestConcurrentQueries(unittest.TestCase):
+    def make_engine(self, store):
+        engine = QueryEngine("test-key", vector_store=store, embedding_generator=HashedEmbeddings())
+        engine._generate_answer = lambda query, chunks: "stand-in answer"
+        return engine
+
+    def assert_isolated(self, engine, store, ingest=None):
+        # Sets an "active" document nobody asked for, to prove calls don't read it
+        store.set_active_document_id(DOCUMENTS[0])
+        barrier = threading.Barrier(8)
+
+        def ask(i):
+            if i < 8:
+                barrier.wait(5)
+            document_id = DOCUMENTS[i % len(DOCUMENTS)]
+            response = engine.answer_query(f"police overtime {i}", document_id=document_id, use_cache=False)
+            return document_id, {source["document_id"] for source in response["sources"]}
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            writer = executor.submit(ingest) if ingest else None
+            results = list(executor.map(ask, range(400)))
+            if writer:
+                writer.result()
+        for document_id, seen in results:
+            self.assertEqual(seen, {document_id})
+
+    def test_numpy_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = NumpyVectorStore(directory)
+            fill(store)
+
+            def ingest():
+                # Upserts into a document while it and others are being queried
+                for i in range(20):
+                    store.store_embeddings([Chunk(f"{DOCUMENTS[1]}_{i}", f"{DOCUMENTS[1]} revised {i}",
+                                                  {"page_number": 1, "file_name": "x.pdf"},
+                                                  np.ones(DIMENSIONS, dtype=np.float32))],
+                                           document_id=DOCUMENTS[1])
+
+            self.assert_isolated(self.make_engine(store), store, ingest)
+
+    def test_pinecone_filtered_store(self):
+        store = PineconeVectorStore(index=StandInIndex(DIMENSIONS))
+        fill(store)
+        self.assert_isolated(self.make_engine(store), store)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from src.dedup import ChunkDeduplicator
+
+HEADER = ("City of Example Adopted Operating Budget Fiscal Year 2025 General Fund "
+          "Summary of Sources and Uses by Department and Program")
+
+
+def chunk(chunk_id, page, text):
+    return {"chunk_id": chunk_id, "text": text, "metadata": {"page_number": page, "page_end": page}}
+
+
+class TestChunkDeduplicator(unittest.TestCase):
+    def test_exact_copies_are_merged(self):
+        dedup = ChunkDeduplicator()
+        batches = list(dedup.filter([[chunk("a", 1, HEADER), chunk("b", 2, HEADER.upper() + "  ")]]))
+        self.assertEqual([c["chunk_id"] for c in batches[0]], ["a"])
+        self.assertEqual(batches[0][0]["metadata"]["source_pages"], "1,2")
+        self.assertEqual(dedup.dedup_ratio, 0.5)
+
+    def test_near_copies_are_merged(self):
+        dedup = ChunkDeduplicator(threshold=0.7)
+        text = " ".join(f"{HEADER} section {word}" for word in ("alpha", "beta", "gamma", "delta"))
+        near = text.replace("gamma", "epsilon")
+        self.assertIsNone(dedup.add(chunk("a", 1, text)))
+        self.assertEqual(dedup.add(chunk("b", 7, near)), "a")
+
+    def test_different_amounts_are_kept(self):
+        dedup = ChunkDeduplicator(threshold=0.5)
+        table = HEADER + " Police {} Fire 8,200,000 Parks 1,150,000 Library 975,000"
+        self.assertIsNone(dedup.add(chunk("a", 3, table.format("12,500,000"))))
+        self.assertIsNone(dedup.add(chunk("b", 9, table.format("12,750,000"))))
+
+    def test_signs_and_separators_keep_amounts_apart(self):
+        for threshold in (0.9, 0.5):
+            dedup = ChunkDeduplicator(threshold=threshold)
+            table = HEADER + " Transfers {} Police 12,500,000 Fire 8,200,000"
+            for i, amount in enumerate(("1,200", "(1,200)", "-1,200", "1.200")):
+                self.assertIsNone(dedup.add(chunk(str(i), i + 1, table.format(amount))), amount)
+            self.assertEqual(dedup.add(chunk("copy", 9, table.format("(1,200)"))), "1")
+
+    def test_unrelated_text_is_kept(self):
+        dedup = ChunkDeduplicator()
+        self.assertIsNone(dedup.add(chunk("a", 1, HEADER)))
+        self.assertIsNone(dedup.add(chunk("b", 2, "Capital projects include a new library branch and road repairs")))
+        self.assertEqual(dedup.duplicates, 0)
+
+    def test_copies_after_a_batch_was_passed_on(self):
+        dedup = ChunkDeduplicator()
+        batches = dedup.filter([[chunk("a", 1, HEADER)], [chunk("b", 5, HEADER)]])
+        first = next(batches)
+        self.assertEqual(list(batches), [])
+        # The kept chunk already left the stage, so the new page comes back as an update
+        self.assertEqual(first[0]["metadata"]["source_pages"], "1")
+        self.assertEqual(dedup.late_updates(), {"a": {"source_pages": "1,5"}})
+        self.assertEqual(dedup.page_chunk_ids(), {1: ["a"], 5: ["a"]})
+
+
+if __name__ == '__main__':
+    unittest.main()
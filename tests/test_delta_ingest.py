@@ -0,0 +1,186 @@
+import tempfile
+import threading
+import unittest
+
+from main import CityBudgetRAG
+from src.config import Config
+from src.manifest import ManifestStore
+from src.text_processor import TextProcessor, content_chunk_id
+from src.vector_store import NumpyVectorStore
+from tests.test_embedding_cache import make_generator
+from tests.test_token_chunker import BYTE_ENCODING
+
+METADATA = {"file_name": "budget.pdf", "city_name": "Tulsa", "fiscal_year": "2024"}
+
+
+def page(topic):
+    return {'text': "\n".join(f"{topic} line {i} spending rises." for i in range(14)), 'tables': []}
+
+
+class FakePDF:
+    def __init__(self, topics):
+        self.pages = [dict(page(topic), page_num=n) for n, topic in enumerate(topics, start=1)]
+
+    def page_count(self, pdf_path):
+        return len(self.pages)
+
+    def iter_pages(self, pdf_path, batch_size=8):
+        for start in range(0, len(self.pages), batch_size):
+            yield self.pages[start:start + batch_size]
+
+
+class RecordingStore(NumpyVectorStore):
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.writes = {"stored": 0, "deleted": 0, "updated": 0}
+
+    def store_embeddings(self, chunks, document_id=None):
+        self.writes["stored"] += len(chunks)
+        super().store_embeddings(chunks, document_id)
+
+    def delete(self, chunk_ids, document_id=None):
+        self.writes["deleted"] += len(chunk_ids)
+        super().delete(chunk_ids, document_id)
+
+    def update_metadata(self, updates, document_id=None):
+        self.writes["updated"] += len(updates)
+        super().update_metadata(updates, document_id)
+
+
+class TestDeltaIngest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        config = Config()
+        config.DEDUP_CHUNKS = False
+        config.INCREMENTAL_INGEST = False
+        config.STREAMING_INGEST = True
+        rag = CityBudgetRAG.__new__(CityBudgetRAG)
+        rag.config = config
+        rag.text_processor = TextProcessor(chunk_size=200, chunk_overlap=40, chunking_scope="page")
+        rag.text_processor._encoding = BYTE_ENCODING
+        rag.embedding_generator = make_generator(None)
+        rag.vector_store = RecordingStore(tmp.name)
+        rag.manifests = ManifestStore(f"{tmp.name}/manifests")
+        rag.lexical_index = None
+        rag._document_locks, rag._document_locks_guard = {}, threading.Lock()
+        self.rag = rag
+
+    def ingest(self, topics, incremental=None):
+        self.rag.pdf_processor = FakePDF(topics)
+        self.rag.vector_store.writes = {"stored": 0, "deleted": 0, "updated": 0}
+        result = self.rag.ingest_document("budget.pdf", METADATA, incremental=incremental)
+        self.assertEqual(result["status"], "success", result.get("error"))
+        return result, self.rag.vector_store.writes
+
+    def stored_texts(self):
+        partition = self.rag.vector_store._partition("tulsa_2024")
+        return sorted(partition.texts)
+
+    def test_chunk_ids_depend_on_document_and_text_only(self):
+        self.assertEqual(content_chunk_id("a", "text"), content_chunk_id("a", "text"))
+        self.assertNotEqual(content_chunk_id("a", "text"), content_chunk_id("b", "text"))
+        occurrences = {}
+        self.assertNotEqual(content_chunk_id("a", "text", occurrences), content_chunk_id("a", "text", occurrences))
+
+    def test_writes_scale_with_the_change(self):
+        topics = ["Police", "Fire", "Parks", "Library", "Water", "Housing"]
+        _, writes = self.ingest(topics)
+        total = writes["stored"]
+        self.assertGreater(total, len(topics))
+        full_texts = self.stored_texts()
+
+        # Unchanged: nothing is embedded or written (the catalog makes it incremental)
+        calls = len(self.rag.embedding_generator.client.embeddings.calls)
+        _, writes = self.ingest(topics)
+        self.assertEqual(writes, {"stored": 0, "deleted": 0, "updated": 0})
+        self.assertEqual(len(self.rag.embedding_generator.client.embeddings.calls), calls)
+
+        # A page inserted up front: its chunks are new, the others only move
+        result, writes = self.ingest(["Transit"] + topics)
+        per_page = total // len(topics)
+        self.assertEqual(writes["stored"], per_page)
+        self.assertEqual(writes["updated"], total)
+        self.assertEqual(writes["deleted"], 0)
+        self.assertEqual(result["chunks_relocated"], total)
+        partition = self.rag.vector_store._partition("tulsa_2024")
+        police = [m for t, m in zip(partition.texts, partition.metadatas) if "Police" in t]
+        self.assertEqual({m["page_number"] for m in police}, {2})
+
+        # The document shrinks, even on a full re-ingest its removed chunks are deleted
+        _, writes = self.ingest(topics[:3], incremental=False)
+        self.assertEqual(writes["deleted"], total - 3 * per_page + per_page)
+        self.assertEqual(self.stored_texts(), [t for t in full_texts if any(topic in t for topic in topics[:3])])
+
+    def test_repeated_pages_keep_their_own_chunks_across_an_insert(self):
+        _, writes = self.ingest(["Water", "Transit", "Water"])
+        per_page = writes["stored"] // 3
+
+        # Pages 1 and 2 are skipped; the Water page moved to 4 must not take page 1's vectors
+        result, writes = self.ingest(["Water", "Transit", "Roads", "Water"])
+        self.assertEqual(result["pages_skipped"], 2)
+        self.assertEqual(writes["stored"], per_page)
+        self.assertEqual(result["chunks_relocated"], per_page)
+        partition = self.rag.vector_store._partition("tulsa_2024")
+        pages = dict(zip(partition.ids, (m["page_number"] for m in partition.metadatas)))
+        water = sorted(pages[chunk_id] for chunk_id, text in zip(partition.ids, partition.texts) if "Water" in text)
+        self.assertEqual(water, [1] * per_page + [4] * per_page)
+        for page_num, record in self.rag.manifests.load("tulsa_2024").items():
+            self.assertEqual({pages[chunk_id] for chunk_id in record["chunk_ids"]}, {page_num})
+
+        _, writes = self.ingest(["Water", "Transit", "Roads", "Water"])
+        self.assertEqual(writes, {"stored": 0, "deleted": 0, "updated": 0})
+
+    def test_incremental_ingest_keeps_duplicates_merged(self):
+        self.rag.config.DEDUP_CHUNKS = True
+        _, writes = self.ingest(["Water", "Transit", "Water"])
+        per_page = writes["stored"] // 2
+
+        def water_pages():
+            partition = self.rag.vector_store._partition("tulsa_2024")
+            return [m["source_pages"] for t, m in zip(partition.texts, partition.metadatas) if "Water" in t]
+
+        # The copy moved from page 3 to 4: only the kept chunks' pages change
+        _, writes = self.ingest(["Water", "Transit", "Roads", "Water"])
+        self.assertEqual(writes, {"stored": per_page, "deleted": 0, "updated": per_page})
+        self.assertEqual(water_pages(), ["1,4"] * per_page)
+
+        _, writes = self.ingest(["Water", "Transit", "Roads", "Water"])
+        self.assertEqual(writes, {"stored": 0, "deleted": 0, "updated": 0})
+
+        # A new copy on an added page is merged into the chunks kept on page 1
+        _, writes = self.ingest(["Water", "Transit", "Roads", "Water", "Water"])
+        self.assertEqual(writes, {"stored": 0, "deleted": 0, "updated": per_page})
+        self.assertEqual(water_pages(), ["1,4,5"] * per_page)
+        self.assertEqual(set(self.rag.manifests.load("tulsa_2024")[5]["chunk_ids"]),
+                         set(self.rag.manifests.load("tulsa_2024")[1]["chunk_ids"]))
+
+    def test_document_scope_rebuilds_chunks_reaching_into_a_changed_page(self):
+        self.rag.text_processor.chunking_scope = "document"
+        topics = ["Police", "Fire", "Parks", "Library", "Water", "Housing"]
+        _, writes = self.ingest(topics)
+        total = writes["stored"]
+        before = self.rag.manifests.load("tulsa_2024")
+        spans = self.rag.manifests.load_chunks("tulsa_2024").values()
+        self.assertTrue(any(start < end for start, end in spans))
+
+        changed = topics[:2] + ["Zoo"] + topics[3:]
+        result, writes = self.ingest(changed)
+        texts = self.stored_texts()
+        self.assertFalse([t for t in texts if "Parks" in t])
+        self.assertTrue([t for t in texts if "Zoo" in t])
+        self.assertLess(writes["stored"], total)
+        # Everything still stored is text of the new document
+        document = "\n".join(page(topic)['text'] for topic in changed)
+        self.assertTrue(all(t in document for t in texts))
+        # Only pages sharing no chunk with page 3 are skipped; chunks are counted once, not per page
+        reached = {page_num for start, end in spans if start <= 3 <= end for page_num in range(start, end + 1)}
+        self.assertEqual(result["pages_skipped"], len(topics) - len(reached))
+        skipped = {chunk_id for page_num, record in before.items() if page_num not in reached
+                   for chunk_id in record["chunk_ids"]}
+        self.assertEqual(result["chunks_skipped"], len(skipped))
+        self.assertEqual(writes["deleted"], result["chunks_deleted"])
+        self.assertEqual(len(texts), total + writes["stored"] - writes["deleted"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+from src.text_processor import TextProcessor
+from tests.test_token_chunker import BYTE_ENCODING
+
+METADATA = {"file_name": "budget.pdf", "city_name": "Example", "fiscal_year": "2025"}
+
+
+def pages(count, sentences=7):
+    return [{'page_num': page_num,
+             'text': "\n".join(f"Department {page_num} line {i} spending rises." for i in range(sentences)),
+             'tables': []}
+            for page_num in range(1, count + 1)]
+
+
+def make_processor(scope):
+    processor = TextProcessor(chunk_size=200, chunk_overlap=40, chunking_scope=scope)
+    processor._encoding = BYTE_ENCODING
+    return processor
+
+
+class TestDocumentChunking(unittest.TestCase):
+    def test_document_scope_makes_fewer_chunks(self):
+        content = pages(10)
+        by_page = make_processor("page").process_document_content(content, METADATA)
+        by_document = make_processor("document").process_document_content(content, METADATA)
+        self.assertLess(len(by_document), len(by_page))
+        for chunk in by_page:
+            self.assertEqual(chunk["metadata"]["page_start"], chunk["metadata"]["page_end"])
+
+    def test_chunks_record_page_span(self):
+        chunks = make_processor("document").process_document_content(pages(6), METADATA)
+        self.assertTrue(any(c["metadata"]["page_end"] > c["metadata"]["page_start"] for c in chunks))
+        for chunk in chunks:
+            metadata = chunk["metadata"]
+            self.assertEqual(metadata["page_number"], metadata["page_start"])
+            self.assertIn(f"Department {metadata['page_start']} ", chunk["text"])
+            self.assertIn(f"Department {metadata['page_end']} ", chunk["text"])
+            self.assertLessEqual(metadata["token_count"], 200)
+
+    def test_streamed_batches_match_whole_document(self):
+        processor = make_processor("document")
+        content = pages(9)
+        whole = processor.process_document_content(content, METADATA)
+        batches = list(processor.iter_document_chunks([content[:2], content[2:3], content[3:]], METADATA))
+        streamed = [chunk for batch in batches for chunk in batch]
+        self.assertEqual([c["text"] for c in streamed], [c["text"] for c in whole])
+        self.assertEqual(len({c["chunk_id"] for c in streamed}), len(streamed))
+
+    def test_runs_break_at_skipped_pages(self):
+        content = [page for page in pages(6) if page['page_num'] != 3]
+        chunks = make_processor("document").process_document_content(content, METADATA)
+        for chunk in chunks:
+            span = range(chunk["metadata"]["page_start"], chunk["metadata"]["page_end"] + 1)
+            self.assertNotIn(3, span)
+
+    def test_invalid_scope(self):
+        with self.assertRaises(ValueError):
+            TextProcessor(chunking_scope="section")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from types import SimpleNamespace
+
+from src.embeddings import BatchStats, EmbeddingGenerator, pack_batches
+from tests.test_embedding_cache import FakeEmbeddings
+
+
+def items(*token_counts):
+    return [(f"h{i}", f"text {i}", tokens) for i, tokens in enumerate(token_counts)]
+
+
+class TestPackBatches(unittest.TestCase):
+    def test_fills_up_to_token_budget(self):
+        batches = pack_batches(items(400, 300, 200, 500, 100), max_tokens=1000, max_items=10)
+        self.assertEqual([[item[2] for item in batch] for batch in batches], [[400, 300, 200], [500, 100]])
+
+    def test_item_cap(self):
+        batches = pack_batches(items(*[1] * 7), max_tokens=1000, max_items=3)
+        self.assertEqual([len(batch) for batch in batches], [3, 3, 1])
+
+    def test_oversized_item_goes_alone(self):
+        batches = pack_batches(items(100, 5000, 100), max_tokens=1000, max_items=10)
+        self.assertEqual([[item[2] for item in batch] for batch in batches], [[100], [5000], [100]])
+
+    def test_order_is_kept(self):
+        packed = [item for batch in pack_batches(items(*range(1, 50)), 120, 8) for item in batch]
+        self.assertEqual(packed, items(*range(1, 50)))
+
+
+class TestBatchStats(unittest.TestCase):
+    def test_generator_packs_by_metadata_token_counts(self):
+        generator = EmbeddingGenerator(api_key="test-key", max_batch_tokens=1000, max_batch_items=100)
+        generator.client = SimpleNamespace(embeddings=FakeEmbeddings())
+        chunks = [{"text": f"chunk {i}", "metadata": {"token_count": 300}} for i in range(10)]
+        stats = BatchStats(generator.max_batch_tokens)
+        generator.generate_embeddings(chunks, stats=stats)
+        generator.close()
+
+        self.assertEqual(sorted(len(texts) for texts, _ in generator.client.embeddings.calls), [1, 3, 3, 3])
+        summary = stats.summary()
+        self.assertEqual(summary["requests"], 4)
+        self.assertEqual(summary["items"], 10)
+        self.assertEqual(summary["max_tokens"], 900)
+        self.assertEqual(summary["token_fill"], 0.75)
+
+
+if __name__ == '__main__':
+    unittest.main()
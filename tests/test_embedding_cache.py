@@ -0,0 +1,82 @@
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.embedding_cache import EmbeddingCache, text_hash
+from src.embeddings import EmbeddingGenerator
+
+
+class FakeEmbeddings:
+    """Stands in for client.embeddings, recording what was sent"""
+
+    def __init__(self):
+        self.calls = []
+
+    def create(self, model, input, **kwargs):
+        texts = [input] if isinstance(input, str) else list(input)
+        self.calls.append((texts, kwargs))
+        return SimpleNamespace(data=[SimpleNamespace(embedding=[float(len(text)), 0.5, -1.0]) for text in texts])
+
+
+def make_generator(cache, **kwargs):
+    generator = EmbeddingGenerator(api_key="test-key", cache=cache, **kwargs)
+    generator.client = SimpleNamespace(embeddings=FakeEmbeddings())
+    return generator
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "embeddings.sqlite3"
+        self.cache = EmbeddingCache(str(self.path))
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_round_trip_is_float32(self):
+        self.cache.put_many("model", None, {text_hash("a"): [0.25, -1.5]})
+        found = self.cache.get_many("model", None, [text_hash("a"), text_hash("b")])
+        self.assertEqual(list(found), [text_hash("a")])
+        self.assertEqual(found[text_hash("a")].dtype, np.float32)
+        np.testing.assert_array_equal(found[text_hash("a")], [0.25, -1.5])
+
+    def test_key_includes_model_and_dimensions(self):
+        self.cache.put_many("small", 256, {text_hash("a"): [1.0]})
+        self.assertEqual(self.cache.get_many("small", None, [text_hash("a")]), {})
+        self.assertEqual(self.cache.get_many("large", 256, [text_hash("a")]), {})
+
+    def test_only_misses_go_upstream(self):
+        generator = make_generator(self.cache)
+        generator.generate_embeddings([{"text": "police"}, {"text": "fire"}])
+        chunks = [{"text": "police"}, {"text": "parks"}, {"text": "parks"}]
+        generator.generate_embeddings(chunks)
+        calls = generator.client.embeddings.calls
+        self.assertEqual(calls[-1][0], ["parks"])
+        self.assertEqual([chunk["embedding"][0] for chunk in chunks], [6.0, 5.0, 5.0])
+
+    def test_cache_survives_restart(self):
+        make_generator(self.cache).generate_embeddings([{"text": "police"}])
+        self.cache.close()
+        self.cache = EmbeddingCache(str(self.path))
+        generator = make_generator(self.cache)
+        generator.generate_embeddings([{"text": "police"}])
+        self.assertEqual(generator.client.embeddings.calls, [])
+
+    def test_query_embeddings_use_lru_then_disk(self):
+        generator = make_generator(self.cache, dimensions=3)
+        first = generator.generate_query_embedding("overtime")
+        self.assertIs(generator.generate_query_embedding("overtime"), first)
+        self.assertEqual(len(generator.client.embeddings.calls), 1)
+        self.assertEqual(generator.client.embeddings.calls[0][1]["extra_body"], {"dimensions": 3})
+
+        other = make_generator(self.cache, dimensions=3)
+        np.testing.assert_array_equal(other.generate_query_embedding("overtime"), first)
+        self.assertEqual(other.client.embeddings.calls, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
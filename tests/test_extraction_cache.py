@@ -0,0 +1,50 @@
+import os
+import tempfile
+import time
+import unittest
+
+from src.extraction_cache import ExtractionCache
+
+
+PAGES = [{'page_num': 1, 'text': 'General Fund revenue', 'tables': ['Fund | Amount']}]
+
+
+class TestExtractionCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pdf_path = os.path.join(self.tmp.name, "budget.pdf")
+        with open(self.pdf_path, "wb") as f:
+            f.write(b"%PDF-1.4 fake budget bytes")
+        self.cache = ExtractionCache(os.path.join(self.tmp.name, "cache"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_and_counters(self):
+        key = self.cache.make_key(self.pdf_path, {'min_text_length': 50})
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, PAGES)
+        self.assertEqual(self.cache.get(key), PAGES)
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 1, 1))
+
+    def test_key_depends_on_settings(self):
+        key_a = self.cache.make_key(self.pdf_path, {'ocr_dpi': 72})
+        key_b = self.cache.make_key(self.pdf_path, {'ocr_dpi': 300})
+        self.assertNotEqual(key_a, key_b)
+        self.assertEqual(key_a, self.cache.make_key(self.pdf_path, {'ocr_dpi': 72}))
+
+    def test_evicts_least_recently_used(self):
+        self.cache.put("old", PAGES)
+        entry_size = self.cache.stats()['bytes']
+        self.cache.max_bytes = entry_size * 2
+        old_time = time.time() - 60
+        os.utime(os.path.join(self.cache.cache_dir, "old.json.gz"), (old_time, old_time))
+        self.cache.put("newer", PAGES)
+        self.cache.put("newest", PAGES)
+        self.assertIsNone(self.cache.get("old"))
+        self.assertEqual(self.cache.get("newest"), PAGES)
+
+
+if __name__ == '__main__':
+    unittest.main()
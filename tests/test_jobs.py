@@ -0,0 +1,92 @@
+import threading
+import time
+import unittest
+
+from src.config import Config
+from src.jobs import LocalJobManager, JobQueueFull
+
+
+class FakePDFProcessor:
+    def extract_preview_text(self, pdf_path, max_pages=5):
+        return "City of Tulsa\nBudget FY 2024-25\n"
+
+
+class FakeRAG:
+    """Just enough of CityBudgetRAG for the job runner"""
+
+    def __init__(self, fail=False, gate=None):
+        self.config = Config()
+        self.config.OPENAI_API_KEY = None  # Regex/file name detection only
+        self.pdf_processor = FakePDFProcessor()
+        self.fail = fail
+        self.gate = gate
+
+    def ingest_document(self, pdf_path, metadata, progress_callback=None):
+        if self.gate:
+            self.gate.wait(5)
+        progress_callback("storing", 0.5)
+        if self.fail:
+            return {"status": "error", "error": "embedding service down"}
+        return {"status": "success", "chunks_processed": 3, "pages_processed": 1,
+                "city_name": metadata["city_name"], "fiscal_year": metadata["fiscal_year"],
+                "document_id": "tulsa_2024-25"}
+
+
+def wait_for(manager, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+class TestLocalJobManager(unittest.TestCase):
+    def test_successful_job(self):
+        finished = []
+        manager = LocalJobManager(FakeRAG())
+        job_id = manager.submit_upload("budget.pdf", "tulsa.pdf", "abc123",
+                                       on_success=lambda job_id, result: finished.append(job_id))
+        job = wait_for(manager, job_id)
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual(job["progress"], 1.0)
+        self.assertEqual(job["result"]["city_name"], "Tulsa")
+        self.assertEqual(job["result"]["file_id"], "abc123")
+        self.assertEqual(finished, [job_id])
+
+    def test_failed_job(self):
+        manager = LocalJobManager(FakeRAG(fail=True))
+        job = wait_for(manager, manager.submit_upload("budget.pdf", "tulsa.pdf", "abc123"))
+        self.assertEqual(job["status"], "failed")
+        self.assertIn("embedding service down", job["error"])
+
+    def test_pending_jobs_are_bounded(self):
+        gate = threading.Event()
+        manager = LocalJobManager(FakeRAG(gate=gate), max_workers=1, max_pending=2)
+        manager.submit_upload("a.pdf", "a.pdf", "a")
+        manager.submit_upload("b.pdf", "b.pdf", "b")
+        with self.assertRaises(JobQueueFull):
+            manager.submit_upload("c.pdf", "c.pdf", "c")
+        gate.set()
+
+    def test_finished_jobs_are_evicted(self):
+        manager = LocalJobManager(FakeRAG(), max_finished=1)
+        first = manager.submit_upload("a.pdf", "a.pdf", "a")
+        wait_for(manager, first)
+        second = manager.submit_upload("b.pdf", "b.pdf", "b")
+        wait_for(manager, second)
+        self.assertIsNone(manager.get(first))
+        self.assertEqual(manager.get(second)["status"], "succeeded")
+
+        manager.job_ttl = 0.05
+        time.sleep(0.1)
+        self.assertIsNone(manager.get(second))
+        self.assertEqual(manager._jobs, {})
+
+    def test_unknown_job(self):
+        self.assertIsNone(LocalJobManager(FakeRAG()).get("missing"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import tempfile
+import unittest
+
+from src.chunk import Chunk
+from src.lexical_index import LexicalIndex, is_lexical_query, reciprocal_rank_fusion, tokenize
+from src.query_engine import QueryEngine
+
+LINES = [
+    "Fund 2100 General Fund total $4,500,000.00",
+    "Fund 2200 Street Maintenance total $1,250,000",
+    "Police overtime 2024 adopted $3,100,000",
+    "Police overtime 2023 actual $2,900,000",
+    "The budget message describes long-term priorities for public safety.",
+]
+
+
+def chunks():
+    return [Chunk(f"c{i}", text, {"page_number": i + 1, "file_name": "budget.pdf", "document_id": "tulsa_2024"})
+            for i, text in enumerate(LINES)]
+
+
+class NoEmbeddings:
+    def generate_query_embedding(self, query):
+        raise AssertionError("lexical-only queries must not embed")
+
+
+class Embeddings:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_query_embedding(self, query):
+        self.calls += 1
+        return [1.0]
+
+
+class VectorStore:
+    def query(self, query_embedding, top_k=5, document_id=None):
+        return [{"content": LINES[4], "metadata": {"page_number": 5, "file_name": "budget.pdf",
+                                                   "document_id": document_id}, "score": 0.8}]
+
+
+class TestLexicalIndex(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = tmp.name
+        self.index = LexicalIndex(self.directory)
+        self.index.add("tulsa_2024", chunks())
+        self.index.save("tulsa_2024")
+
+    def test_tokens_normalise_amounts(self):
+        self.assertEqual(tokenize("Fund 2100: $4,500,000.00"), ["fund", "2100", "4500000"])
+
+    def test_lookup_queries(self):
+        self.assertTrue(is_lexical_query("Fund 2100 total"))
+        self.assertTrue(is_lexical_query("Police overtime 2024"))
+        self.assertFalse(is_lexical_query("How did police overtime change over the last five years?"))
+        self.assertFalse(is_lexical_query("What are the public safety priorities?"))
+
+    def test_exact_codes_rank_first_and_survive_reload(self):
+        reloaded = LexicalIndex(self.directory)
+        self.assertEqual(reloaded.search("tulsa_2024", "Fund 2100 total")[0]["content"], LINES[0])
+        self.assertEqual(reloaded.search("tulsa_2024", "police overtime 2024")[0]["content"], LINES[2])
+        self.assertEqual(reloaded.search("tulsa_2024", "4500000")[0]["content"], LINES[0])
+        self.assertEqual(reloaded.search("other_2024", "Fund 2100"), [])
+
+        reloaded.delete("tulsa_2024", ["c0"])
+        self.assertNotIn(LINES[0], [r["content"] for r in reloaded.search("tulsa_2024", "Fund 2100")])
+
+    def test_rank_fusion_favours_chunks_in_both_lists(self):
+        a, b, c = ({"content": text, "score": 1.0} for text in "abc")
+        self.assertEqual([r["content"] for r in reciprocal_rank_fusion([[a, b], [c, b]], top_k=3)], ["b", "a", "c"])
+
+    def test_query_engine_modes(self):
+        engine = QueryEngine("test-key", vector_store=VectorStore(), embedding_generator=NoEmbeddings(),
+                             lexical_index=self.index)
+        engine._generate_answer = lambda query, chunks: "answer"
+        response = engine.answer_query("Fund 2100 total", document_id="tulsa_2024", use_cache=False)
+        self.assertEqual(response["metadata"]["retrieval"], "lexical")
+        self.assertEqual(response["sources"][0]["page"], 1)
+        self.assertEqual(response["sources"][0]["pages"], "1")
+
+        embeddings = Embeddings()
+        engine.embedding_generator = embeddings
+        response = engine.answer_query("What are the police overtime priorities for public safety?",
+                                       document_id="tulsa_2024", use_cache=False)
+        self.assertEqual(response["metadata"]["retrieval"], "hybrid")
+        self.assertEqual(embeddings.calls, 1)
+        pages = [source["page"] for source in response["sources"]]
+        self.assertIn(5, pages)
+        self.assertIn(3, pages)
+
+
+if __name__ == '__main__':
+    unittest.main()
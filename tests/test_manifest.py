@@ -0,0 +1,34 @@
+import tempfile
+import unittest
+
+from src.manifest import ManifestStore, page_fingerprint, stale_chunk_ids
+
+
+class TestManifest(unittest.TestCase):
+    def test_fingerprint_covers_text_and_tables(self):
+        page = {'page_num': 3, 'text': 'Police overtime', 'tables': ['A | 1']}
+        self.assertEqual(page_fingerprint(page), page_fingerprint(dict(page, page_num=9)))
+        self.assertNotEqual(page_fingerprint(page), page_fingerprint(dict(page, tables=['A | 2'])))
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ManifestStore(tmp)
+            self.assertEqual(store.load("tulsa_2024"), {})
+            pages = {1: {"fingerprint": "abc", "chunk_ids": ["c1", "c2"]}}
+            store.save("tulsa_2024", pages, {"c1": (1, 1), "c2": (1, 2)})
+            self.assertEqual(store.load("tulsa_2024"), pages)
+            self.assertEqual(store.load_chunks("tulsa_2024"), {"c1": (1, 1), "c2": (1, 2)})
+            self.assertEqual(store.chunk_ids("tulsa_2024"), ["c1", "c2"])
+            self.assertEqual(store.chunk_ids("austin_2024"), [])
+
+    def test_stale_chunk_ids(self):
+        previous = {1: {"fingerprint": "a", "chunk_ids": ["c1"]},
+                    2: {"fingerprint": "b", "chunk_ids": ["c2", "c3"]},
+                    3: {"fingerprint": "c", "chunk_ids": ["c4"]}}
+        current = {1: previous[1],
+                   2: {"fingerprint": "b2", "chunk_ids": ["c2"]}}
+        self.assertEqual(stale_chunk_ids(previous, current), ["c3", "c4"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+import json
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from src.chunk import Chunk
+from src.quantization import train_pq
+from src.vector_store import NumpyVectorStore
+
+
+def make_chunks(prefix, vectors):
+    return [Chunk(f"{prefix}_{i}", f"{prefix} text {i}", {"page_number": i + 1}, np.asarray(vector, dtype=np.float32))
+            for i, vector in enumerate(vectors)]
+
+
+class TestNumpyVectorStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.rng = np.random.default_rng(0)
+
+    def test_query_returns_exact_top_k_of_the_active_document_only(self):
+        store = NumpyVectorStore(self.tmp.name)
+        tulsa = self.rng.normal(size=(50, 16)).astype(np.float32)
+        store.store_embeddings(make_chunks("tulsa", tulsa), document_id="tulsa_2024")
+        store.store_embeddings(make_chunks("austin", self.rng.normal(size=(30, 16))), document_id="austin_2024")
+
+        query = self.rng.normal(size=16).astype(np.float32)
+        store.set_active_document_id("tulsa_2024")
+        results = store.query(query, top_k=5)
+
+        unit = tulsa / np.linalg.norm(tulsa, axis=1, keepdims=True)
+        expected = np.argsort(-(unit @ (query / np.linalg.norm(query))))[:5]
+        self.assertEqual([r["content"] for r in results], [f"tulsa text {i}" for i in expected])
+        self.assertTrue(all(r["metadata"]["document_id"] == "tulsa_2024" for r in results))
+        self.assertEqual(results, sorted(results, key=lambda r: -r["score"]))
+
+    def test_upsert_delete_and_update_persist_across_instances(self):
+        store = NumpyVectorStore(self.tmp.name)
+        vectors = np.eye(4, dtype=np.float32)
+        store.store_embeddings(make_chunks("doc", vectors), document_id="doc")
+        # Re-storing a chunk replaces it instead of adding a row
+        store.store_embeddings(make_chunks("doc", vectors[[3]]), document_id="doc")
+        store.delete(["doc_1"])
+        store.update_metadata({"doc_2": {"source_pages": "3,9"}})
+
+        reopened = NumpyVectorStore(self.tmp.name)
+        reopened.set_active_document_id("doc")
+        results = reopened.query(vectors[3], top_k=10)
+        self.assertEqual(len(results), 3)
+        self.assertEqual({r["content"] for r in results[:2]}, {"doc text 0", "doc text 3"})
+        self.assertAlmostEqual(results[0]["score"], 1.0, places=5)
+        self.assertEqual(next(r for r in results if r["content"] == "doc text 2")["metadata"]["source_pages"], "3,9")
+        self.assertIsInstance(reopened._partition("doc").matrix, np.memmap)
+
+    def test_batches_are_appended_not_rewritten(self):
+        store = NumpyVectorStore(self.tmp.name)
+        vectors = self.rng.normal(size=(40, 8)).astype(np.float32)
+        chunks = make_chunks("doc", vectors)
+        for start in range(0, 40, 10):
+            store.store_embeddings(chunks[start:start + 10], document_id="doc")
+        path = store._path("doc")
+        with (path / "records.json").open() as f:
+            self.assertEqual(len(json.load(f)["ids"]), 10)
+        self.assertEqual(np.load(path / "vectors.npy").shape, (40, 8))
+
+        reopened = NumpyVectorStore(self.tmp.name)
+        self.assertEqual(reopened._partition("doc").ids, [chunk["chunk_id"] for chunk in chunks])
+        self.assertEqual(reopened.query(vectors[27], top_k=1, document_id="doc")[0]["content"], "doc text 27")
+
+        # A delete rewrites both files and starts over with an empty log
+        reopened.delete(["doc_3"], document_id="doc")
+        with (path / "records.json").open() as f:
+            self.assertEqual(len(json.load(f)["ids"]), 39)
+        self.assertEqual(len(list(path.glob("records.*.log"))), 0)
+        self.assertEqual(len(NumpyVectorStore(self.tmp.name)._partition("doc").ids), 39)
+
+    def test_unfinished_append_is_ignored(self):
+        store = NumpyVectorStore(self.tmp.name)
+        vectors = self.rng.normal(size=(20, 8)).astype(np.float32)
+        store.store_embeddings(make_chunks("doc", vectors[:10]), document_id="doc")
+        store.store_embeddings(make_chunks("doc", vectors)[10:], document_id="doc")
+        path = store._path("doc")
+        log = next(path.glob("records.*.log"))
+        lines = log.read_text().splitlines(keepends=True)
+        log.write_text("".join(lines[:5]) + lines[5][:20])
+
+        reopened = NumpyVectorStore(self.tmp.name)
+        self.assertEqual(len(reopened._partition("doc").ids), 15)
+        self.assertEqual(reopened._partition("doc").matrix.shape, (15, 8))
+        reopened.store_embeddings(make_chunks("new", vectors[:2]), document_id="doc")
+        self.assertEqual(np.load(path / "vectors.npy").shape, (17, 8))
+        self.assertEqual(NumpyVectorStore(self.tmp.name).query(vectors[0], top_k=1, document_id="doc")[0]["score"],
+                         reopened.query(vectors[0], top_k=1, document_id="doc")[0]["score"])
+
+    def test_unknown_document_returns_no_matches(self):
+        store = NumpyVectorStore(self.tmp.name)
+        store.set_active_document_id("missing")
+        self.assertEqual(store.query([1.0, 0.0], top_k=3), [])
+
+
+class TestQuantizedNumpyVectorStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        rng = np.random.default_rng(1)
+        topics = rng.normal(size=(20, 64))
+        self.vectors = (topics[rng.integers(0, 20, 600)] + 0.6 * rng.normal(size=(600, 64))).astype(np.float32)
+        self.queries = self.vectors[:20] + 0.2 * rng.normal(size=(20, 64)).astype(np.float32)
+
+    def top_contents(self, store):
+        return [[r["content"] for r in store.query(query, top_k=5, document_id="doc")] for query in self.queries]
+
+    def test_quantized_search_matches_exact_search_after_rescoring(self):
+        exact = NumpyVectorStore(self.tmp.name, "exact")
+        exact.store_embeddings(make_chunks("doc", self.vectors), document_id="doc")
+        expected = self.top_contents(exact)
+        for quantization in ("int8", "pq"):
+            store = NumpyVectorStore(self.tmp.name, quantization, quantization=quantization)
+            store.store_embeddings(make_chunks("doc", self.vectors), document_id="doc")
+            store.finish_ingest("doc")
+            found = self.top_contents(store)
+            recall = np.mean([len(set(a) & set(b)) / 5 for a, b in zip(found, expected)])
+            self.assertGreaterEqual(recall, 0.9, quantization)
+            memory = store.memory_bytes("doc")
+            self.assertLess(memory["resident"], memory["full"])
+
+    def test_quantization_is_remembered_per_collection(self):
+        store = NumpyVectorStore(self.tmp.name, "budgets", quantization="int8")
+        store.store_embeddings(make_chunks("doc", self.vectors), document_id="doc")
+        store.finish_ingest("doc")
+
+        reopened = NumpyVectorStore(self.tmp.name, "budgets")
+        self.assertEqual(reopened.quantization, "int8")
+        self.assertEqual(NumpyVectorStore(self.tmp.name, "other").quantization, "none")
+        # Codes were saved with the vectors and are reused, until the vectors change
+        self.assertTrue((reopened._path("doc") / "quantized.npz").exists())
+        reopened.update_metadata({"doc_1": {"source_pages": "2"}}, document_id="doc")
+        self.assertTrue((reopened._path("doc") / "quantized.npz").exists())
+        reopened.delete(["doc_1"], document_id="doc")
+        self.assertFalse((reopened._path("doc") / "quantized.npz").exists())
+        self.assertEqual(len(reopened.query(self.queries[0], top_k=5, document_id="doc")), 5)
+
+    def test_queries_and_other_documents_do_not_wait_for_training(self):
+        exact = NumpyVectorStore(self.tmp.name, "exact")
+        exact.store_embeddings(make_chunks("doc", self.vectors), document_id="doc")
+        store = NumpyVectorStore(self.tmp.name, "pq", quantization="pq")
+        store.store_embeddings(make_chunks("doc", self.vectors), document_id="doc")
+
+        release = threading.Event()
+
+        def slow_train(matrix, subvectors):
+            release.wait(10)
+            return train_pq(matrix, subvectors)
+
+        with mock.patch("src.vector_store.train_pq", slow_train):
+            # No codes yet: the query starts a background build and scans the full rows meanwhile
+            self.assertEqual(self.top_contents(store), self.top_contents(exact))
+            self.assertIsNone(store._partition("doc").quantized)
+            store.store_embeddings(make_chunks("other", self.vectors[:10]), document_id="other")
+            self.assertEqual(len(store.query(self.queries[0], top_k=5, document_id="other")), 5)
+            release.set()
+            store._builds["doc"].result()
+        self.assertIsNotNone(store._partition("doc").quantized)
+        self.assertTrue((store._path("doc") / "quantized.npz").exists())
+
+    def test_codes_trained_on_replaced_vectors_are_dropped(self):
+        store = NumpyVectorStore(self.tmp.name, "pq", quantization="pq")
+        store.store_embeddings(make_chunks("doc", self.vectors[:300]), document_id="doc")
+
+        def train_while_vectors_change(matrix, subvectors):
+            store.store_embeddings(make_chunks("late", self.vectors[300:]), document_id="doc")
+            return train_pq(matrix, subvectors)
+
+        with mock.patch("src.vector_store.train_pq", train_while_vectors_change):
+            store.finish_ingest("doc")
+        self.assertIsNone(store._partition("doc").quantized)
+        self.assertFalse((store._path("doc") / "quantized.npz").exists())
+        store.finish_ingest("doc")
+        self.assertEqual(len(store._partition("doc").quantized["codes"]), 600)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import hashlib
+import io
+import tempfile
+import unittest
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+from src.ocr_engine import OCREngine
+
+
+class TestOCREngine(unittest.TestCase):
+    def setUp(self):
+        self.doc = fitz.open()
+        page = self.doc.new_page()
+        page.insert_text((72, 72), "Scanned appendix: Fund 2100 $1,250,000")
+        self.page = page
+
+    def tearDown(self):
+        self.doc.close()
+
+    def test_image_matches_png_round_trip(self):
+        engine = OCREngine(dpi=100)
+        pix = engine.rasterize(self.page)
+        image = engine.to_image(pix)
+        png_image = Image.open(io.BytesIO(pix.pil_tobytes(format="PNG")))
+        self.assertEqual(image.size, png_image.size)
+        self.assertEqual(image.tobytes(), png_image.convert("L").tobytes())
+
+    def test_cached_page_skips_tesseract(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = OCREngine(dpi=100, cache_dir=tmp)
+            pix = engine.rasterize(self.page)
+            engine._cache_put(hashlib.sha256(pix.samples_mv).hexdigest(), "cached text")
+
+            # A fresh engine only has the on-disk cache to go on
+            text, seconds = OCREngine(dpi=100, cache_dir=tmp).ocr_page(self.page)
+            self.assertEqual(text, "cached text")
+            self.assertGreaterEqual(seconds, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
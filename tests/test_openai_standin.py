@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+
+from src.embeddings import EmbeddingGenerator
+from src.metadata import extract_metadata_with_ai
+from src.openai_standin import StandInServer, hashed_embedding
+from src.query_engine import QueryEngine
+from src.rate_limiter import RateLimiter
+
+
+class TestOpenAIStandIn(unittest.TestCase):
+    def test_hashed_embeddings_are_deterministic_and_similar_for_shared_words(self):
+        police = hashed_embedding("Police department overtime budget", 256)
+        np.testing.assert_array_equal(police, hashed_embedding("police department overtime budget", 256))
+        self.assertAlmostEqual(float(np.linalg.norm(police)), 1.0, places=5)
+        near = hashed_embedding("Police department overtime costs", 256)
+        far = hashed_embedding("Library branch opening hours", 256)
+        self.assertGreater(float(police @ near), float(police @ far))
+
+    def test_clients_work_against_the_stand_in(self):
+        with StandInServer() as server:
+            generator = EmbeddingGenerator(api_key="test-key", dimensions=64, base_url=server.base_url)
+            chunks = generator.generate_embeddings([{"text": "Police overtime"}, {"text": "Fire apparatus"}])
+            np.testing.assert_allclose(chunks[0]["embedding"], hashed_embedding("Police overtime", 64))
+            generator.close()
+
+            engine = QueryEngine("test-key", vector_store=None, embedding_generator=generator,
+                                 base_url=server.base_url)
+            answer = engine._generate_answer("What is police overtime?", [
+                {"content": "Police overtime is $4M", "metadata": {"page_number": 12, "file_name": "budget.pdf"}}])
+            self.assertIn("Page 12", answer)
+
+            city, year = extract_metadata_with_ai("City of Tulsa Adopted Budget FY 2024-25", "test-key",
+                                                  base_url=server.base_url)
+            self.assertEqual((city, year), ("Tulsa", "2024-25"))
+
+    def test_errors_and_rate_limits_are_retried(self):
+        with StandInServer(error_rate=0.3, requests_per_minute=600, seed=4) as server:
+            generator = EmbeddingGenerator(api_key="test-key", dimensions=8, base_url=server.base_url,
+                                           concurrency=4, max_batch_items=2,
+                                           rate_limiter=RateLimiter(1200, burst_seconds=0.1))
+            chunks = [{"text": f"chunk {i}"} for i in range(20)]
+            generator.generate_embeddings(chunks)
+            generator.close()
+            self.assertTrue(all("embedding" in chunk for chunk in chunks))
+            self.assertGreater(server.counters["errors"] + server.counters["rate_limited"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+
+import fitz  # PyMuPDF
+
+from src.pdf_processor import PDFProcessor
+from src.extraction_cache import ExtractionCache
+
+
+def make_pdf(path, pages=4):
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        page.insert_text((50, 50), f"Budget summary page {page_num + 1}. " * 3)
+        if page_num % 2 == 0:
+            y = 100
+            for row in range(8):
+                for x, cell in zip((50, 200, 350), (f"Fund {1000 + row}", f"${row * 1250:,}", f"${row * 1300:,}")):
+                    page.insert_text((x, y), cell)
+                y += 18
+    doc.save(path)
+    doc.close()
+
+
+class TestPDFProcessor(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pdf_path = os.path.join(self.tmp.name, "budget.pdf")
+        make_pdf(self.pdf_path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_document_tables_match_page_tables(self):
+        processor = PDFProcessor(table_mode="page")
+        per_page = [page['tables'] for page in processor.extract_text_from_pdf(self.pdf_path)]
+        processor = PDFProcessor(table_mode="document")
+        content = processor.extract_text_from_pdf(self.pdf_path)
+        self.assertEqual([page['page_num'] for page in content], [1, 2, 3, 4])
+        self.assertEqual([page['tables'] for page in content], per_page)
+
+    def test_parallel_extraction_keeps_page_order(self):
+        sequential = PDFProcessor().extract_text_from_pdf(self.pdf_path)
+        parallel = PDFProcessor(workers=2).extract_text_from_pdf(self.pdf_path)
+        self.assertEqual(parallel, sequential)
+
+    def test_cached_extraction(self):
+        cache = ExtractionCache(os.path.join(self.tmp.name, "cache"))
+        processor = PDFProcessor(cache=cache)
+        first = processor.extract_text_from_pdf(self.pdf_path)
+        second = processor.extract_text_from_pdf(self.pdf_path)
+        self.assertEqual(first, second)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_heuristic_table_detection(self):
+        content = PDFProcessor(table_detection="heuristic").extract_text_from_pdf(self.pdf_path)
+        self.assertEqual([page['table_scan'] for page in content],
+                         ["extracted", "skipped", "extracted", "skipped"])
+        self.assertEqual([bool(page['tables']) for page in content], [True, False, True, False])
+
+    def test_table_detection_off(self):
+        content = PDFProcessor(table_detection="off").extract_text_from_pdf(self.pdf_path)
+        self.assertTrue(all(page['tables'] == [] and page['table_scan'] == "off" for page in content))
+
+    def test_preview_text(self):
+        preview = PDFProcessor().extract_preview_text(self.pdf_path, max_pages=2)
+        self.assertIn("Budget summary page 2", preview)
+        self.assertNotIn("Budget summary page 3", preview)
+
+    def test_invalid_table_mode(self):
+        with self.assertRaises(ValueError):
+            PDFProcessor(table_mode="sometimes")
+
+
+if __name__ == '__main__':
+    unittest.main()
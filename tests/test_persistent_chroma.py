@@ -0,0 +1,55 @@
+import json
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+import numpy as np
+
+from src.catalog import DocumentCatalog
+from src.chunk import Chunk
+from src.vector_store import ChromaVectorStore
+
+
+class TestDocumentCatalog(unittest.TestCase):
+    def test_entries_survive_reopening(self):
+        with tempfile.TemporaryDirectory() as directory:
+            catalog = DocumentCatalog(f"{directory}/catalog.json")
+            catalog.record("tulsa_2024", city_name="Tulsa", chunks=10)
+            catalog.record("tulsa_2024", chunks=12)
+            catalog.record("austin_2024", city_name="Austin", chunks=3)
+            catalog.remove("austin_2024")
+
+            reopened = DocumentCatalog(f"{directory}/catalog.json")
+            self.assertIn("tulsa_2024", reopened)
+            self.assertNotIn("austin_2024", reopened)
+            self.assertEqual(reopened.get("tulsa_2024")["city_name"], "Tulsa")
+            self.assertEqual(reopened.get("tulsa_2024")["chunks"], 12)
+
+
+class TestPersistentChroma(unittest.TestCase):
+    def test_collection_and_catalog_load_in_a_new_process(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = ChromaVectorStore("budgets", persist_directory=directory)
+            vectors = np.eye(4, dtype=np.float32)
+            store.store_embeddings([Chunk(f"c{i}", f"text {i}", {"page_number": i}, vector)
+                                    for i, vector in enumerate(vectors)], document_id="tulsa_2024")
+
+            # A fresh process, as after an API restart; the catalog is rebuilt from the collection
+            script = textwrap.dedent(f"""
+                import json
+                from src.vector_store import ChromaVectorStore
+                store = ChromaVectorStore("budgets", persist_directory={directory!r})
+                store.set_active_document_id("tulsa_2024")
+                results = store.query([0.0, 0.0, 1.0, 0.0], top_k=1)
+                print(json.dumps({{"documents": store.catalog.documents(), "top": results[0]["content"]}}))
+            """)
+            output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+            loaded = json.loads(output.stdout.strip().splitlines()[-1])
+            self.assertEqual(loaded["top"], "text 2")
+            self.assertEqual(loaded["documents"]["tulsa_2024"]["chunks"], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
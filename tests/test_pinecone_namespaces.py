@@ -0,0 +1,82 @@
+import time
+import unittest
+
+import numpy as np
+
+from src.chunk import Chunk
+from src.pinecone_standin import StandInIndex, matches_filter
+from src.vector_store import PineconeVectorStore
+
+
+def make_chunks(prefix, count, dimension=8, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(count, dimension)).astype(np.float32)
+    return [Chunk(f"{prefix}_{i}", f"{prefix} text {i}", {"page_number": i + 1}, vector)
+            for i, vector in enumerate(vectors)]
+
+
+class TestPineconeNamespaces(unittest.TestCase):
+    def test_filter_language(self):
+        metadata = {"document_id": "a", "page_number": 3}
+        self.assertTrue(matches_filter(metadata, {"$or": [{"document_id": {"$eq": "b"}}, {"page_number": 3}]}))
+        self.assertFalse(matches_filter(metadata, {"$and": [{"document_id": "a"}, {"page_number": {"$in": [1]}}]}))
+
+    def test_documents_are_written_to_and_read_from_their_namespace(self):
+        index = StandInIndex(dimension=8)
+        store = PineconeVectorStore(index=index, namespaces=True, upsert_workers=4, upsert_batch_size=10)
+        store.store_embeddings(make_chunks("tulsa", 45), document_id="tulsa_2024")
+        store.store_embeddings(make_chunks("austin", 20, seed=1), document_id="austin_2024")
+
+        namespaces = index.describe_index_stats().namespaces
+        self.assertEqual(namespaces, {"tulsa_2024": {"vector_count": 45}, "austin_2024": {"vector_count": 20}})
+        self.assertEqual(index.calls["upsert"], 5 + 2)
+
+        store.set_active_document_id("austin_2024")
+        results = store.query(np.ones(8, dtype=np.float32), top_k=50)
+        self.assertEqual(len(results), 20)
+        self.assertTrue(all(r["content"].startswith("austin") for r in results))
+
+        store.delete(["austin_0"], document_id="austin_2024")
+        self.assertEqual(index.describe_index_stats().namespaces["austin_2024"]["vector_count"], 19)
+
+    def test_migration_moves_filtered_vectors_into_namespaces(self):
+        index = StandInIndex(dimension=8)
+        legacy = PineconeVectorStore(index=index)
+        legacy.store_embeddings(make_chunks("tulsa", 25), document_id="tulsa_2024")
+        legacy.store_embeddings(make_chunks("austin", 5, seed=1), document_id="austin_2024")
+        legacy.set_active_document_id("tulsa_2024")
+        before = legacy.query(np.ones(8, dtype=np.float32), top_k=3)
+
+        store = PineconeVectorStore(index=index, namespaces=True)
+        moved = store.migrate_to_namespaces(["tulsa_2024"], batch_size=10)
+
+        self.assertEqual(moved, {"tulsa_2024": 25})
+        namespaces = index.describe_index_stats().namespaces
+        self.assertEqual(namespaces["tulsa_2024"]["vector_count"], 25)
+        self.assertEqual(namespaces[""]["vector_count"], 5)
+        store.set_active_document_id("tulsa_2024")
+        after = store.query(np.ones(8, dtype=np.float32), top_k=3)
+        self.assertEqual([r["content"] for r in after], [r["content"] for r in before])
+
+    def test_migration_with_lagging_deletes_moves_each_vector_once(self):
+        index = StandInIndex(dimension=8, delete_lag=0.3)
+        legacy = PineconeVectorStore(index=index)
+        legacy.store_embeddings(make_chunks("tulsa", 25), document_id="tulsa_2024")
+        legacy.store_embeddings(make_chunks("austin", 12, seed=1), document_id="austin_2024")
+
+        store = PineconeVectorStore(index=index, namespaces=True)
+        austin_ids = [f"austin_{i}" for i in range(12)]
+        moved = store.migrate_to_namespaces(["tulsa_2024", "austin_2024"], batch_size=10,
+                                            chunk_ids={"austin_2024": austin_ids})
+
+        # Deleted vectors were still visible throughout, and were not picked up again
+        self.assertEqual(moved, {"tulsa_2024": 25, "austin_2024": 12})
+        self.assertEqual(index.calls["query"], 1)
+        self.assertEqual(index.calls["fetch"], 3 + 2)
+        time.sleep(0.35)
+        namespaces = index.describe_index_stats().namespaces
+        self.assertEqual({name: stats["vector_count"] for name, stats in namespaces.items()},
+                         {"": 0, "tulsa_2024": 25, "austin_2024": 12})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import threading
+import time
+import unittest
+
+from src.pipeline import threaded_stage, rebatch
+
+
+class TestPipeline(unittest.TestCase):
+    def test_stages_preserve_order(self):
+        doubled = threaded_stage((x * 2 for x in threaded_stage(iter(range(50)), 2)), 2)
+        self.assertEqual(list(doubled), [x * 2 for x in range(50)])
+
+    def test_stage_error_reaches_consumer(self):
+        def failing():
+            yield 1
+            raise RuntimeError("extraction failed")
+
+        stage = threaded_stage(failing(), 1)
+        self.assertEqual(next(stage), 1)
+        with self.assertRaises(RuntimeError):
+            next(stage)
+
+    def test_queue_depth_bounds_read_ahead(self):
+        produced = []
+
+        def source():
+            for i in range(100):
+                produced.append(i)
+                yield i
+
+        stage = threaded_stage(source(), 2)
+        next(stage)
+        time.sleep(0.2)
+        # One item consumed, two queued, one blocked in put()
+        self.assertLessEqual(len(produced), 4)
+        stage.close()
+
+    def test_closing_stops_upstream_threads(self):
+        def endless():
+            i = 0
+            while True:
+                yield i
+                i += 1
+
+        before = threading.active_count()
+        stage = threaded_stage(threaded_stage(endless(), 1), 1)
+        next(stage)
+        stage.close()
+        self.assertEqual(threading.active_count(), before)
+
+    def test_rebatch(self):
+        batches = list(rebatch([[1, 2, 3], [4], [5, 6, 7, 8, 9]], 4))
+        self.assertEqual(batches, [[1, 2, 3, 4], [5, 6, 7, 8], [9]])
+
+
+if __name__ == '__main__':
+    unittest.main()
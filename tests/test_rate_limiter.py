@@ -0,0 +1,119 @@
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+
+from src.embeddings import EmbeddingGenerator
+from src.rate_limiter import RateLimiter, TokenBucket, call_with_retries, is_retryable
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class APIError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_paced(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, clock=clock)  # one per second, 60 burst
+        self.assertEqual([bucket.reserve() for _ in range(60)], [0.0] * 60)
+        self.assertAlmostEqual(bucket.reserve(), 1.0)
+        self.assertAlmostEqual(bucket.reserve(), 2.0)
+        clock.now = 2.0
+        self.assertAlmostEqual(bucket.reserve(), 1.0)
+
+    def test_limiter_waits_for_the_tighter_budget(self):
+        clock = FakeClock()
+        limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=6000, sleep=clock.sleep, clock=clock)
+        limiter.acquire(6000)
+        self.assertAlmostEqual(limiter.acquire(600), 6.0)  # 600 tokens at 100 tokens/s
+
+
+class TestRetries(unittest.TestCase):
+    def test_retries_rate_limits_then_succeeds(self):
+        attempts, sleeps = [], []
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise APIError(429, {"retry-after": "2"})
+            return "ok"
+
+        self.assertEqual(call_with_retries(flaky, sleep=sleeps.append), "ok")
+        self.assertEqual(len(sleeps), 2)
+        self.assertTrue(all(delay >= 2 for delay in sleeps))
+
+    def test_client_errors_are_not_retried(self):
+        self.assertFalse(is_retryable(APIError(400)))
+        self.assertTrue(is_retryable(APIError(503)))
+        with self.assertRaises(APIError):
+            call_with_retries(lambda: (_ for _ in ()).throw(APIError(400)), sleep=lambda s: None)
+
+    def test_gives_up_after_max_retries(self):
+        sleeps = []
+        with self.assertRaises(APIError):
+            call_with_retries(lambda: (_ for _ in ()).throw(APIError(500)), max_retries=3, sleep=sleeps.append)
+        self.assertEqual(len(sleeps), 3)
+
+
+class SlowEmbeddings:
+    """Fake embeddings endpoint with latency that fails the first call with a 429"""
+
+    def __init__(self, latency=0.05):
+        self.latency = latency
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def create(self, model, input, **kwargs):
+        with self._lock:
+            self.calls += 1
+            first = self.calls == 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            if first:
+                raise APIError(429)
+            return SimpleNamespace(data=[SimpleNamespace(embedding=[float(text.split()[1])]) for text in input])
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class TestConcurrentEmbedding(unittest.TestCase):
+    def test_batches_run_concurrently_and_survive_a_429(self):
+        generator = EmbeddingGenerator(api_key="test-key", concurrency=4)
+        generator.client = SimpleNamespace(embeddings=SlowEmbeddings())
+        chunks = [{"text": f"chunk {i}"} for i in range(40)]
+        generator.generate_embeddings(chunks, batch_size=5)
+        self.assertEqual([chunk["embedding"][0] for chunk in chunks], list(range(40)))
+        self.assertGreater(generator.client.embeddings.max_in_flight, 1)
+        generator.close()
+
+    def test_streamed_batches_keep_their_order(self):
+        generator = EmbeddingGenerator(api_key="test-key", concurrency=3)
+        generator.client = SimpleNamespace(embeddings=SlowEmbeddings(latency=0.01))
+        batches = [[{"text": f"chunk {i * 10 + j}"} for j in range(10)] for i in range(6)]
+        out = list(generator.iter_embeddings(iter(batches), batch_size=4))
+        self.assertEqual([[c["embedding"][0] for c in batch] for batch in out],
+                         [[float(i * 10 + j) for j in range(10)] for i in range(6)])
+        generator.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import re
+import unittest
+
+import tiktoken
+
+from src.token_chunker import TokenChunker
+
+# Byte-level encoding so the test needs no downloaded vocabulary
+BYTE_ENCODING = tiktoken.Encoding(
+    name="test_bytes",
+    pat_str=r"""'s|'t|'re|'ve|'m|'ll|'d| ?\p{L}+| ?\p{N}+| ?[^\s\p{L}\p{N}]+|\s+(?!\S)|\s+""",
+    mergeable_ranks={bytes([i]): i for i in range(256)},
+    special_tokens={}
+)
+
+
+class WordEncoding:
+    """Word-level tokens where the leading space belongs to the word, as in cl100k"""
+    PIECES = re.compile(r" ?\w+| ?[^\s\w]+|\s+")
+
+    def __init__(self):
+        self.pieces = []
+
+    def encode_ordinary(self, text):
+        self.pieces = self.PIECES.findall(text)
+        return list(range(len(self.pieces)))
+
+    def decode_with_offsets(self, tokens):
+        offsets, position = [], 0
+        for token in tokens:
+            offsets.append(position)
+            position += len(self.pieces[token])
+        return "".join(self.pieces[token] for token in tokens), offsets
+
+
+class TestTokenChunker(unittest.TestCase):
+    def setUp(self):
+        self.chunker = TokenChunker(BYTE_ENCODING, chunk_size=200, chunk_overlap=40)
+
+    def test_short_text_is_one_chunk(self):
+        self.assertEqual(self.chunker.split_text("  Police overtime  "), [("Police overtime", 19)])
+
+    def test_chunks_respect_size_and_counts(self):
+        text = "The proposed budget maintains core services. " * 60
+        chunks = self.chunker.split_text(text)
+        self.assertGreater(len(chunks), 1)
+        for chunk, token_count in chunks:
+            self.assertLessEqual(len(BYTE_ENCODING.encode_ordinary(chunk)), 200)
+            self.assertLessEqual(len(BYTE_ENCODING.encode_ordinary(chunk)), token_count)
+
+    def test_prefers_paragraph_breaks(self):
+        paragraph = "Revenue grows with property tax receipts. " * 3
+        text = "\n\n".join([paragraph.strip()] * 6)
+        for chunk, _ in self.chunker.split_text(text)[:-1]:
+            self.assertTrue(chunk.endswith("receipts."), chunk[-30:])
+
+    def test_split_leaves_next_word_out_when_space_leads_the_token(self):
+        text = " ".join(f"Sentence {i} covers the police budget." for i in range(80))
+        chunker = TokenChunker(WordEncoding(), chunk_size=50, chunk_overlap=10)
+        chunks = [chunk for chunk, _ in chunker.split_text(text)]
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertTrue(chunk.endswith("budget."), chunk[-30:])
+
+    def test_chunks_overlap_on_word_boundaries(self):
+        text = " ".join(f"item{i}" for i in range(200))
+        chunks = [chunk for chunk, _ in self.chunker.split_text(text)]
+        for previous, current in zip(chunks, chunks[1:]):
+            first_word = current.split()[0]
+            self.assertIn(first_word, previous.split())
+
+    def test_unicode_offsets(self):
+        text = "Café budget – €1,200 für Straßen. " * 40
+        chunks = self.chunker.split_spans(text)
+        self.assertEqual(text[chunks[0][0]:chunks[0][1]].split()[0], "Café")
+        self.assertTrue(text.strip().endswith(text[chunks[-1][0]:chunks[-1][1]]))
+
+
+if __name__ == '__main__':
+    unittest.main()
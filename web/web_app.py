@@ -2,6 +2,7 @@
 from flask import Flask, render_template, request, jsonify, send_from_directory
 from flask_cors import CORS
 import os
+import time
 from pathlib import Path
 import requests
 
@@ -39,6 +40,16 @@ def list_documents():
     """List all uploaded documents"""
     return jsonify(uploaded_documents)
 
+def wait_for_job(job_id, poll_seconds=2):
+    """Block until a backend ingestion job finishes and return its result"""
+    while True:
+        job = requests.get(f"{API_BASE_URL}/jobs/{job_id}").json()
+        if job["status"] == "succeeded":
+            return job["result"]
+        if job["status"] == "failed":
+            raise RuntimeError(job.get("error") or "Processing failed")
+        time.sleep(poll_seconds)
+
 @app.route('/api/upload', methods=['POST'])
 def upload_document():
     """Proxy upload to the FastAPI backend"""
@@ -63,7 +74,7 @@ def upload_document():
         response = requests.post(f"{API_BASE_URL}/ingest", files=files, data=data)
         
         if response.ok:
-            result = response.json()
+            result = wait_for_job(response.json()["job_id"])
             # Store document info
             uploaded_documents.append({
                 'city': city_name,